@@ -1,3 +1,8 @@
+import time
+startup_start_ft = time.perf_counter()
+# -measured before the other imports so that the time for importing PyQt and the bwb modules is included
+
+import argparse
 import sqlite3
 import sys
 import logging
@@ -8,14 +13,64 @@ from PyQt5 import QtCore
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 
+import bwb.db_writer
 import bwb.model
 import bwb.bwbglobal
 import bwb.window
 
 
+class StartupTimer:
+    """Logs the time for each phase of the startup, so that we can follow the time until the window can be used"""
+    def __init__(self, i_start_ft: float) -> None:
+        self.start_ft = i_start_ft
+        self.phase_start_ft = i_start_ft
+
+    def log_phase(self, i_phase_name_str: str) -> None:
+        now_ft = time.perf_counter()
+        logging.info(
+            "Startup: " + i_phase_name_str + " took " + "{:.0f}".format((now_ft - self.phase_start_ft) * 1000)
+            + " ms (" + "{:.0f}".format((now_ft - self.start_ft) * 1000) + " ms since start)")
+        self.phase_start_ft = now_ft
+
+
 if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)
+    startup_timer = StartupTimer(startup_start_ft)
+    startup_timer.log_phase("imports")
+
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument(
+        "--storage-profile", choices=[profile.name for profile in bwb.model.StorageProfileEnum],
+        default=bwb.model.active_storage_profile.name,
+        help="Pragma settings for the database (\"memory\" means that nothing is saved to disk)")
+    argument_parser.add_argument("--db-file", default=bwb.model.DATABASE_FILE_NAME)
+    argument_parser.add_argument(
+        "--test-data", action="store_true",
+        help="Add example diary entries and reminders if the database is new (for trying out the application)")
+    argument_parser.add_argument(
+        "--trace-sql", action="store_true",
+        help="Collect statistics for the SQL statements and model methods, and log slow queries")
+    argument_parser.add_argument(
+        "--slow-query-ms", type=float, default=bwb.model.DEFAULT_SLOW_QUERY_MS_FT,
+        help="Statements that take longer than this are logged together with their query plan (with --trace-sql)")
+    (parsed_args, qt_args_list) = argument_parser.parse_known_args()
+    bwb.model.active_storage_profile = bwb.model.StorageProfileEnum[parsed_args.storage_profile]
+    bwb.model.DATABASE_FILE_NAME = parsed_args.db_file
+    bwb.model.populate_with_test_data_bl = parsed_args.test_data
+    if parsed_args.trace_sql:
+        bwb.model.DbHelperM.enable_instrumentation(parsed_args.slow_query_ms)
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args_list)
+    app.aboutToQuit.connect(bwb.db_writer.writer.stop)
+    # -the writes that are left in the queue are finished before the connection is closed
+    if parsed_args.trace_sql:
+        app.aboutToQuit.connect(lambda: logging.info("SQL statistics:\n" + bwb.model.QueryStatsM.get_summary_str()))
+    app.aboutToQuit.connect(bwb.model.DbHelperM.close_db_connection)
+    # -closing the connection moves the contents of the WAL file into the db file
+    db_conn = bwb.model.DbHelperM.get_db_connection()
+    startup_timer.log_phase("db open and migration")
     main_window = bwb.window.WellBeingWindow()
+    startup_timer.log_phase("window construction")
+    main_window.first_paint_signal.connect(lambda: startup_timer.log_phase("first paint"))
 
     # System tray
     tray_icon = QtWidgets.QSystemTrayIcon(QtGui.QIcon("icon.png"), app)
@@ -26,7 +81,7 @@ if __name__ == "__main__":
     tray_menu.addAction(tray_restore_action)
     tray_quit_action = QtWidgets.QAction("Quit")
     # noinspection PyUnresolvedReferences
-    tray_quit_action.triggered.connect(sys.exit)
+    tray_quit_action.triggered.connect(app.quit)
     tray_menu.addAction(tray_quit_action)
     tray_icon.setContextMenu(tray_menu)
     tray_icon.show()
@@ -38,7 +93,8 @@ if __name__ == "__main__":
     logging.info("Qt version: " + str(QtCore.qVersion()))
     logging.info("PyQt (Python module) version: " + str(PyQt5.Qt.PYQT_VERSION_STR))
     logging.info("Buddhist Well-Being application version: " + str(bwb.bwbglobal.BWB_APPLICATION_VERSION_STR))
-    db_conn = bwb.model.DbHelperM.get_db_connection()
+    logging.info("Database file: " + bwb.model.get_db_file_name()
+        + " (storage profile: " + bwb.model.active_storage_profile.name + ")")
     logging.info("Buddhist Well-Being database schema version: " + str(bwb.model.get_schema_version(db_conn)))
     logging.info("=====")
 
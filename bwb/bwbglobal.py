@@ -22,6 +22,7 @@ active_date_qdate = QtCore.QDate.currentDate()
 active_question_id_it = 1  # -TODO: Change this
 shown_month_1to12_it = QtCore.QDate.currentDate().month()
 shown_year_it = QtCore.QDate.currentDate().year()
+search_text_str = ""  # -when this is not empty the diary shows search results instead of the active view
 
 
 def qdate_to_unixtime(i_qdate: QtCore.QDate) -> int:
@@ -30,6 +31,15 @@ def qdate_to_unixtime(i_qdate: QtCore.QDate) -> int:
     return unixtime_it
 
 
+def day_key_to_qdate(i_day_key_it: int) -> QtCore.QDate:
+    """Day keys are integers of the form YYYYMMDD"""
+    return QtCore.QDate(i_day_key_it // 10000, i_day_key_it // 100 % 100, i_day_key_it % 100)
+
+
+def qdate_to_day_key(i_qdate: QtCore.QDate) -> int:
+    return i_qdate.year() * 10000 + i_qdate.month() * 100 + i_qdate.day()
+
+
 """
 def get_active_date():
     global active_date
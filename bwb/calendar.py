@@ -3,13 +3,33 @@ from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 
 import bwb.model
+import bwb.bwbglobal
+import bwb.invalidation
 
+OVERFLOW_DAYS_IT = 7  # -the calendar also shows days from the end of the previous month and start of the next
+HEATMAP_RGB_TE = (70, 150, 90)
+HEATMAP_MIN_ALPHA_IT = 40
+HEATMAP_MAX_ALPHA_IT = 220
+HEATMAP_FULL_SCORE_IT = 10
+# -a day's score is the number of entries plus the number of different questions answered, and days with this
+# score or more get the darkest shade
 '''
 vbox_l2 = vertical box layout level 2
 hbox_l3 = horizontal box layout level 3
 today_qpb = push button on calendar for date currently being viewed
 '''
 
+def get_heatmap_format(i_entry_count_it: int, i_question_count_it: int) -> QtGui.QTextCharFormat:
+    score_it = min(i_entry_count_it + i_question_count_it, HEATMAP_FULL_SCORE_IT)
+    alpha_it = HEATMAP_MIN_ALPHA_IT + (HEATMAP_MAX_ALPHA_IT - HEATMAP_MIN_ALPHA_IT) * score_it // HEATMAP_FULL_SCORE_IT
+    ret_qtextcharformat = QtGui.QTextCharFormat()
+    ret_qtextcharformat.setFontWeight(QtGui.QFont.Bold)
+    ret_qtextcharformat.setBackground(QtGui.QColor(*HEATMAP_RGB_TE, alpha_it))
+    ret_qtextcharformat.setToolTip(
+        str(i_entry_count_it) + " entries, " + str(i_question_count_it) + " questions answered")
+    return ret_qtextcharformat
+
+
 class CompositeCalendarWidget(QtWidgets.QWidget):
 
     def __init__(self):
@@ -22,6 +42,7 @@ class CompositeCalendarWidget(QtWidgets.QWidget):
         self.calendar_widget = QtWidgets.QCalendarWidget() #creates calendar widget
         vbox_l2.addWidget(self.calendar_widget) #holds calendar widget in the vbox_l2
         self.calendar_widget.setGridVisible(True) #sets caledar view
+        self.marked_activity_dict = {}  # -QDate -> (entry count, question count) for the dates shown with a shade
         #self.calendar_widget.currentPageChanged.connect(self.on_calendar_current_page_changed)
         #self.calendar_widget.selectionChanged.connect(self.on_calendar_selection_changed)
 
@@ -30,15 +51,53 @@ class CompositeCalendarWidget(QtWidgets.QWidget):
         hbox_l3.addWidget(self.today_qpb)#buttons held in hbox_l3
         self.today_qpb.clicked.connect(self.on_today_button_clicked)#sets buttons on calendar
 
+        bwb.model.ChangeBusM.subscribe(self.on_model_changed)
+
+    def on_model_changed(self, i_change_event):
+        if i_change_event.change_type not in bwb.model.DIARY_ACTIVITY_CHANGE_TYPES:
+            return
+        if i_change_event.unix_time_list is None:
+            bwb.invalidation.scheduler.invalidate(bwb.invalidation.DependencyEnum.diary_entries)
+            return
+        (first_shown_qdate, last_shown_qdate) = self.get_shown_range()
+        first_shown_unix_time_it = bwb.bwbglobal.qdate_to_unixtime(first_shown_qdate)
+        last_shown_unix_time_it = bwb.bwbglobal.qdate_to_unixtime(last_shown_qdate)
+        for unix_time_it in i_change_event.unix_time_list:
+            if first_shown_unix_time_it <= unix_time_it < last_shown_unix_time_it:
+                bwb.invalidation.scheduler.invalidate_panel("calendar")
+                # -refreshed once at the next pass of the event loop, also when there are several changes
+                return
+        # -changes to days that can't be seen are shown when the user goes to that month (the model cache has
+        # already been updated)
+
+    def get_shown_range(self):
+        """:return: (first shown date, date after the last shown date), including the overflow days"""
+        start_of_month_qdate = QtCore.QDate(self.calendar_widget.yearShown(), self.calendar_widget.monthShown(), 1)
+        return (
+            start_of_month_qdate.addDays(-OVERFLOW_DAYS_IT),
+            start_of_month_qdate.addMonths(1).addDays(OVERFLOW_DAYS_IT)
+        )
+
 #for graphics part
     def update_gui(self):
-        date_qtextcharformat = QtGui.QTextCharFormat()
-        date_qtextcharformat.setFontWeight(QtGui.QFont.Bold)
+#for entries being added to diary (the counts for the shown month and the overflow days are cached by the model)
+        (first_shown_qdate, last_shown_qdate) = self.get_shown_range()
+        start_of_month_qdate = QtCore.QDate(self.calendar_widget.yearShown(), self.calendar_widget.monthShown(), 1)
+        new_marked_activity_dict = {}
+        for month_qdate in (first_shown_qdate, start_of_month_qdate, last_shown_qdate):
+            month_activity_dict = bwb.model.DiaryM.get_month_activity(month_qdate.year(), month_qdate.month())
+            for (day_key_it, day_activity) in month_activity_dict.items():
+                day_qdate = bwb.bwbglobal.day_key_to_qdate(day_key_it)
+                if first_shown_qdate <= day_qdate < last_shown_qdate:
+                    new_marked_activity_dict[day_qdate] = (day_activity.entry_count_it, day_activity.question_count_it)
 
-#for entries being added to diary
-        for diarym in bwb.model.DiaryM.get_all():
-            qdatetime = QtCore.QDateTime.fromMSecsSinceEpoch(diarym.date_added_it * 1000)
-            self.calendar_widget.setDateTextFormat(qdatetime.date(), date_qtextcharformat)
+        # Only the formats that have changed are set (for example when flipping to another month)
+        for stale_qdate in self.marked_activity_dict.keys() - new_marked_activity_dict.keys():
+            self.calendar_widget.setDateTextFormat(stale_qdate, QtGui.QTextCharFormat())
+        for (day_qdate, counts_te) in new_marked_activity_dict.items():
+            if self.marked_activity_dict.get(day_qdate) != counts_te:
+                self.calendar_widget.setDateTextFormat(day_qdate, get_heatmap_format(*counts_te))
+        self.marked_activity_dict = new_marked_activity_dict
 
     """
     def on_calendar_selection_changed(self):
@@ -1,5 +1,7 @@
 import logging
+import bwb.db_writer
 import bwb.diary
+import bwb.invalidation
 import bwb.model
 from PyQt5 import QtCore
 from PyQt5 import QtWidgets
@@ -8,12 +10,11 @@ import bwb.bwbglobal
 
 ADD_NEW_HEIGHT_IT = 80
 JOURNAL_BUTTON_GROUP_ID_INT = 1
+SEARCH_DELAY_MS_IT = 250  # -the search is done when the user has stopped typing for this long
 
 
 class CompositeCentralWidget(QtWidgets.QWidget):
 
-    journal_button_toggled_signal = QtCore.pyqtSignal()
-
     def __init__(self):
         super().__init__()
 
@@ -41,12 +42,20 @@ class CompositeCentralWidget(QtWidgets.QWidget):
         self.lock_view_qpb.setCheckable(True)
         self.view_radio_qbuttongroup.addButton(self.filter_view_qrb, bwb.bwbglobal.ViewEnum.journal_monthly_view.value)
         hbox_l3.addWidget(self.lock_view_qpb)
+        self.search_qle = QtWidgets.QLineEdit()
+        self.search_qle.setPlaceholderText("Search")
+        self.search_qle.setClearButtonEnabled(True)
+        self.search_qle.setFixedWidth(200)
+        self.search_qle.textChanged.connect(self.on_search_text_changed)
+        hbox_l3.addWidget(self.search_qle)
+        self.search_delay_qtimer = QtCore.QTimer(self)
+        self.search_delay_qtimer.setSingleShot(True)
+        self.search_delay_qtimer.setInterval(SEARCH_DELAY_MS_IT)
+        self.search_delay_qtimer.timeout.connect(self.on_search_delay_timeout)
 
         # **Adding the diary**
         self.diary_widget = bwb.diary.DiaryListCompositeWidget()
         ##diary_widget.add_text_to_diary_button_pressed_signal.connect(self.on_diary_add_entry_button_pressed)
-        self.diary_widget.context_menu_change_date_signal.connect(self.on_diary_context_menu_change_date)
-        self.diary_widget.context_menu_delete_signal.connect(self.on_diary_context_menu_delete)
         self.vbox_l2.addWidget(self.diary_widget)
 
         # Adding new diary entry..
@@ -75,8 +84,7 @@ class CompositeCentralWidget(QtWidgets.QWidget):
         adding_area_hbox_l3.addLayout(edit_diary_entry_vbox_l4)
 
         self.vbox_l2.addLayout(adding_area_hbox_l3)
-
-        self.update_gui()
+        # -the contents are filled in by the window (please see bwb.invalidation)
 
     """
     def update_gui_journal_buttons(self):
@@ -85,27 +93,51 @@ class CompositeCentralWidget(QtWidgets.QWidget):
 
     def on_view_radio_button_toggled(self):
         bwb.bwbglobal.active_view_viewenum = bwb.bwbglobal.ViewEnum(self.view_radio_qbuttongroup.checkedId())
-        self.update_gui()
+        bwb.invalidation.scheduler.invalidate(bwb.invalidation.DependencyEnum.active_view)
+        # -buttonToggled is sent both for the button that is unchecked and for the one that is checked, but there
+        # is only one refresh
+
+    def on_search_text_changed(self):
+        self.search_delay_qtimer.start()
+        # -restarting the timer, so that we don't search again for every key press
+
+    def on_search_delay_timeout(self):
+        bwb.bwbglobal.search_text_str = self.search_qle.text().strip()
+        bwb.invalidation.scheduler.invalidate(bwb.invalidation.DependencyEnum.search_text)
 
     def on_journal_button_toggled(self):
         bwb.bwbglobal.active_question_id_it = self.journal_qbuttongroup.checkedId()
-        self.update_gui()
-        self.journal_button_toggled_signal.emit()
+        bwb.invalidation.scheduler.invalidate(bwb.invalidation.DependencyEnum.active_question)
+
+    def get_dependencies(self) -> set:
+        """:return: The application state that is shown at the moment (please see bwb.invalidation)"""
+        ret_dependency_set = {
+            bwb.invalidation.DependencyEnum.active_view,
+            bwb.invalidation.DependencyEnum.search_text,
+            bwb.invalidation.DependencyEnum.diary_entries
+        }
+        if bwb.bwbglobal.search_text_str:
+            return ret_dependency_set
+        if bwb.bwbglobal.active_view_viewenum == bwb.bwbglobal.ViewEnum.journal_monthly_view:
+            ret_dependency_set.update({
+                bwb.invalidation.DependencyEnum.shown_month,
+                bwb.invalidation.DependencyEnum.active_question,
+                bwb.invalidation.DependencyEnum.question_list
+            })
+        else:
+            ret_dependency_set.add(bwb.invalidation.DependencyEnum.active_date)
+        return ret_dependency_set
 
     def update_gui(self):
-        if bwb.bwbglobal.active_view_viewenum == bwb.bwbglobal.ViewEnum.journal_monthly_view:
+        if bwb.bwbglobal.search_text_str:
+            self.diary_label.setText("<h3>Search results</h3>")
+        elif bwb.bwbglobal.active_view_viewenum == bwb.bwbglobal.ViewEnum.journal_monthly_view:
             active_journalm = bwb.model.QuestionM.get(bwb.bwbglobal.active_question_id_it)
             self.diary_label.setText("<h3>" + active_journalm.title_str + "</h3>")
         else:
             self.diary_label.setText("<h3>Daily Overview</h3>")
         self.diary_widget.update_gui()
 
-    def on_diary_context_menu_change_date(self):
-        self.update_gui()
-
-    def on_diary_context_menu_delete(self):
-        self.update_gui()
-
     def on_add_text_to_diary_button_clicked(self):
         notes_sg = self.adding_text_to_diary_textedit_w6.toPlainText().strip()
         if bwb.bwbglobal.active_date_qdate == QtCore.QDate.currentDate():
@@ -116,10 +148,24 @@ class CompositeCentralWidget(QtWidgets.QWidget):
 
         logging.debug("t_unix_time_it = " + str(unix_time_it))
 
-        bwb.model.DiaryM.add(unix_time_it, notes_sg, bwb.bwbglobal.active_question_id_it)
+        question_id_it = bwb.bwbglobal.active_question_id_it
         # -TODO: Change from currentIndex
+        question = bwb.model.QuestionM.get(question_id_it)
+        list_model = self.diary_widget.list_model
+        pending_id_it = list_model.add_pending_entry(
+            unix_time_it, notes_sg, question_id_it, question.title_str if question else "")
+        bwb.db_writer.writer.submit(
+            bwb.model.DiaryM.add, unix_time_it, notes_sg, question_id_it,
+            i_done_function=lambda i_command: self.on_add_entry_done(i_command, pending_id_it)
+        )
         self.adding_text_to_diary_textedit_w6.clear()
-        self.update_gui()
+        # -the new entry is shown by the diary widget when it gets the change event from the model
+
+    def on_add_entry_done(self, i_command, i_pending_id_it):
+        self.diary_widget.list_model.remove_pending_entry(i_pending_id_it)
+        if i_command.exception is not None:
+            QtWidgets.QMessageBox.warning(
+                self, "Diary entry not saved", "The diary entry could not be saved: " + str(i_command.exception))
 
 
 """
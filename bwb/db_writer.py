@@ -0,0 +1,107 @@
+import logging
+import queue
+import threading
+
+from PyQt5 import QtCore
+
+import bwb.model
+
+"""
+Module comments:
+Writing to the db in a background thread, so that the window doesn't stop responding while waiting for a commit
+(an fsync with the "safe" storage profile), a backup or a large import.
+
+The writer thread has its own db connection (please see bwb.model.ThreadStateM), and the gui thread keeps using
+its connection for reading (which doesn't block and isn't blocked by the writer since the db is in WAL mode).
+Commands (any function that writes using the model classes, for example bwb.model.DiaryM.add) are put in a queue
+and run one at a time in the order they were submitted. When a command has finished, its done function is
+called in the gui thread. The change events from the model (please see bwb.model.ChangeBusM) are also passed on
+to the gui thread, before the done function is called.
+
+With the "memory" storage profile each connection has its own db, so the commands are run directly in the gui
+thread instead
+"""
+
+
+class WriteCommandM:
+    __slots__ = ("function", "arguments_te", "done_function", "result", "exception")
+
+    def __init__(self, i_function, i_arguments_te, i_done_function=None) -> None:
+        """
+        :param i_done_function: Is called in the gui thread with this command when it has been run (result or
+        exception is set)
+        """
+        self.function = i_function
+        self.arguments_te = i_arguments_te
+        self.done_function = i_done_function
+        self.result = None
+        self.exception = None
+
+
+class DbWriter(QtCore.QObject):
+    command_done_signal = QtCore.pyqtSignal(object)
+    change_events_signal = QtCore.pyqtSignal(object)
+    # -these are sent from the writer thread, and since this object belongs to the gui thread they are queued
+    # and the slots are called in the gui thread
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.command_queue = queue.Queue()
+        self.writer_thread = None
+        self.command_done_signal.connect(self.on_command_done)
+        self.change_events_signal.connect(bwb.model.ChangeBusM.deliver_events)
+        bwb.model.ChangeBusM.set_main_thread_delivery_function(self.change_events_signal.emit)
+
+    def is_inline(self) -> bool:
+        return bwb.model.active_storage_profile == bwb.model.StorageProfileEnum.memory
+
+    def submit(self, i_function, *i_arguments, i_done_function=None) -> WriteCommandM:
+        command = WriteCommandM(i_function, i_arguments, i_done_function)
+        if self.is_inline():
+            run_command(command)
+            self.on_command_done(command)
+            return command
+        if self.writer_thread is None:
+            self.writer_thread = threading.Thread(target=self.run, name="bwb-db-writer")
+            self.writer_thread.start()
+        self.command_queue.put(command)
+        return command
+
+    def run(self) -> None:
+        """The writer thread"""
+        while True:
+            command = self.command_queue.get()
+            if command is None:
+                break
+            run_command(command)
+            self.command_done_signal.emit(command)
+            self.command_queue.task_done()
+        bwb.model.DbHelperM.close_db_connection()
+        self.command_queue.task_done()
+
+    def on_command_done(self, i_command: WriteCommandM) -> None:
+        if i_command.done_function is not None:
+            i_command.done_function(i_command)
+
+    def wait_until_idle(self) -> None:
+        """Waits until all the submitted commands have been run (the done functions may still be waiting)"""
+        if self.writer_thread is not None:
+            self.command_queue.join()
+
+    def stop(self) -> None:
+        """Runs the commands that are left in the queue, and then closes the connection and ends the thread"""
+        if self.writer_thread is not None:
+            self.command_queue.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
+
+
+def run_command(i_command: WriteCommandM) -> None:
+    try:
+        i_command.result = i_command.function(*i_command.arguments_te)
+    except Exception as exception:
+        logging.exception("Error in db write command " + getattr(i_command.function, "__qualname__", ""))
+        i_command.exception = exception
+
+
+writer = DbWriter()
@@ -1,8 +1,10 @@
 import datetime
-import time
+import html
 import logging
 
 import bwb.date_time_dialog
+import bwb.db_writer
+import bwb.invalidation
 import bwb.model
 from PyQt5 import QtCore
 from PyQt5 import QtGui
@@ -13,68 +15,78 @@ from bwb import bwbglobal
 MY_WIDGET_NAME_STR = "test-name"
 BACKGROUND_IMAGE_PATH_STR = "Gerald-G-Yoga-Poses-stylized-1-300px-CC0.png"
 NO_ENTRY_CLICKED_INT = -1
+FETCH_BATCH_SIZE_IT = 50  # -number of entries read from the db at a time (when the user scrolls down)
+LEFT_COLUMN_STRETCH_IT = 1
+TEXT_COLUMN_STRETCH_IT = 5
+TAGS_COLUMN_STRETCH_IT = 1
+ROW_MARGIN_IT = 6
+TAGS_PLACEHOLDER_STR = "tags here"
+DIARY_ENTRY_ROLE_IT = QtCore.Qt.UserRole  # -the DiaryM object for the row
+LEFT_TEXT_ROLE_IT = QtCore.Qt.UserRole + 1  # -date or question title, depending on the view
+TEXT_HTML_ROLE_IT = QtCore.Qt.UserRole + 2
 
 
 # noinspection PyArgumentList
 class DiaryListCompositeWidget(QtWidgets.QWidget):
     """
-    Inspiration for this class:
-    http://stackoverflow.com/questions/20041385/python-pyqt-setting-scroll-area
+    The diary entries are shown in a QListView, which only asks for (and paints) the rows that can be seen, so
+    refreshing doesn't create any widgets. Please see DiaryListModel and DiaryEntryDelegate below
     """
 
-    context_menu_change_date_signal = QtCore.pyqtSignal()
-    context_menu_delete_signal = QtCore.pyqtSignal()
-
     last_entry_clicked_id_it = NO_ENTRY_CLICKED_INT
 
     def __init__(self):
         super().__init__()
 
-        '''
-        it's the layout for the diary part of the window. At the end of the init method there is this line
-        self.setLayout(self.vbox_l2)
-        which sets this vertical layout box ("vbox") as the layout for the diary part of the application
-        '''
-
         self.vbox_l2 = QtWidgets.QVBoxLayout()#vbox_l2 creates layout for diary section of window
-        #this sections creates custom list widget with scrollbar
-        self.scroll_area_w3 = QtWidgets.QScrollArea()#creates scroll area
-        self.scroll_area_w3.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOn)#sets areas vertical scroll
-        self.scroll_area_w3.setWidgetResizable(True)#sets resizing
-
-        '''
-        
-        What i've tried to do here is to create a custom list widget with a scrollbar, and to do add the scrollbar i have added three widgets:
-        A QScrollArea - scroll_area_w3
-        A generic QWidget (needed so that the layout below can be held by something) - scroll_list_widget_w4
-        A QVBoxLayout - scroll_list_vbox_l5
-        
-        '''
-
-        self.scroll_list_widget_w4 = QtWidgets.QWidget()#creates widget for scroll area (to contain it)
-        self.scroll_list_widget_w4.setObjectName(MY_WIDGET_NAME_STR)
-        self.scroll_list_widget_w4.setStyleSheet("#" + MY_WIDGET_NAME_STR
+
+        self.list_model = DiaryListModel(self)
+        self.list_view_w3 = QtWidgets.QListView()
+        self.list_view_w3.setObjectName(MY_WIDGET_NAME_STR)
+        self.list_view_w3.setStyleSheet("#" + MY_WIDGET_NAME_STR
              + "{" + "background-image:url(\"" + BACKGROUND_IMAGE_PATH_STR
              + "\"); background-position:center; background-repeat:no-repeat" + "}")
-        self.scroll_list_vbox_l5 = QtWidgets.QVBoxLayout()#creates the layout vertical box for scroll area
-
-        self.scroll_list_widget_w4.setLayout(self.scroll_list_vbox_l5)#sets generic widger container w4 with layout vbox_l5
-        self.scroll_area_w3.setWidget(self.scroll_list_widget_w4)#sets scroll widget area w3 to generic widget container w4
-        self.vbox_l2.addWidget(self.scroll_area_w3)#adds widget to diary section of window vbox_l2
+        self.list_view_w3.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOn)
+        self.list_view_w3.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.list_view_w3.setResizeMode(QtWidgets.QListView.Adjust)
+        # -the rows are laid out again when the width changes, since the height of a row depends on the width
+        self.list_view_w3.setModel(self.list_model)
+        self.list_delegate = DiaryEntryDelegate(self.list_view_w3)
+        self.list_view_w3.setItemDelegate(self.list_delegate)
+        self.list_model.modelReset.connect(self.list_delegate.clear_size_hint_cache)
+        self.list_view_w3.pressed.connect(self.on_list_view_pressed)
+        self.list_view_w3.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.list_view_w3.customContextMenuRequested.connect(self.on_list_view_context_menu_requested)
+
+        self.vbox_l2.addWidget(self.list_view_w3)
         self.setLayout(self.vbox_l2)#sets entire layout
 
-    # The same function is used for all the "rows"
-    def on_custom_label_mouse_pressed(self, i_qmouseevent, i_diary_id_it):
-        logging.debug("button clicked: " + str(i_qmouseevent.button()))
-        logging.debug("diary id: " + str(i_diary_id_it))
-        self.last_entry_clicked_id_it = i_diary_id_it
+        bwb.model.ChangeBusM.subscribe(self.on_model_changed)
+
+    def on_model_changed(self, i_change_event):
+        if i_change_event.change_type not in bwb.model.DIARY_CHANGE_TYPES:
+            return
+        if i_change_event.change_type == bwb.model.ChangeTypeEnum.diary_entries_changed:
+            bwb.invalidation.scheduler.invalidate(bwb.invalidation.DependencyEnum.diary_entries)
+            # -many entries (for example from an import), all of them are read again
+            return
+        self.refresh_entry(i_change_event.id_it)
+
+    def on_list_view_pressed(self, i_qmodelindex):
+        diary_entry = i_qmodelindex.data(DIARY_ENTRY_ROLE_IT)
+        logging.debug("diary id: " + str(diary_entry.id))
+        self.last_entry_clicked_id_it = diary_entry.id
 
     # noinspection PyUnresolvedReferences
-    def contextMenuEvent(self, i_qcontextmenuevent):
+    def on_list_view_context_menu_requested(self, i_qpoint):
         """
-        Overridden
-        Docs: http://doc.qt.io/qt-5/qwidget.html#contextMenuEvent
+        :param i_qpoint: Position in the viewport of the list view
         """
+        qmodelindex = self.list_view_w3.indexAt(i_qpoint)
+        if not qmodelindex.isValid() or is_pending_entry(qmodelindex.data(DIARY_ENTRY_ROLE_IT)):
+            return
+        self.last_entry_clicked_id_it = qmodelindex.data(DIARY_ENTRY_ROLE_IT).id
+
         self.right_click_menu = QtWidgets.QMenu()
         rename_action = QtWidgets.QAction("Rename")
         rename_action.triggered.connect(self.on_context_menu_rename)
@@ -92,9 +104,7 @@ class DiaryListCompositeWidget(QtWidgets.QWidget):
             self, "Remove diary entry?", "Are you sure that you want to remove this diary entry?"
         )
         if message_box_reply == QtWidgets.QMessageBox.Yes:
-            bwb.model.DiaryM.remove(int(self.last_entry_clicked_id_it))
-            self.update_gui()
-            self.context_menu_delete_signal.emit()
+            bwb.db_writer.writer.submit(bwb.model.DiaryM.remove, int(self.last_entry_clicked_id_it))
         else:
             pass  # -do nothing
 
@@ -109,8 +119,7 @@ class DiaryListCompositeWidget(QtWidgets.QWidget):
             self, "Rename dialog", "New name: ", text=diary_entry.diary_text)
         if new_text_qstring[0]:
             logging.debug("new_text_qstring = " + str(new_text_qstring))
-            bwb.model.DiaryM.update_note(last_clicked_row_dbkey_it, new_text_qstring[0])
-            self.update_gui()
+            bwb.db_writer.writer.submit(bwb.model.DiaryM.update_note, last_clicked_row_dbkey_it, new_text_qstring[0])
         else:
             pass  # -do nothing
 
@@ -119,111 +128,367 @@ class DiaryListCompositeWidget(QtWidgets.QWidget):
         diary_item = bwb.model.DiaryM.get(last_clicked_row_dbkey_it)
         updated_time_unix_time_it = bwb.date_time_dialog.DateTimeDialog.get_date_time_dialog(diary_item.date_added_it)
         if updated_time_unix_time_it != -1:
-            bwb.model.DiaryM.update_date(diary_item.id, updated_time_unix_time_it)
-            self.update_gui()
-            self.context_menu_change_date_signal.emit()
+            bwb.db_writer.writer.submit(bwb.model.DiaryM.update_date, diary_item.id, updated_time_unix_time_it)
         else:
             pass  # -do nothing
 
     def update_gui(self):
-        clear_widget_and_layout_children(self.scroll_list_vbox_l5)
-        qdate = QtCore.QDate(bwbglobal.shown_year_it, bwbglobal.shown_month_1to12_it, 1)
-        qdatetime = QtCore.QDateTime(qdate)
-        start_of_month_as_unix_time_it = qdatetime.toMSecsSinceEpoch() // 1000
-
-        diarym_list = []
-        if bwbglobal.active_view_viewenum == bwbglobal.ViewEnum.journal_monthly_view:
-            diarym_list = bwb.model.DiaryM.get_all_for_question_and_month(
-                bwbglobal.active_question_id_it, start_of_month_as_unix_time_it, qdate.daysInMonth())
-        elif bwbglobal.active_view_viewenum == bwbglobal.ViewEnum.diary_daily_overview:
-            diarym_list = bwb.model.DiaryM.get_all_for_active_day()
-        else:
-            pass
-
-        old_date_str = ""
-        for diary_entry in diarym_list:
-            label_text_sg = diary_entry.diary_text.strip()
-
-            '''
-            this has been moved to further down
-            hbox_l6 = QtWidgets.QHBoxLayout()
-            self.scroll_list_vbox_l5.addLayout(hbox_l6)
-            '''
-
-            date_string_format_str = "%A"  # -weekday
-            if diary_entry.date_added_it < time.time() - 60 * 60 * 24 * 7:
-                date_string_format_str = "%-d %b"  # -weekday
-
-            left_qlabel = QtWidgets.QLabel("")
-            if bwbglobal.active_view_viewenum == bwbglobal.ViewEnum.journal_monthly_view:
-                date_str = datetime.datetime.fromtimestamp(diary_entry.date_added_it).strftime(
-                    date_string_format_str)
-                if old_date_str == date_str:
-                    left_qlabel.setText("")
-                elif is_same_day(diary_entry.date_added_it, time.time()):
-                    left_qlabel.setText("Today")
-                else:
-                    left_qlabel.setText(date_str)
-                old_date_str = date_str
-            elif bwbglobal.active_view_viewenum == bwbglobal.ViewEnum.diary_daily_overview:
-                journalm = bwb.model.QuestionM.get(diary_entry.question_ref_it)
-                journal_sg = str(journalm.title_str)
-                left_qlabel = QtWidgets.QLabel(journal_sg)
-            else:
-                pass
-
-            '''
-            hbox_l6 is the container for widgets:
-            It represents each row in the "custom listbox" and is used further down as such:
-            hbox_l6.addWidget(left_qlabel, stretch=1)
-            hbox_l6.addWidget(listitem_cqll, stretch=5)
-            hbox_l6.addWidget(QtWidgets.QLabel("one tag"), stretch=1)
-            '''
-
-            hbox_l6 = QtWidgets.QHBoxLayout()
-            self.scroll_list_vbox_l5.addLayout(hbox_l6)
-
-            hbox_l6.addWidget(left_qlabel, stretch=1)
-
-            listitem_cqll = CustomQLabel(label_text_sg, diary_entry.id)
-            listitem_cqll.setWordWrap(True)
-            listitem_cqll.mouse_pressed_signal.connect(self.on_custom_label_mouse_pressed)
-
-            hbox_l6.addWidget(listitem_cqll, stretch=5)
-
-            hbox_l6.addWidget(QtWidgets.QLabel("tags here"), stretch=1)
-
-        self.scroll_list_vbox_l5.addStretch()
+        self.list_model.reset_for_active_view()
+        if self.list_model.canFetchMore(QtCore.QModelIndex()):
+            self.list_model.fetchMore(QtCore.QModelIndex())
+        # -the list view asks for more rows itself when the user scrolls to the bottom
 
         # TODO: Scroll to bottom
 
+    def refresh_entry(self, i_id_it):
+        """
+        Shows the changes to one entry (which has been added, edited, moved to another date, or removed) without
+        reading the other entries again
+        """
+        if self.list_model.search_text_str:
+            self.update_gui()
+            # -the order of search results depends on the rank, so all of them are read again
+            return
+        self.list_delegate.forget_size_hint(i_id_it)
+        self.list_model.refresh_entry(i_id_it)
 
-def is_same_day(i_first_date_it, i_second_date_it):
-    first_date = datetime.datetime.fromtimestamp(i_first_date_it)
-    second_date = datetime.datetime.fromtimestamp(i_second_date_it)
-    return first_date.date() == second_date.date()  # - == operator works for "datetime" type
-
-
-def clear_widget_and_layout_children(qlayout_or_qwidget):
-    if qlayout_or_qwidget.widget():
-        qlayout_or_qwidget.widget().deleteLater()
-    elif qlayout_or_qwidget.layout():
-        while qlayout_or_qwidget.layout().count():
-            child_qlayoutitem = qlayout_or_qwidget.takeAt(0)
-            clear_widget_and_layout_children(child_qlayoutitem)  # Recursive call
-
-
-class CustomQLabel(QtWidgets.QLabel):
-    NO_DIARY_ENTRY_SELECTED = -1
-    diary_entry_id = NO_DIARY_ENTRY_SELECTED
-    mouse_pressed_signal = QtCore.pyqtSignal(QtGui.QMouseEvent, int)
 
-    def __init__(self, i_text_sg, i_diary_entry_id=NO_DIARY_ENTRY_SELECTED):
-        super().__init__(i_text_sg)
-        self.diary_entry_id = i_diary_entry_id
+class DiaryListModel(QtCore.QAbstractListModel):
+    """
+    The entries are read from the db in batches of FETCH_BATCH_SIZE_IT, using canFetchMore and fetchMore
+    Docs: http://doc.qt.io/qt-5/qabstractitemmodel.html#fetchMore
+    """
+    def __init__(self, i_parent=None):
+        super().__init__(i_parent)
+        self.diary_entry_list = []
+        self.diary_entry_for_id_dict = {}  # -the loaded entries by id, please see find_row
+        self.all_fetched_bl = True
+        self.fetch_function = None  # -takes (limit, offset) and returns a list of DiaryM (or subclass) objects
+        self.view_viewenum = bwbglobal.active_view_viewenum
+        self.search_text_str = ""
+        # The entries that belong in the list (used when a single entry has changed, please see refresh_entry)
+        self.view_start_day_key_it = 0
+        self.view_end_day_key_it = 0  # -exclusive
+        self.view_question_id_it = None  # -None for all questions
+        self.newest_first_bl = True
+        # Entries which have been sent to the writer thread but not yet written (please see add_pending_entry)
+        self.pending_count_it = 0
+        self.last_pending_id_it = NO_ENTRY_CLICKED_INT
+
+    def reset_for_active_view(self):
+        self.beginResetModel()
+        self.diary_entry_list = []
+        self.diary_entry_for_id_dict = {}
+        self.all_fetched_bl = False
+        self.pending_count_it = 0
+        self.view_viewenum = bwbglobal.active_view_viewenum
+        self.search_text_str = bwbglobal.search_text_str
+        self.fetch_function = get_fetch_function_for_active_view()
+        if self.view_viewenum == bwbglobal.ViewEnum.journal_monthly_view:
+            (self.view_start_day_key_it, self.view_end_day_key_it) = bwb.model.get_month_day_key_range(
+                bwbglobal.shown_year_it, bwbglobal.shown_month_1to12_it)
+            self.view_question_id_it = bwbglobal.active_question_id_it
+            self.newest_first_bl = False
+        else:
+            self.view_start_day_key_it = bwbglobal.qdate_to_day_key(bwbglobal.active_date_qdate)
+            self.view_end_day_key_it = self.view_start_day_key_it + 1
+            self.view_question_id_it = None
+            self.newest_first_bl = True
+        # -these have to match the queries in get_fetch_function_for_active_view
+        self.endResetModel()
+
+    def is_in_view(self, i_diary_entry) -> bool:
+        if not (self.view_start_day_key_it <= i_diary_entry.local_day_it < self.view_end_day_key_it):
+            return False
+        return self.view_question_id_it is None or i_diary_entry.question_ref_it == self.view_question_id_it
+
+    def find_row(self, i_id_it) -> int:
+        """
+        The entry is looked up by id and then its row is found with a binary search on the sort key (please see
+        get_insert_row), since a dictionary from id to row would have to be updated for all the rows below an
+        inserted or removed row. Not used for search results (which are sorted by rank)
+        :return: The row of the entry, or -1 if the entry has not been loaded
+        """
+        diary_entry = self.diary_entry_for_id_dict.get(i_id_it)
+        if diary_entry is None:
+            return -1
+        row_it = self.get_insert_row(diary_entry)
+        if row_it < len(self.diary_entry_list) and self.diary_entry_list[row_it] is diary_entry:
+            return row_it
+        return -1
+
+    def get_insert_row(self, i_diary_entry) -> int:
+        """
+        Binary search for the row where the entry should be, the same place that the db query would give it.
+        Entries are sorted by day and then time (please see SqlM in bwb.model), and entries with the same time
+        are sorted by id, since that is the order they have in the index
+        """
+        new_key_te = (i_diary_entry.local_day_it, i_diary_entry.date_added_it, i_diary_entry.id)
+        low_it = 0
+        high_it = len(self.diary_entry_list)
+        while low_it < high_it:
+            middle_it = (low_it + high_it) // 2
+            middle_entry = self.diary_entry_list[middle_it]
+            middle_key_te = (middle_entry.local_day_it, middle_entry.date_added_it, middle_entry.id)
+            if self.newest_first_bl:
+                goes_after_middle_bl = middle_key_te > new_key_te
+            else:
+                goes_after_middle_bl = middle_key_te < new_key_te
+            if goes_after_middle_bl:
+                low_it = middle_it + 1
+            else:
+                high_it = middle_it
+        return low_it
 
-    # Overridden
-    # Please note that this is the event handler (not an event!)
-    def mousePressEvent(self, i_qmouseevent):
-        ### super(CustomQLabel, self).mousePressEvent(i_qmouseevent)
-        self.mouse_pressed_signal.emit(i_qmouseevent, self.diary_entry_id)
+    def refresh_entry(self, i_id_it):
+        """
+        Removes, inserts, updates or moves a single row so that the list is the same as after a full reset (for
+        the rows that have been loaded so far)
+        """
+        old_row_it = self.find_row(i_id_it)
+        if old_row_it != -1:
+            self.beginRemoveRows(QtCore.QModelIndex(), old_row_it, old_row_it)
+            del self.diary_entry_list[old_row_it]
+            del self.diary_entry_for_id_dict[i_id_it]
+            self.endRemoveRows()
+            self.emit_left_text_changed(old_row_it)
+
+        new_diary_entry = bwb.model.DiaryM.get_with_question(i_id_it)
+        if new_diary_entry is None or not self.is_in_view(new_diary_entry):
+            return
+        new_row_it = self.get_insert_row(new_diary_entry)
+        if new_row_it == len(self.diary_entry_list) and not self.all_fetched_bl:
+            return
+            # -the entry is after the rows that have been loaded, so it will be read by fetchMore later
+        self.beginInsertRows(QtCore.QModelIndex(), new_row_it, new_row_it)
+        self.diary_entry_list.insert(new_row_it, new_diary_entry)
+        self.diary_entry_for_id_dict[new_diary_entry.id] = new_diary_entry
+        self.endInsertRows()
+        self.emit_left_text_changed(new_row_it + 1)
+
+    def add_pending_entry(self, i_date_added_it, i_diary_text_str, i_question_id_it, i_question_title_str) -> int:
+        """
+        Shows a new entry at once, before it has been written to the db. The real row is added from the change
+        event when it has been written, and then the pending row is removed with remove_pending_entry
+        :return: The (negative) id of the pending row
+        """
+        self.last_pending_id_it -= 1
+        pending_diary_entry = bwb.model.DiaryWithQuestionM(
+            self.last_pending_id_it, i_date_added_it, i_diary_text_str, i_question_id_it,
+            bwb.model.get_local_day(i_date_added_it), i_question_title_str)
+        if self.search_text_str or not self.is_in_view(pending_diary_entry):
+            return pending_diary_entry.id
+        new_row_it = self.get_insert_row(pending_diary_entry)
+        if new_row_it == len(self.diary_entry_list) and not self.all_fetched_bl:
+            return pending_diary_entry.id
+        self.beginInsertRows(QtCore.QModelIndex(), new_row_it, new_row_it)
+        self.diary_entry_list.insert(new_row_it, pending_diary_entry)
+        self.diary_entry_for_id_dict[pending_diary_entry.id] = pending_diary_entry
+        self.pending_count_it += 1
+        self.endInsertRows()
+        self.emit_left_text_changed(new_row_it + 1)
+        return pending_diary_entry.id
+
+    def remove_pending_entry(self, i_pending_id_it) -> None:
+        row_it = self.find_row(i_pending_id_it)
+        if row_it == -1:
+            return
+        self.beginRemoveRows(QtCore.QModelIndex(), row_it, row_it)
+        del self.diary_entry_list[row_it]
+        del self.diary_entry_for_id_dict[i_pending_id_it]
+        self.pending_count_it -= 1
+        self.endRemoveRows()
+        self.emit_left_text_changed(row_it)
+
+    def emit_left_text_changed(self, i_row_it):
+        """In the monthly view the date is only shown for the first entry of each day, which depends on the row above"""
+        if 0 <= i_row_it < len(self.diary_entry_list):
+            qmodelindex = self.index(i_row_it)
+            self.dataChanged.emit(qmodelindex, qmodelindex, [LEFT_TEXT_ROLE_IT])
+
+    def rowCount(self, i_parent_qmodelindex=QtCore.QModelIndex()):
+        """Overridden"""
+        if i_parent_qmodelindex.isValid():
+            return 0
+        return len(self.diary_entry_list)
+
+    def canFetchMore(self, i_parent_qmodelindex):
+        """Overridden"""
+        return not i_parent_qmodelindex.isValid() and not self.all_fetched_bl
+
+    def fetchMore(self, i_parent_qmodelindex):
+        """Overridden"""
+        if i_parent_qmodelindex.isValid() or self.fetch_function is None:
+            return
+        new_entry_list = self.fetch_function(FETCH_BATCH_SIZE_IT, len(self.diary_entry_list) - self.pending_count_it)
+        # -the pending entries are not in the db yet, so they are not counted in the offset
+        if len(new_entry_list) < FETCH_BATCH_SIZE_IT:
+            self.all_fetched_bl = True
+        if not new_entry_list:
+            return
+        first_row_it = len(self.diary_entry_list)
+        self.beginInsertRows(QtCore.QModelIndex(), first_row_it, first_row_it + len(new_entry_list) - 1)
+        self.diary_entry_list.extend(new_entry_list)
+        self.diary_entry_for_id_dict.update((diary_entry.id, diary_entry) for diary_entry in new_entry_list)
+        self.endInsertRows()
+
+    def data(self, i_qmodelindex, i_role=QtCore.Qt.DisplayRole):
+        """Overridden"""
+        if not i_qmodelindex.isValid() or not (0 <= i_qmodelindex.row() < len(self.diary_entry_list)):
+            return None
+        diary_entry = self.diary_entry_list[i_qmodelindex.row()]
+        if i_role == QtCore.Qt.DisplayRole:
+            return diary_entry.diary_text.strip()
+        elif i_role == DIARY_ENTRY_ROLE_IT:
+            return diary_entry
+        elif i_role == LEFT_TEXT_ROLE_IT:
+            return self.get_left_text(i_qmodelindex.row())
+        elif i_role == TEXT_HTML_ROLE_IT:
+            if self.search_text_str:
+                return get_snippet_html(diary_entry.snippet_str)
+            return html.escape(diary_entry.diary_text.strip()).replace("\n", "<br>")
+        return None
+
+    def get_left_text(self, i_row_it):
+        diary_entry = self.diary_entry_list[i_row_it]
+        if self.search_text_str:
+            return day_key_to_date(diary_entry.local_day_it).isoformat()
+        elif self.view_viewenum == bwbglobal.ViewEnum.journal_monthly_view:
+            if i_row_it > 0 and self.diary_entry_list[i_row_it - 1].local_day_it == diary_entry.local_day_it:
+                return ""  # -only the first entry for each day has the date
+            return get_month_view_date_str(diary_entry.local_day_it)
+        elif self.view_viewenum == bwbglobal.ViewEnum.diary_daily_overview:
+            return diary_entry.question_title_str
+        return ""
+
+
+class DiaryEntryDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    Paints each row in three columns (date or question, the word-wrapped diary text, and tags), the same way as
+    the labels that were used before
+    Docs: http://doc.qt.io/qt-5/qstyleditemdelegate.html
+    """
+    def __init__(self, i_list_view):
+        super().__init__(i_list_view)
+        self.list_view = i_list_view
+        self.size_hint_cache_dict = {}  # -diary id -> {width -> QSize}
+
+    def clear_size_hint_cache(self):
+        self.size_hint_cache_dict.clear()
+
+    def forget_size_hint(self, i_id_it):
+        self.size_hint_cache_dict.pop(i_id_it, None)
+
+    def get_column_rects(self, i_row_qrect):
+        """:return: (left, text, tags) QRects, inside the margins"""
+        inner_qrect = i_row_qrect.adjusted(ROW_MARGIN_IT, ROW_MARGIN_IT, -ROW_MARGIN_IT, -ROW_MARGIN_IT)
+        total_stretch_it = LEFT_COLUMN_STRETCH_IT + TEXT_COLUMN_STRETCH_IT + TAGS_COLUMN_STRETCH_IT
+        left_width_it = inner_qrect.width() * LEFT_COLUMN_STRETCH_IT // total_stretch_it
+        text_width_it = inner_qrect.width() * TEXT_COLUMN_STRETCH_IT // total_stretch_it
+        left_qrect = QtCore.QRect(inner_qrect.left(), inner_qrect.top(), left_width_it, inner_qrect.height())
+        text_qrect = QtCore.QRect(left_qrect.right() + 1, inner_qrect.top(), text_width_it, inner_qrect.height())
+        tags_qrect = QtCore.QRect(
+            text_qrect.right() + 1, inner_qrect.top(), inner_qrect.right() - text_qrect.right(), inner_qrect.height())
+        return (left_qrect, text_qrect, tags_qrect)
+
+    def get_text_document(self, i_qmodelindex, i_font, i_width_it):
+        text_qtextdocument = QtGui.QTextDocument()
+        text_qtextdocument.setDocumentMargin(0)
+        if is_pending_entry(i_qmodelindex.data(DIARY_ENTRY_ROLE_IT)):
+            i_font = QtGui.QFont(i_font)
+            i_font.setItalic(True)
+            # -shown in italics until it has been written to the db
+        text_qtextdocument.setDefaultFont(i_font)
+        text_qtextdocument.setHtml(i_qmodelindex.data(TEXT_HTML_ROLE_IT))
+        text_qtextdocument.setTextWidth(i_width_it)
+        return text_qtextdocument
+
+    def paint(self, i_qpainter, i_option, i_qmodelindex):
+        """Overridden"""
+        option = QtWidgets.QStyleOptionViewItem(i_option)
+        self.initStyleOption(option, i_qmodelindex)
+        option.text = ""
+        style = option.widget.style() if option.widget else QtWidgets.QApplication.style()
+        style.drawControl(QtWidgets.QStyle.CE_ItemViewItem, option, i_qpainter, option.widget)
+        # -this draws the background for selected rows (the text is drawn below)
+
+        text_color_role = QtGui.QPalette.Text
+        if option.state & QtWidgets.QStyle.State_Selected:
+            text_color_role = QtGui.QPalette.HighlightedText
+        (left_qrect, text_qrect, tags_qrect) = self.get_column_rects(option.rect)
+
+        i_qpainter.save()
+        i_qpainter.setPen(option.palette.color(text_color_role))
+        i_qpainter.drawText(
+            left_qrect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop | QtCore.Qt.TextWordWrap,
+            i_qmodelindex.data(LEFT_TEXT_ROLE_IT))
+        i_qpainter.drawText(
+            tags_qrect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop | QtCore.Qt.TextWordWrap, TAGS_PLACEHOLDER_STR)
+
+        text_qtextdocument = self.get_text_document(i_qmodelindex, option.font, text_qrect.width())
+        paint_context = QtGui.QAbstractTextDocumentLayout.PaintContext()
+        paint_context.palette.setColor(QtGui.QPalette.Text, option.palette.color(text_color_role))
+        i_qpainter.translate(text_qrect.topLeft())
+        i_qpainter.setClipRect(QtCore.QRect(0, 0, text_qrect.width(), text_qrect.height()))
+        text_qtextdocument.documentLayout().draw(i_qpainter, paint_context)
+        i_qpainter.restore()
+
+    def sizeHint(self, i_option, i_qmodelindex):
+        """Overridden"""
+        width_it = self.list_view.viewport().width()
+        size_for_width_dict = self.size_hint_cache_dict.setdefault(i_qmodelindex.data(DIARY_ENTRY_ROLE_IT).id, {})
+        if width_it not in size_for_width_dict:
+            (left_qrect, text_qrect, tags_qrect) = self.get_column_rects(QtCore.QRect(0, 0, width_it, 0))
+            font_metrics = QtGui.QFontMetrics(i_option.font)
+            left_height_it = font_metrics.boundingRect(
+                0, 0, left_qrect.width(), 0, QtCore.Qt.TextWordWrap, i_qmodelindex.data(LEFT_TEXT_ROLE_IT)).height()
+            text_height_it = int(self.get_text_document(
+                i_qmodelindex, i_option.font, text_qrect.width()).size().height())
+            size_for_width_dict[width_it] = QtCore.QSize(
+                width_it, max(left_height_it, text_height_it, font_metrics.height()) + 2 * ROW_MARGIN_IT)
+        return size_for_width_dict[width_it]
+
+
+def get_fetch_function_for_active_view():
+    """:return: A function that takes (limit, offset) and reads a page of entries for the active view"""
+    if bwbglobal.search_text_str:
+        search_text_str = bwbglobal.search_text_str
+        return lambda i_limit_it, i_offset_it: bwb.model.DiaryM.search(
+            search_text_str, i_limit_it=i_limit_it, i_offset_it=i_offset_it)
+    elif bwbglobal.active_view_viewenum == bwbglobal.ViewEnum.journal_monthly_view:
+        (year_it, month_1to12_it) = (bwbglobal.shown_year_it, bwbglobal.shown_month_1to12_it)
+        question_id_it = bwbglobal.active_question_id_it
+        return lambda i_limit_it, i_offset_it: bwb.model.DiaryM.get_all_for_question_and_month(
+            question_id_it, year_it, month_1to12_it, i_limit_it=i_limit_it, i_offset_it=i_offset_it)
+    elif bwbglobal.active_view_viewenum == bwbglobal.ViewEnum.diary_daily_overview:
+        day_date = bwbglobal.active_date_qdate.toPyDate()
+        return lambda i_limit_it, i_offset_it: bwb.model.DiaryM.get_all_for_day_with_questions(
+            day_date, i_limit_it=i_limit_it, i_offset_it=i_offset_it)
+    return lambda i_limit_it, i_offset_it: []
+
+
+def is_pending_entry(i_diary_entry) -> bool:
+    return i_diary_entry.id < NO_ENTRY_CLICKED_INT
+
+
+def day_key_to_date(i_day_key_it: int) -> datetime.date:
+    return datetime.date(i_day_key_it // 10000, i_day_key_it // 100 % 100, i_day_key_it % 100)
+
+
+def get_month_view_date_str(i_day_key_it: int) -> str:
+    day_date = day_key_to_date(i_day_key_it)
+    today_date = datetime.date.today()
+    if day_date == today_date:
+        return "Today"
+    date_string_format_str = "%A"  # -weekday
+    if day_date <= today_date - datetime.timedelta(days=7):
+        date_string_format_str = "%-d %b"
+    return day_date.strftime(date_string_format_str)
+
+
+def get_snippet_html(i_snippet_str):
+    """The matching words in a search result snippet are shown in bold"""
+    snippet_html_str = html.escape(i_snippet_str.strip())
+    snippet_html_str = snippet_html_str.replace(bwb.model.SNIPPET_START_STR, "<b>")
+    snippet_html_str = snippet_html_str.replace(bwb.model.SNIPPET_END_STR, "</b>")
+    return snippet_html_str
@@ -0,0 +1,99 @@
+from PyQt5 import QtWidgets
+from PyQt5 import QtCore
+
+import bwb.bwbglobal
+import bwb.exporter
+import bwb.model
+
+ALL_QUESTIONS_INT = -1
+FORMAT_NAMES_DICT = {
+    bwb.exporter.ExportFormatEnum.csv: "CSV",
+    bwb.exporter.ExportFormatEnum.json_lines: "JSON Lines",
+    bwb.exporter.ExportFormatEnum.markdown: "Markdown",
+}
+
+
+class ExportDialog(QtWidgets.QDialog):
+    """
+    Lets the user choose the format and which entries to export, the file name is asked for afterwards
+    (please see show_export_dialog)
+    """
+    def __init__(self, i_parent=None):
+        super(ExportDialog, self).__init__(i_parent)
+        self.setWindowTitle("Export")
+
+        form_layout = QtWidgets.QFormLayout(self)
+
+        self.format_qcb = QtWidgets.QComboBox()
+        for (export_format, format_name_str) in FORMAT_NAMES_DICT.items():
+            self.format_qcb.addItem(format_name_str, export_format)
+        form_layout.addRow("Format", self.format_qcb)
+
+        self.gzip_qcb = QtWidgets.QCheckBox("Compress (gzip)")
+        form_layout.addRow("", self.gzip_qcb)
+
+        self.question_qcb = QtWidgets.QComboBox()
+        self.question_qcb.addItem("All questions", ALL_QUESTIONS_INT)
+        for question in bwb.model.QuestionM.get_all():
+            self.question_qcb.addItem(question.title_str, question.id_int)
+        form_layout.addRow("Question", self.question_qcb)
+
+        self.date_range_qcb = QtWidgets.QCheckBox("Only entries between these dates")
+        self.date_range_qcb.toggled.connect(self.on_date_range_toggled)
+        form_layout.addRow("", self.date_range_qcb)
+        self.start_date_qde = QtWidgets.QDateEdit(bwb.bwbglobal.active_date_qdate.addMonths(-1))
+        self.start_date_qde.setCalendarPopup(True)
+        form_layout.addRow("From", self.start_date_qde)
+        self.end_date_qde = QtWidgets.QDateEdit(bwb.bwbglobal.active_date_qdate)
+        self.end_date_qde.setCalendarPopup(True)
+        form_layout.addRow("To", self.end_date_qde)
+        self.on_date_range_toggled(False)
+
+        self.button_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel,
+            QtCore.Qt.Horizontal,
+            self
+        )
+        form_layout.addRow(self.button_box)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+
+    def on_date_range_toggled(self, i_checked_bl):
+        self.start_date_qde.setEnabled(i_checked_bl)
+        self.end_date_qde.setEnabled(i_checked_bl)
+
+    def get_export_format(self):
+        return self.format_qcb.currentData()
+
+    def get_question_id(self):
+        question_id_it = self.question_qcb.currentData()
+        if question_id_it == ALL_QUESTIONS_INT:
+            return None
+        return question_id_it
+
+    def get_date_range(self):
+        if not self.date_range_qcb.isChecked():
+            return None
+        start_unix_time_it = bwb.bwbglobal.qdate_to_unixtime(self.start_date_qde.date())
+        end_unix_time_it = bwb.bwbglobal.qdate_to_unixtime(self.end_date_qde.date().addDays(1))
+        # -the end date is included
+        return (start_unix_time_it, end_unix_time_it)
+
+    @staticmethod
+    def show_export_dialog(i_parent=None):
+        dialog = ExportDialog(i_parent)
+        if dialog.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        export_format = dialog.get_export_format()
+        gzip_bl = dialog.gzip_qcb.isChecked()
+        suggested_file_name_str = "exported." + export_format.value
+        if gzip_bl:
+            suggested_file_name_str += bwb.exporter.GZIP_SUFFIX_STR
+        (file_path_str, filter_str) = QtWidgets.QFileDialog.getSaveFileName(
+            i_parent, "Export to file", suggested_file_name_str)
+        if not file_path_str:
+            return
+        row_count_it = bwb.exporter.export(
+            file_path_str, export_format, gzip_bl, dialog.get_question_id(), dialog.get_date_range())
+        QtWidgets.QMessageBox.information(
+            i_parent, "Export", str(row_count_it) + " diary entries exported to " + file_path_str)
@@ -0,0 +1,91 @@
+import csv
+import enum
+import gzip
+import json
+
+import bwb.model
+
+"""
+Module comments:
+Exporting the diary to a file. The rows are streamed from the db (please see DiaryM.iter_for_export) and written
+one at a time, so memory use stays the same no matter how large the diary is
+
+Formats:
+* CSV: date and time, diary text, question title (no header row)
+* JSON Lines: one JSON object per line with the keys "date", "question" and "text"
+* Markdown: one heading per day, with the entries for that day in a list below it
+"""
+
+GZIP_SUFFIX_STR = ".gz"
+
+
+class ExportFormatEnum(enum.Enum):
+    csv = "csv"
+    json_lines = "jsonl"
+    markdown = "md"
+
+
+def open_export_file(i_file_path_str: str, i_gzip_bl: bool):
+    if i_gzip_bl:
+        return gzip.open(i_file_path_str, "wt", encoding="utf-8", newline="")
+    return open(i_file_path_str, "w", encoding="utf-8", newline="")
+    # -newline="" is needed for the csv module, which writes its own line endings
+
+
+def write_csv(i_text_file, i_rows_iter) -> int:
+    csv_writer = csv.writer(i_text_file)
+    row_count_it = 0
+    for (date_str, question_title_str, diary_text_str) in i_rows_iter:
+        csv_writer.writerow((date_str, diary_text_str, question_title_str))
+        row_count_it += 1
+    return row_count_it
+
+
+def write_json_lines(i_text_file, i_rows_iter) -> int:
+    row_count_it = 0
+    for (date_str, question_title_str, diary_text_str) in i_rows_iter:
+        i_text_file.write(json.dumps(
+            {"date": date_str, "question": question_title_str, "text": diary_text_str},
+            ensure_ascii=False
+        ))
+        i_text_file.write("\n")
+        row_count_it += 1
+    return row_count_it
+
+
+def write_markdown(i_text_file, i_rows_iter) -> int:
+    row_count_it = 0
+    old_day_str = ""
+    for (date_str, question_title_str, diary_text_str) in i_rows_iter:
+        (day_str, time_str) = date_str.split(" ")
+        if day_str != old_day_str:
+            i_text_file.write("\n## " + day_str + "\n\n")
+            old_day_str = day_str
+        entry_text_str = "\n  ".join(diary_text_str.strip().splitlines())
+        # -indenting the following lines so that they stay in the same list item
+        i_text_file.write("- " + time_str[:5] + " **" + question_title_str + "**: " + entry_text_str + "\n")
+        row_count_it += 1
+    return row_count_it
+
+
+writers = {
+    ExportFormatEnum.csv: write_csv,
+    ExportFormatEnum.json_lines: write_json_lines,
+    ExportFormatEnum.markdown: write_markdown,
+}
+
+
+def export(i_file_path_str: str, i_format: ExportFormatEnum, i_gzip_bl: bool=False,
+        i_question_id_it: int=None, i_date_range_te=None) -> int:
+    """
+    :param i_question_id_it: None for all questions
+    :param i_date_range_te: (start unix time (inclusive), end unix time (exclusive)), or None for all dates
+    :return: The number of diary entries written
+    """
+    rows_iter = bwb.model.DiaryM.iter_for_export(i_question_id_it, i_date_range_te)
+    with open_export_file(i_file_path_str, i_gzip_bl) as text_file:
+        return writers[i_format](text_file, rows_iter)
+
+
+def export_all(i_file_path_str: str="exported.csv") -> int:
+    return export(i_file_path_str, ExportFormatEnum.csv)
@@ -0,0 +1,182 @@
+import csv
+import datetime
+import gzip
+import json
+import logging
+import time
+
+import bwb.exporter
+import bwb.model
+
+"""
+Module comments:
+Importing diary entries from the files written by bwb.exporter (CSV and JSON Lines, optionally gzip compressed).
+Older CSV files (written before the question column was added) have only two columns: date and text.
+
+The file is parsed as a generator and the entries are added in batches, one transaction per batch. Entries that
+are already in the diary (same day, question and text, please see bwb.model.get_content_hash) are skipped, so
+running the same import twice doesn't give any duplicates
+"""
+
+IMPORT_BATCH_SIZE_IT = 1000
+IMPORTED_QUESTION_TITLE_STR = "Imported"  # -used for entries which don't have a question title
+DATE_FORMATS_TE = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+
+class ImportResultM:
+    def __init__(self) -> None:
+        self.imported_count_it = 0
+        self.duplicate_count_it = 0
+        self.invalid_count_it = 0
+        self.new_question_count_it = 0
+        self.seconds_ft = 0.0
+
+    def get_rows_per_second(self) -> float:
+        total_count_it = self.imported_count_it + self.duplicate_count_it + self.invalid_count_it
+        return total_count_it / max(self.seconds_ft, 0.001)
+
+    def get_summary(self) -> str:
+        return (
+            str(self.imported_count_it) + " entries imported, "
+            + str(self.duplicate_count_it) + " duplicates skipped, "
+            + str(self.invalid_count_it) + " invalid rows skipped, "
+            + str(self.new_question_count_it) + " new questions ("
+            + "{:.0f}".format(self.get_rows_per_second()) + " rows/s)"
+        )
+
+
+def parse_date(i_date_str: str) -> int:
+    """:return: Unix time, the date string is in local time"""
+    for date_format_str in DATE_FORMATS_TE:
+        try:
+            return int(datetime.datetime.strptime(i_date_str.strip(), date_format_str).timestamp())
+        except ValueError:
+            pass
+    raise ValueError("Unknown date format: " + i_date_str)
+
+
+def iter_csv_rows(i_text_file):
+    """:return: (date string, question title, diary text) tuples, or None for rows that can't be read"""
+    for row_list in csv.reader(i_text_file):
+        if len(row_list) == 2:
+            yield (row_list[0], "", row_list[1])
+        elif len(row_list) >= 3:
+            yield (row_list[0], row_list[2], row_list[1])
+        else:
+            yield None
+
+
+def iter_json_lines_rows(i_text_file):
+    """:return: (date string, question title, diary text) tuples, or None for rows that can't be read"""
+    for line_str in i_text_file:
+        if not line_str.strip():
+            continue
+        try:
+            row_dict = json.loads(line_str)
+            row_te = (row_dict["date"], row_dict.get("question", ""), row_dict["text"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            yield None
+            continue
+        if all(isinstance(value, str) for value in row_te):
+            yield row_te
+        else:
+            yield None
+            # -for example "question": null or a number as the date, which would stop the import further on
+
+
+readers = {
+    bwb.exporter.ExportFormatEnum.csv: iter_csv_rows,
+    bwb.exporter.ExportFormatEnum.json_lines: iter_json_lines_rows,
+}
+
+
+def get_format_from_file_name(i_file_path_str: str):
+    file_path_str = i_file_path_str.lower()
+    if file_path_str.endswith(bwb.exporter.GZIP_SUFFIX_STR):
+        file_path_str = file_path_str[:-len(bwb.exporter.GZIP_SUFFIX_STR)]
+    for import_format in readers:
+        if file_path_str.endswith("." + import_format.value):
+            return import_format
+    return bwb.exporter.ExportFormatEnum.csv
+
+
+def open_import_file(i_file_path_str: str):
+    if i_file_path_str.lower().endswith(bwb.exporter.GZIP_SUFFIX_STR):
+        return gzip.open(i_file_path_str, "rt", encoding="utf-8", newline="")
+    return open(i_file_path_str, "r", encoding="utf-8", newline="")
+
+
+class QuestionMapper:
+    """
+    Gives the question id for a question title, adding a new question if there isn't one with the title
+    The questions that are added in a batch are kept separately until the batch transaction has ended (please see
+    end_batch), since they are removed from the db if the transaction is rolled back
+    """
+    def __init__(self, i_import_result: ImportResultM) -> None:
+        self.import_result = i_import_result
+        self.id_for_title_dict = {}
+        self.batch_id_for_title_dict = {}  # -questions added in the current batch
+        for question in bwb.model.QuestionM.get_all():
+            self.id_for_title_dict.setdefault(question.title_str, question.id_int)
+
+    def get_question_id(self, i_title_str: str) -> int:
+        title_str = i_title_str.strip() or IMPORTED_QUESTION_TITLE_STR
+        if title_str in self.id_for_title_dict:
+            return self.id_for_title_dict[title_str]
+        if title_str not in self.batch_id_for_title_dict:
+            self.batch_id_for_title_dict[title_str] = bwb.model.QuestionM.add(title_str, "")
+        return self.batch_id_for_title_dict[title_str]
+
+    def end_batch(self, i_committed_bl: bool) -> None:
+        if i_committed_bl:
+            self.id_for_title_dict.update(self.batch_id_for_title_dict)
+            self.import_result.new_question_count_it += len(self.batch_id_for_title_dict)
+        self.batch_id_for_title_dict = {}
+
+
+def import_batch(i_row_list, i_question_mapper: QuestionMapper, i_import_result: ImportResultM) -> None:
+    new_row_list = []
+    batch_content_hashes_set = set()
+    try:
+        with bwb.model.DbHelperM.transaction():
+            for row_te in i_row_list:
+                try:
+                    (date_str, question_title_str, diary_text_str) = row_te
+                    date_added_it = parse_date(date_str)
+                except (TypeError, ValueError):
+                    i_import_result.invalid_count_it += 1
+                    continue
+                question_id_it = i_question_mapper.get_question_id(question_title_str)
+                content_hash_it = bwb.model.get_content_hash(date_added_it, question_id_it, diary_text_str)
+                if (content_hash_it in batch_content_hashes_set
+                        or bwb.model.DiaryM.content_hash_exists(content_hash_it)):
+                    i_import_result.duplicate_count_it += 1
+                    continue
+                batch_content_hashes_set.add(content_hash_it)
+                new_row_list.append((date_added_it, diary_text_str, question_id_it))
+            bwb.model.DiaryM.add_many(new_row_list)
+    except BaseException:
+        i_question_mapper.end_batch(False)
+        raise
+    i_question_mapper.end_batch(True)
+    i_import_result.imported_count_it += len(new_row_list)
+    # -duplicates within the file but in different batches are found with content_hash_exists, since each batch
+    # has been written to the db before the next one is read
+
+
+def import_file(i_file_path_str: str, i_format=None) -> ImportResultM:
+    """
+    :param i_format: bwb.exporter.ExportFormatEnum (csv or json_lines), None means that the format is decided
+    from the file name
+    """
+    import_format = i_format or get_format_from_file_name(i_file_path_str)
+    import_result = ImportResultM()
+    start_ft = time.perf_counter()
+    question_mapper = QuestionMapper(import_result)
+    with open_import_file(i_file_path_str) as text_file:
+        rows_iter = readers[import_format](text_file)
+        for row_list in bwb.model.chunks(rows_iter, IMPORT_BATCH_SIZE_IT):
+            import_batch(row_list, question_mapper, import_result)
+    import_result.seconds_ft = time.perf_counter() - start_ft
+    logging.info("Import of " + i_file_path_str + ": " + import_result.get_summary())
+    return import_result
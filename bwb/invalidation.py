@@ -0,0 +1,86 @@
+import enum
+import logging
+
+from PyQt5 import QtCore
+
+"""
+Module comments:
+Refreshing of the panels (central widget, calendar, questions, etc) in the main window. Each panel is registered
+together with the application state that it shows (please see DependencyEnum). When something changes, the
+code that changed it calls invalidate() with what has changed, and only the panels that depend on that are
+marked as dirty. The dirty panels are refreshed once at the next pass of the event loop, so several changes
+made during the same user action (for example by signals that trigger each other) give only one refresh
+"""
+
+
+class DependencyEnum(enum.Enum):
+    active_date = 1  # -bwbglobal.active_date_qdate
+    shown_month = 2  # -bwbglobal.shown_year_it and shown_month_1to12_it
+    active_question = 3  # -bwbglobal.active_question_id_it
+    active_view = 4  # -bwbglobal.active_view_viewenum
+    search_text = 5  # -bwbglobal.search_text_str
+    question_list = 6  # -questions have been added or changed
+    diary_entries = 7  # -diary entries have been added, changed or removed
+
+
+class PanelM:
+    def __init__(self, i_name_str: str, i_get_dependencies_function, i_refresh_function) -> None:
+        """
+        :param i_get_dependencies_function: Returns the set of DependencyEnum values that the panel depends on
+        at the moment (which can change, for example with the active view)
+        """
+        self.name_str = i_name_str
+        self.get_dependencies_function = i_get_dependencies_function
+        self.refresh_function = i_refresh_function
+
+
+class InvalidationScheduler:
+    def __init__(self) -> None:
+        self.panel_list = []  # -the panels are refreshed in the order that they were registered
+        self.dirty_panel_name_set = set()
+        self.refresh_scheduled_bl = False
+
+    def register_panel(self, i_name_str: str, i_dependencies, i_refresh_function) -> None:
+        """
+        :param i_dependencies: A set of DependencyEnum values, or a function which returns such a set
+        """
+        get_dependencies_function = i_dependencies
+        if not callable(i_dependencies):
+            get_dependencies_function = lambda: i_dependencies
+        self.panel_list.append(PanelM(i_name_str, get_dependencies_function, i_refresh_function))
+        self.dirty_panel_name_set.add(i_name_str)
+
+    def invalidate(self, *i_dependencies) -> None:
+        for panel in self.panel_list:
+            if panel.get_dependencies_function() & set(i_dependencies):
+                self.dirty_panel_name_set.add(panel.name_str)
+        self.schedule_refresh()
+
+    def invalidate_panel(self, i_name_str: str) -> None:
+        self.dirty_panel_name_set.add(i_name_str)
+        self.schedule_refresh()
+
+    def invalidate_all(self) -> None:
+        self.dirty_panel_name_set.update(panel.name_str for panel in self.panel_list)
+        self.schedule_refresh()
+
+    def schedule_refresh(self) -> None:
+        if not self.refresh_scheduled_bl and self.dirty_panel_name_set:
+            self.refresh_scheduled_bl = True
+            QtCore.QTimer.singleShot(0, self.refresh_dirty_panels)
+            # -a zero timeout means that the function is called when the event loop has handled the events that
+            # are waiting, so all the changes made until then are refreshed together
+
+    def refresh_dirty_panels(self) -> None:
+        """Can also be called directly, to refresh at once rather than at the next pass of the event loop"""
+        self.refresh_scheduled_bl = False
+        dirty_panel_name_set = self.dirty_panel_name_set
+        self.dirty_panel_name_set = set()
+        # -panels that are invalidated while refreshing (by signals for example) are refreshed in the next pass
+        for panel in self.panel_list:
+            if panel.name_str in dirty_panel_name_set:
+                logging.debug("Refreshing panel: " + panel.name_str)
+                panel.refresh_function()
+
+
+scheduler = InvalidationScheduler()
@@ -1,9 +1,16 @@
-import csv
+import collections
+import contextlib
 import datetime
+import functools
+import inspect
+import logging
 import shutil
 import sqlite3
+import threading
 import time
 import enum
+import hashlib
+import itertools
 
 import bwb.bwbglobal
 
@@ -21,15 +28,66 @@ import bwb.bwbglobal
 # Notes:
 # * When inserting vales, it's best to use "VALUES (?, ?)" because then the sqlite3 module will take care of
 #   escaping strings for us
+# * The pragmas used when opening the db are taken from the active storage profile (please see StorageProfileM)
 #
 #################
 
-# DATABASE_FILE_NAME = "bwb_database_file.db"
-DATABASE_FILE_NAME = ":memory:"
+DATABASE_FILE_NAME = "bwb_database_file.db"
+# DATABASE_FILE_NAME = ":memory:"
+populate_with_test_data_bl = False
+# -if True a new db gets a few example diary entries and reminders (please see populate_db_with_test_data)
 SQLITE_FALSE = 0
 SQLITE_TRUE = 1
 TIME_NOT_SET = -1
 NO_REFERENCE = -1
+STATEMENT_CACHE_SIZE_IT = 256  # -should be larger than the number of statements in SqlM
+SEARCH_RESULT_LIMIT_IT = 100
+SNIPPET_START_STR = "\x02"  # -marks the start of a matching word in search result snippets
+SNIPPET_END_STR = "\x03"
+SNIPPET_ELLIPSIS_STR = "..."
+SNIPPET_MAX_TOKENS_IT = 24
+MIN_UNIX_TIME_IT = -2 ** 62
+MAX_UNIX_TIME_IT = 2 ** 62
+CONTENT_HASH_SQL_FUNCTION_NAME_STR = "bwb_content_hash"
+BULK_CHUNK_SIZE_IT = 1000
+# -number of rows given to executemany at a time by the bulk functions (add_many, etc)
+EXPORT_CHUNK_SIZE_IT = 1000  # -number of rows fetched at a time when exporting
+NO_LIMIT_IT = -1  # -"LIMIT -1" gives all rows in sqlite
+MONTH_ACTIVITY_CACHE_SIZE_IT = 36  # -number of months kept in MonthActivityCacheM
+DEFAULT_SLOW_QUERY_MS_FT = 20.0  # -please see QueryStatsM
+QUERY_STATS_SAMPLE_SIZE_IT = 1000  # -the p95 times in QueryStatsM are for this many of the latest calls
+OUTSIDE_MODEL_METHODS_STR = "(outside model methods)"
+
+
+class StorageProfileEnum(enum.Enum):
+    memory = 0  # -nothing is written to disk (the db file name is ignored)
+    safe = 1  # -WAL, but with an fsync on every commit
+    balanced = 2  # -WAL, fsync only at checkpoints (the default)
+    fast = 3  # -like balanced but with a larger cache and memory mapped i/o
+
+
+class StorageProfileM:
+    """
+    Pragma settings that are applied every time the db connection is opened
+    Docs: https://www.sqlite.org/pragma.html and https://www.sqlite.org/wal.html
+    """
+    def __init__(self, i_journal_mode_str: str, i_synchronous_str: str, i_cache_size_kib_it: int,
+            i_mmap_size_bytes_it: int, i_page_size_bytes_it: int) -> None:
+        self.journal_mode_str = i_journal_mode_str
+        self.synchronous_str = i_synchronous_str
+        self.cache_size_kib_it = i_cache_size_kib_it
+        self.mmap_size_bytes_it = i_mmap_size_bytes_it
+        self.page_size_bytes_it = i_page_size_bytes_it
+        # -page_size only has effect when the db file is created (or vacuumed)
+
+
+storage_profiles = {
+    StorageProfileEnum.memory: StorageProfileM("MEMORY", "OFF", 8 * 1024, 0, 4096),
+    StorageProfileEnum.safe: StorageProfileM("WAL", "FULL", 2 * 1024, 0, 4096),
+    StorageProfileEnum.balanced: StorageProfileM("WAL", "NORMAL", 8 * 1024, 64 * 1024 * 1024, 4096),
+    StorageProfileEnum.fast: StorageProfileM("WAL", "NORMAL", 32 * 1024, 256 * 1024 * 1024, 8192),
+}
+active_storage_profile = StorageProfileEnum.balanced
 
 
 class QuestionSetupEnum(enum.Enum):
@@ -39,6 +97,13 @@ class QuestionSetupEnum(enum.Enum):
     study = 4
 
 
+class RecurrenceEnum(enum.Enum):
+    """How often a reminder is repeated after its due time (please see bwb.reminder_scheduler)"""
+    once = 0
+    daily = 1
+    weekly = 2
+
+
 def get_schema_version(i_db_conn):
     t_cursor = i_db_conn.execute("PRAGMA user_version")
     return t_cursor.fetchone()[0]
@@ -80,8 +145,6 @@ def initial_schema_and_setup(i_db_conn):
         + ")"
     )
 
-    populate_db_with_test_data()
-
 
 """
 Example of db upgrade code:
@@ -93,36 +156,339 @@ def upgrade_1_2(i_db_conn):
     )
 """
 
+
+def upgrade_1_2(i_db_conn):
+    """Indexes for the month and day queries (which would otherwise have to scan and sort the whole table)
+    To check that no query falls back to a table scan: python3 tools/check_query_plans.py
+    """
+    i_db_conn.execute(
+        "CREATE INDEX IF NOT EXISTS " + DbSchemaM.DiaryEntryTable.Indexes.question_ref_date_added
+        + " ON " + DbSchemaM.DiaryEntryTable.name + "("
+        + DbSchemaM.DiaryEntryTable.Cols.question_ref + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.date_added
+        + ")"
+    )
+    i_db_conn.execute(
+        "CREATE INDEX IF NOT EXISTS " + DbSchemaM.DiaryEntryTable.Indexes.date_added
+        + " ON " + DbSchemaM.DiaryEntryTable.name + "("
+        + DbSchemaM.DiaryEntryTable.Cols.date_added
+        + ")"
+    )
+
+
+def upgrade_2_3(i_db_conn):
+    """Full-text search index (FTS5) for the diary entries
+    The index is an "external content" table: The text itself is only stored in the diary_entry table, and the
+    triggers keep the index up-to-date when rows are added, edited or removed
+    Docs: https://www.sqlite.org/fts5.html#external_content_tables
+    """
+    fts_table_name_str = DbSchemaM.DiaryEntryFtsTable.name
+    text_col_str = DbSchemaM.DiaryEntryTable.Cols.diary_entry
+    id_col_str = DbSchemaM.DiaryEntryTable.Cols.id
+    i_db_conn.execute(
+        "CREATE VIRTUAL TABLE " + fts_table_name_str + " USING fts5("
+        + text_col_str + ", "
+        + "content='" + DbSchemaM.DiaryEntryTable.name + "', "
+        + "content_rowid='" + id_col_str + "'"
+        + ")"
+    )
+    i_db_conn.execute(
+        "CREATE TRIGGER " + DbSchemaM.DiaryEntryFtsTable.Triggers.after_insert
+        + " AFTER INSERT ON " + DbSchemaM.DiaryEntryTable.name + " BEGIN "
+        + "INSERT INTO " + fts_table_name_str + "(rowid, " + text_col_str + ")"
+        + " VALUES (new." + id_col_str + ", new." + text_col_str + "); "
+        + "END"
+    )
+    i_db_conn.execute(
+        "CREATE TRIGGER " + DbSchemaM.DiaryEntryFtsTable.Triggers.after_delete
+        + " AFTER DELETE ON " + DbSchemaM.DiaryEntryTable.name + " BEGIN "
+        + "INSERT INTO " + fts_table_name_str + "(" + fts_table_name_str + ", rowid, " + text_col_str + ")"
+        + " VALUES ('delete', old." + id_col_str + ", old." + text_col_str + "); "
+        + "END"
+    )
+    i_db_conn.execute(
+        "CREATE TRIGGER " + DbSchemaM.DiaryEntryFtsTable.Triggers.after_update
+        + " AFTER UPDATE OF " + text_col_str + " ON " + DbSchemaM.DiaryEntryTable.name + " BEGIN "
+        + "INSERT INTO " + fts_table_name_str + "(" + fts_table_name_str + ", rowid, " + text_col_str + ")"
+        + " VALUES ('delete', old." + id_col_str + ", old." + text_col_str + "); "
+        + "INSERT INTO " + fts_table_name_str + "(rowid, " + text_col_str + ")"
+        + " VALUES (new." + id_col_str + ", new." + text_col_str + "); "
+        + "END"
+    )
+    # -only changes to the text affect the index, so changing the date doesn't trigger this
+    i_db_conn.execute(
+        "INSERT INTO " + fts_table_name_str + "(" + fts_table_name_str + ") VALUES ('rebuild')"
+    )
+    # -indexing the entries that were added before this upgrade
+
+
+def upgrade_3_4(i_db_conn):
+    """Content hash for finding duplicates when importing (please see get_content_hash and bwb.importer)"""
+    i_db_conn.execute(
+        "ALTER TABLE " + DbSchemaM.DiaryEntryTable.name + " ADD COLUMN "
+        + DbSchemaM.DiaryEntryTable.Cols.content_hash + " INTEGER"
+    )
+    i_db_conn.execute(
+        "UPDATE " + DbSchemaM.DiaryEntryTable.name
+        + " SET " + DbSchemaM.DiaryEntryTable.Cols.content_hash + " = " + CONTENT_HASH_SQL_FUNCTION_NAME_STR + "("
+        + DbSchemaM.DiaryEntryTable.Cols.date_added + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.question_ref + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.diary_entry + ")"
+    )
+    i_db_conn.execute(
+        "CREATE INDEX " + DbSchemaM.DiaryEntryTable.Indexes.content_hash
+        + " ON " + DbSchemaM.DiaryEntryTable.name + "(" + DbSchemaM.DiaryEntryTable.Cols.content_hash + ")"
+    )
+
+
+def upgrade_4_5(i_db_conn):
+    """The local day (please see get_local_day) is stored for each entry, so that the day and month queries can
+    use an index on the day rather than time ranges (which are wrong when the clocks change for DST)
+    """
+    i_db_conn.execute(
+        "UPDATE " + DbSchemaM.DiaryEntryTable.name
+        + " SET " + DbSchemaM.DiaryEntryTable.Cols.date_added
+        + " = CAST(" + DbSchemaM.DiaryEntryTable.Cols.date_added + " AS INTEGER)"
+        + " WHERE typeof(" + DbSchemaM.DiaryEntryTable.Cols.date_added + ") = 'real'"
+    )
+    # -the test data used to be added with float times. The content hash doesn't change since it uses the day
+    i_db_conn.execute(
+        "ALTER TABLE " + DbSchemaM.DiaryEntryTable.name + " ADD COLUMN "
+        + DbSchemaM.DiaryEntryTable.Cols.local_day + " INTEGER"
+    )
+    i_db_conn.execute(
+        "UPDATE " + DbSchemaM.DiaryEntryTable.name
+        + " SET " + DbSchemaM.DiaryEntryTable.Cols.local_day + " = "
+        + get_local_day_sql(DbSchemaM.DiaryEntryTable.Cols.date_added)
+    )
+    i_db_conn.execute(
+        "CREATE INDEX " + DbSchemaM.DiaryEntryTable.Indexes.local_day_date_added
+        + " ON " + DbSchemaM.DiaryEntryTable.name + "("
+        + DbSchemaM.DiaryEntryTable.Cols.local_day + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.date_added
+        + ")"
+    )
+    i_db_conn.execute(
+        "CREATE INDEX " + DbSchemaM.DiaryEntryTable.Indexes.question_ref_local_day_date_added
+        + " ON " + DbSchemaM.DiaryEntryTable.name + "("
+        + DbSchemaM.DiaryEntryTable.Cols.question_ref + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.local_day + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.date_added
+        + ")"
+    )
+    i_db_conn.execute("DROP INDEX IF EXISTS " + DbSchemaM.DiaryEntryTable.Indexes.question_ref_date_added)
+    # -the month query now uses the index above instead
+
+
+def upgrade_5_6(i_db_conn):
+    """Due time and recurrence for the reminders (please see bwb.reminder_scheduler). Reminders without a due
+    time are not scheduled, and the index is used when the scheduled reminders are read at startup
+    """
+    i_db_conn.execute(
+        "ALTER TABLE " + DbSchemaM.ReminderTable.name + " ADD COLUMN "
+        + DbSchemaM.ReminderTable.Cols.due_time + " INTEGER"
+    )
+    i_db_conn.execute(
+        "ALTER TABLE " + DbSchemaM.ReminderTable.name + " ADD COLUMN "
+        + DbSchemaM.ReminderTable.Cols.recurrence + " INTEGER NOT NULL DEFAULT " + str(RecurrenceEnum.once.value)
+    )
+    i_db_conn.execute(
+        "CREATE INDEX " + DbSchemaM.ReminderTable.Indexes.due_time
+        + " ON " + DbSchemaM.ReminderTable.name + "(" + DbSchemaM.ReminderTable.Cols.due_time + ")"
+    )
+
+
 upgrade_steps = {
     1: initial_schema_and_setup,
+    2: upgrade_1_2,
+    3: upgrade_2_3,
+    4: upgrade_3_4,
+    5: upgrade_4_5,
+    6: upgrade_5_6,
 }
 
 
-class DbHelperM(object):
-    __db_connection = None  # "Static"
+def apply_storage_profile(i_db_conn, i_storage_profile: StorageProfileM) -> None:
+    i_db_conn.execute("PRAGMA page_size={:d}".format(i_storage_profile.page_size_bytes_it))
+    # -has to come before the journal mode is changed to WAL, otherwise it's ignored
+    i_db_conn.execute("PRAGMA journal_mode=" + i_storage_profile.journal_mode_str)
+    i_db_conn.execute("PRAGMA synchronous=" + i_storage_profile.synchronous_str)
+    i_db_conn.execute("PRAGMA cache_size=-{:d}".format(i_storage_profile.cache_size_kib_it))
+    # -a negative value means KiB rather than number of pages
+    i_db_conn.execute("PRAGMA mmap_size={:d}".format(i_storage_profile.mmap_size_bytes_it))
+
+
+def get_content_hash(i_date_added_it: int, i_question_ref_it: int, i_diary_text_str: str) -> int:
+    """
+    Two diary entries are regarded as duplicates if they have the same text (ignoring surrounding whitespace),
+    for the same question, on the same (local) day. Only the first 8 bytes of the SHA-1 digest are used, so that
+    the hash fits into an sqlite INTEGER (which keeps the index small)
+    Also registered as an sql function (CONTENT_HASH_SQL_FUNCTION_NAME_STR) on the db connection
+    """
+    day_str = datetime.date.fromtimestamp(i_date_added_it).isoformat()
+    content_str = day_str + "\x1f" + str(i_question_ref_it) + "\x1f" + (i_diary_text_str or "").strip()
+    digest_bytes = hashlib.sha1(content_str.encode("utf-8")).digest()
+    return int.from_bytes(digest_bytes[:8], "big", signed=True)
+
+
+def get_day_key(i_year_it: int, i_month_1to12_it: int, i_day_it: int) -> int:
+    """Day keys are integers of the form YYYYMMDD, please see also bwb.bwbglobal.day_key_to_qdate"""
+    return i_year_it * 10000 + i_month_1to12_it * 100 + i_day_it
+
+
+def get_month_day_key_range(i_year_it: int, i_month_1to12_it: int) -> tuple:
+    """:return: (first day key (inclusive), last day key (exclusive)) for the month"""
+    first_day_key_it = get_day_key(i_year_it, i_month_1to12_it, 1)
+    return (first_day_key_it, first_day_key_it + 31)
+    # -no month has more than 31 days, so this doesn't depend on the length of the month
+
+
+def get_local_day(i_unix_time_it: int) -> int:
+    """
+    :return: The day key for the local date at the time (the same value as get_local_day_sql gives in the db)
+    """
+    local_date = datetime.date.fromtimestamp(i_unix_time_it)
+    return get_day_key(local_date.year, local_date.month, local_date.day)
+
+
+def get_local_day_sql(i_unix_time_sql_str: str) -> str:
+    """
+    :param i_unix_time_sql_str: A column name or parameter (for example "?1")
+    :return: SQL expression which gives the day key for the local date at the time. Sqlite uses the same C
+    library function (localtime) as Python, so this gives the same value as get_local_day
+    """
+    return "CAST(strftime('%Y%m%d', " + i_unix_time_sql_str + ", 'unixepoch', 'localtime') AS INTEGER)"
+
+
+def get_db_file_name() -> str:
+    if active_storage_profile == StorageProfileEnum.memory:
+        return ":memory:"
+    return DATABASE_FILE_NAME
+
+
+class ThreadStateM(threading.local):
+    """
+    Each thread has its own db connection (sqlite3 connections can't be shared between threads), transaction
+    depth and list of change events waiting for the transaction to be committed. Please see bwb.db_writer
+    """
+    def __init__(self) -> None:
+        self.db_connection = None
+        self.transaction_depth_it = 0
+        self.pending_event_list = []  # -please see ChangeBusM
+        self.method_name_list = []  # -the model methods that are running (innermost last), please see QueryStatsM
+
+
+thread_state = ThreadStateM()
+
 
+class DbHelperM(object):
     # noinspection PyTypeChecker
     @staticmethod
     def get_db_connection():
-        if DbHelperM.__db_connection is None:
-            DbHelperM.__db_connection = sqlite3.connect(DATABASE_FILE_NAME)
+        if thread_state.db_connection is None:
+            db_connection = sqlite3.connect(
+                get_db_file_name(), cached_statements=STATEMENT_CACHE_SIZE_IT, isolation_level=None)
+            # -isolation_level=None stops the sqlite3 module from starting transactions implicitly, instead we
+            # begin and end them ourselves in the transaction function below
+            apply_storage_profile(db_connection, storage_profiles[active_storage_profile])
+            db_connection.create_function(CONTENT_HASH_SQL_FUNCTION_NAME_STR, 3, get_content_hash)
+            if QueryStatsM.enabled_bl:
+                db_connection.set_trace_callback(QueryStatsM.on_sql_traced)
+            thread_state.db_connection = db_connection
 
             # Upgrading the database
             # Very good upgrade explanation:
             # http://stackoverflow.com/questions/19331550/database-change-with-software-update
             # More info here: https://www.sqlite.org/pragma.html#pragma_schema_version
-            current_db_ver_it = get_schema_version(DbHelperM.__db_connection)
+            current_db_ver_it = get_schema_version(thread_state.db_connection)
             target_db_ver_it = max(upgrade_steps)
             for upgrade_step_it in range(current_db_ver_it + 1, target_db_ver_it + 1):
                 if upgrade_step_it in upgrade_steps:
-                    upgrade_steps[upgrade_step_it](DbHelperM.__db_connection)
-                    set_schema_version(DbHelperM.__db_connection, upgrade_step_it)
-            DbHelperM.__db_connection.commit()
+                    with DbHelperM.transaction():
+                        upgrade_steps[upgrade_step_it](thread_state.db_connection)
+                        set_schema_version(thread_state.db_connection, upgrade_step_it)
+            if current_db_ver_it == 0:
+                add_default_questions()
+                if populate_with_test_data_bl:
+                    populate_db_with_test_data()
+                # -this is done after all the upgrade steps so that the latest schema is used
 
-            # TODO: Where do we close the db connection? (Do we need to close it?)
-            # http://stackoverflow.com/questions/3850261/doing-something-before-program-exit
+        return thread_state.db_connection
 
-        return DbHelperM.__db_connection
+    @staticmethod
+    @contextlib.contextmanager
+    def transaction():
+        """
+        Usage: "with DbHelperM.transaction():"
+        All the writing functions in the model classes run inside a transaction, so a caller can group several
+        of them into one atomic change (and one commit) by wrapping them in a transaction.
+        The outermost transaction is committed when the with block ends, or rolled back if there is an exception.
+        Nested transactions use savepoints, so an inner block that raises is rolled back by itself and the outer
+        transaction can still continue (if the exception is caught)
+        Change events (please see ChangeBusM) are sent when the outermost transaction has been committed
+        Docs: https://www.sqlite.org/lang_savepoint.html
+        """
+        db_connection = DbHelperM.get_db_connection()
+        depth_it = thread_state.transaction_depth_it
+        pending_event_count_it = ChangeBusM.get_pending_count()
+        savepoint_name_str = "bwb_savepoint_" + str(depth_it)
+        if depth_it == 0:
+            db_connection.execute("BEGIN IMMEDIATE")
+            # -"immediate" takes the write lock at once (rather than at the first write)
+        else:
+            db_connection.execute("SAVEPOINT " + savepoint_name_str)
+        thread_state.transaction_depth_it += 1
+        try:
+            yield db_connection
+        except BaseException:
+            thread_state.transaction_depth_it -= 1
+            if depth_it == 0:
+                db_connection.execute("ROLLBACK")
+            else:
+                db_connection.execute("ROLLBACK TO " + savepoint_name_str)
+                db_connection.execute("RELEASE " + savepoint_name_str)
+            ChangeBusM.discard_pending(pending_event_count_it)
+            # -the changes that were rolled back are not sent to the subscribers
+            raise
+        thread_state.transaction_depth_it -= 1
+        if depth_it == 0:
+            db_connection.execute("COMMIT")
+            ChangeBusM.deliver_pending()
+        else:
+            db_connection.execute("RELEASE " + savepoint_name_str)
+
+    @staticmethod
+    def enable_instrumentation(i_slow_query_ms_ft: float=DEFAULT_SLOW_QUERY_MS_FT) -> None:
+        """
+        Starts collecting statistics for the statements and model methods, please see QueryStatsM
+        Should be called at startup, since connections that are already open in other threads are not traced
+        """
+        if not QueryStatsM.enabled_bl:
+            QueryStatsM.wrap_model_methods()
+        QueryStatsM.enabled_bl = True
+        QueryStatsM.slow_query_ms_ft = i_slow_query_ms_ft
+        if thread_state.db_connection is not None:
+            thread_state.db_connection.set_trace_callback(QueryStatsM.on_sql_traced)
+
+    @staticmethod
+    def is_in_transaction() -> bool:
+        return thread_state.transaction_depth_it > 0
+
+    @staticmethod
+    def close_db_connection() -> None:
+        """
+        Closing the connection also checkpoints the WAL file into the db file (and removes the WAL file)
+        Called when the application exits, and also by the benchmarks when switching between storage profiles
+        Only the connection for the current thread is closed
+        """
+        if thread_state.db_connection is not None:
+            thread_state.db_connection.close()
+            thread_state.db_connection = None
+            thread_state.transaction_depth_it = 0
+            ChangeBusM.discard_pending(0)
+            if threading.current_thread() is threading.main_thread():
+                MonthActivityCacheM.clear()
+                # -the cache is only used by the main (gui) thread
 
 
 class DbSchemaM:
@@ -143,6 +509,23 @@ class DbSchemaM:
             date_added = "date_added"
             diary_entry = "diary_entry"
             question_ref = "question_ref"
+            content_hash = "content_hash"  # -please see get_content_hash
+            local_day = "local_day"  # -YYYYMMDD in local time when the entry was written, please see get_local_day
+
+        class Indexes:
+            question_ref_date_added = "diary_entry_question_ref_date_added_idx"  # -removed in upgrade_4_5
+            date_added = "diary_entry_date_added_idx"
+            content_hash = "diary_entry_content_hash_idx"
+            local_day_date_added = "diary_entry_local_day_date_added_idx"
+            question_ref_local_day_date_added = "diary_entry_question_ref_local_day_date_added_idx"
+
+    class DiaryEntryFtsTable:
+        name = "diary_entry_fts"  # -virtual table, the columns are the same as for DiaryEntryTable
+
+        class Triggers:
+            after_insert = "diary_entry_fts_after_insert"
+            after_delete = "diary_entry_fts_after_delete"
+            after_update = "diary_entry_fts_after_update"
 
     class ReminderTable:
         name = "reminder"
@@ -151,9 +534,443 @@ class DbSchemaM:
             id = "id"  # key
             title = "title"
             reminder = "reminder"
+            due_time = "due_time"  # -unix time of the first occurrence, NULL if the reminder is not scheduled
+            recurrence = "recurrence"  # -please see RecurrenceEnum
+
+        class Indexes:
+            due_time = "reminder_due_time_idx"
+
+
+class StatementM:
+    """
+    An SQL statement which is built only once (from the DbSchemaM names) and where all values are bound as
+    parameters. Since the SQL text is always the same for a statement, the sqlite3 module can reuse the prepared
+    statement from the statement cache of the connection instead of preparing it again on every call
+    """
+    def __init__(self, i_sql_str: str) -> None:
+        self.sql_str = i_sql_str
+
+    def execute(self, i_parameters_te=(), i_row_class=None):
+        """
+        :param i_row_class: If given, the rows are returned as objects of this class (created directly from the
+        row by sqlite3, so no intermediate list of tuples is built when fetching)
+        """
+        start_ft = time.perf_counter()
+        db_cursor = DbHelperM.get_db_connection().execute(self.sql_str, i_parameters_te)
+        if QueryStatsM.enabled_bl:
+            QueryStatsM.record_statement(self.sql_str, i_parameters_te, (time.perf_counter() - start_ft) * 1000)
+        if i_row_class is not None:
+            db_cursor.row_factory = lambda i_db_cursor, i_row_te: i_row_class(*i_row_te)
+        return db_cursor
+
+    def executemany(self, i_parameters_iter):
+        start_ft = time.perf_counter()
+        db_cursor = DbHelperM.get_db_connection().executemany(self.sql_str, i_parameters_iter)
+        if QueryStatsM.enabled_bl:
+            QueryStatsM.record_statement(self.sql_str, None, (time.perf_counter() - start_ft) * 1000)
+        return db_cursor
+
+
+class CallStatsM:
+    __slots__ = ("call_count_it", "total_ms_ft", "sample_ms_deque", "statement_count_it")
+
+    def __init__(self) -> None:
+        self.call_count_it = 0
+        self.total_ms_ft = 0.0
+        self.sample_ms_deque = collections.deque(maxlen=QUERY_STATS_SAMPLE_SIZE_IT)
+        self.statement_count_it = 0  # -for model methods: the number of SQL statements run by the method
+
+    def add(self, i_ms_ft: float) -> None:
+        self.call_count_it += 1
+        self.total_ms_ft += i_ms_ft
+        self.sample_ms_deque.append(i_ms_ft)
+
+    def get_p95_ms(self) -> float:
+        sorted_ms_list = sorted(self.sample_ms_deque)
+        if not sorted_ms_list:
+            return 0.0
+        return sorted_ms_list[max(0, -(-95 * len(sorted_ms_list) // 100) - 1)]
+
+
+class QueryStatsM:
+    """
+    Opt-in instrumentation of the model layer (please see DbHelperM.enable_instrumentation and the --trace-sql
+    command line option). When enabled:
+    * every StatementM is timed, and statements that take longer than slow_query_ms_ft are logged together
+      with their query plan. The time is for executing the statement, for a SELECT the time for fetching the
+      rows after the first one is counted for the model method instead
+    * every public DiaryM, QuestionM and ReminderM method is timed
+    * the sqlite3 trace callback counts the SQL statements (including the ones that sqlite runs for triggers,
+      and BEGIN/COMMIT) that each model method leads to
+    """
+    enabled_bl = False  # "static"
+    slow_query_ms_ft = DEFAULT_SLOW_QUERY_MS_FT
+    statement_stats_dict = {}  # -SQL text -> CallStatsM
+    method_stats_dict = {}  # -"DiaryM.get_all", etc -> CallStatsM
+    lock = threading.Lock()  # -the stats are updated both by the gui thread and the db writer thread
+
+    @staticmethod
+    def record_statement(i_sql_str: str, i_parameters_te, i_ms_ft: float) -> None:
+        """:param i_parameters_te: None for executemany"""
+        with QueryStatsM.lock:
+            QueryStatsM.statement_stats_dict.setdefault(i_sql_str, CallStatsM()).add(i_ms_ft)
+        if i_ms_ft > QueryStatsM.slow_query_ms_ft:
+            QueryStatsM.log_slow_query(i_sql_str, i_parameters_te, i_ms_ft)
+
+    @staticmethod
+    def record_method(i_method_name_str: str, i_ms_ft: float) -> None:
+        with QueryStatsM.lock:
+            QueryStatsM.method_stats_dict.setdefault(i_method_name_str, CallStatsM()).add(i_ms_ft)
+
+    @staticmethod
+    def on_sql_traced(i_sql_str: str) -> None:
+        method_name_str = OUTSIDE_MODEL_METHODS_STR
+        if thread_state.method_name_list:
+            method_name_str = thread_state.method_name_list[-1]
+        with QueryStatsM.lock:
+            QueryStatsM.method_stats_dict.setdefault(method_name_str, CallStatsM()).statement_count_it += 1
+
+    @staticmethod
+    def log_slow_query(i_sql_str: str, i_parameters_te, i_ms_ft: float) -> None:
+        parameters_te = i_parameters_te
+        if parameters_te is None:
+            parameters_te = (None,) * i_sql_str.count("?")
+            # -the rows given to executemany have already been used, so the plan is for NULL values
+        try:
+            plan_str = "; ".join(
+                row_te[3] for row_te in
+                DbHelperM.get_db_connection().execute("EXPLAIN QUERY PLAN " + i_sql_str, parameters_te))
+        except sqlite3.Error as error:
+            plan_str = "(not available: " + str(error) + ")"
+        logging.warning(
+            "Slow query (" + "{:.1f}".format(i_ms_ft) + " ms): " + " ".join(i_sql_str.split())
+            + " -- parameters: " + str(i_parameters_te) + " -- query plan: " + plan_str)
+
+    @staticmethod
+    def wrap_model_methods() -> None:
+        for model_class in (DiaryM, QuestionM, ReminderM):
+            for (name_str, attribute) in list(vars(model_class).items()):
+                if name_str.startswith("_") or not isinstance(attribute, staticmethod):
+                    continue
+                setattr(model_class, name_str, staticmethod(
+                    get_timed_function(model_class.__name__ + "." + name_str, attribute.__func__)))
+
+    @staticmethod
+    def reset() -> None:
+        with QueryStatsM.lock:
+            QueryStatsM.statement_stats_dict.clear()
+            QueryStatsM.method_stats_dict.clear()
+
+    @staticmethod
+    def get_summary_str() -> str:
+        if not QueryStatsM.enabled_bl:
+            return "SQL instrumentation is not enabled (please start the application with --trace-sql)"
+        with QueryStatsM.lock:
+            method_stats_list = sorted(
+                QueryStatsM.method_stats_dict.items(), key=lambda i_item: i_item[1].total_ms_ft, reverse=True)
+            statement_stats_list = sorted(
+                QueryStatsM.statement_stats_dict.items(), key=lambda i_item: i_item[1].total_ms_ft, reverse=True)
+        ret_line_list = ["{:<44} {:>8} {:>11} {:>9} {:>11}".format(
+            "Model method", "calls", "total ms", "p95 ms", "statements")]
+        for (method_name_str, call_stats) in method_stats_list:
+            ret_line_list.append("{:<44} {:>8} {:>11.1f} {:>9.2f} {:>11}".format(
+                method_name_str, call_stats.call_count_it, call_stats.total_ms_ft, call_stats.get_p95_ms(),
+                call_stats.statement_count_it))
+        ret_line_list.append("")
+        ret_line_list.append("{:>8} {:>11} {:>9}  {}".format("calls", "total ms", "p95 ms", "Statement"))
+        for (sql_str, call_stats) in statement_stats_list:
+            ret_line_list.append("{:>8} {:>11.1f} {:>9.2f}  {}".format(
+                call_stats.call_count_it, call_stats.total_ms_ft, call_stats.get_p95_ms(), " ".join(sql_str.split())))
+        return "\n".join(ret_line_list)
+
+
+def get_timed_function(i_method_name_str: str, i_function):
+    """:return: A function which calls i_function and records the time in QueryStatsM"""
+    if inspect.isgeneratorfunction(i_function):
+        @functools.wraps(i_function)
+        def timed_generator_function(*i_args, **i_kwargs):
+            start_ft = time.perf_counter()
+            try:
+                yield from i_function(*i_args, **i_kwargs)
+            finally:
+                QueryStatsM.record_method(i_method_name_str, (time.perf_counter() - start_ft) * 1000)
+            # -the time is from the first row until the last one (including the time used by the caller between
+            # the rows), and the statements are not counted for the method since the caller runs in between
+        return timed_generator_function
+
+    @functools.wraps(i_function)
+    def timed_function(*i_args, **i_kwargs):
+        thread_state.method_name_list.append(i_method_name_str)
+        start_ft = time.perf_counter()
+        try:
+            return i_function(*i_args, **i_kwargs)
+        finally:
+            QueryStatsM.record_method(i_method_name_str, (time.perf_counter() - start_ft) * 1000)
+            thread_state.method_name_list.pop()
+    return timed_function
+
+
+def columns_str(*i_column_names) -> str:
+    return ", ".join(i_column_names)
+
+
+def chunks(i_iterable, i_chunk_size_it: int):
+    """Splits an iterable (which can be a generator) into lists of at most i_chunk_size_it items"""
+    iterator = iter(i_iterable)
+    while True:
+        chunk_list = list(itertools.islice(iterator, i_chunk_size_it))
+        if not chunk_list:
+            return
+        yield chunk_list
+
+
+class SqlM:
+    """
+    All the statements used by the model classes below
+    Please note: The column order in the SELECT statements has to match the order of the __init__ arguments
+    """
+    _question_columns_str = columns_str(
+        DbSchemaM.QuestionTable.Cols.id,
+        DbSchemaM.QuestionTable.Cols.title,
+        DbSchemaM.QuestionTable.Cols.question,
+        DbSchemaM.QuestionTable.Cols.archived
+    )
+    question_insert = StatementM(
+        "INSERT INTO " + DbSchemaM.QuestionTable.name + "("
+        + DbSchemaM.QuestionTable.Cols.title + ", "
+        + DbSchemaM.QuestionTable.Cols.question
+        + ") VALUES (?, ?)"
+    )
+    question_get = StatementM(
+        "SELECT " + _question_columns_str + " FROM " + DbSchemaM.QuestionTable.name
+        + " WHERE " + DbSchemaM.QuestionTable.Cols.id + " = ?"
+    )
+    question_get_all = StatementM(
+        "SELECT " + _question_columns_str + " FROM " + DbSchemaM.QuestionTable.name
+    )
+
+    _diary_columns_str = columns_str(
+        DbSchemaM.DiaryEntryTable.Cols.id,
+        DbSchemaM.DiaryEntryTable.Cols.date_added,
+        DbSchemaM.DiaryEntryTable.Cols.diary_entry,
+        DbSchemaM.DiaryEntryTable.Cols.question_ref,
+        DbSchemaM.DiaryEntryTable.Cols.local_day
+    )
+    # The content hash is updated in the same statement whenever the date, text or question is changed, and the
+    # local day whenever the date is changed.
+    # Numbered parameters (?1, ?2, etc) are used so that a value can be used twice
+    diary_insert = StatementM(
+        "INSERT INTO " + DbSchemaM.DiaryEntryTable.name + "("
+        + DbSchemaM.DiaryEntryTable.Cols.date_added + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.diary_entry + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.question_ref + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.content_hash + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.local_day
+        + ") VALUES (?1, ?2, ?3, " + CONTENT_HASH_SQL_FUNCTION_NAME_STR + "(?1, ?3, ?2), "
+        + get_local_day_sql("?1") + ")"
+    )
+    diary_update_note = StatementM(
+        "UPDATE " + DbSchemaM.DiaryEntryTable.name
+        + " SET " + DbSchemaM.DiaryEntryTable.Cols.diary_entry + " = ?1, "
+        + DbSchemaM.DiaryEntryTable.Cols.content_hash + " = " + CONTENT_HASH_SQL_FUNCTION_NAME_STR + "("
+        + DbSchemaM.DiaryEntryTable.Cols.date_added + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.question_ref + ", ?1)"
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.id + " = ?2"
+    )
+    diary_update_date = StatementM(
+        "UPDATE " + DbSchemaM.DiaryEntryTable.name
+        + " SET " + DbSchemaM.DiaryEntryTable.Cols.date_added + " = ?1, "
+        + DbSchemaM.DiaryEntryTable.Cols.local_day + " = " + get_local_day_sql("?1") + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.content_hash + " = " + CONTENT_HASH_SQL_FUNCTION_NAME_STR + "(?1, "
+        + DbSchemaM.DiaryEntryTable.Cols.question_ref + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.diary_entry + ")"
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.id + " = ?2"
+    )
+    diary_update_date_and_note = StatementM(
+        "UPDATE " + DbSchemaM.DiaryEntryTable.name
+        + " SET " + DbSchemaM.DiaryEntryTable.Cols.date_added + " = ?1, "
+        + DbSchemaM.DiaryEntryTable.Cols.local_day + " = " + get_local_day_sql("?1") + ", "
+        + DbSchemaM.DiaryEntryTable.Cols.diary_entry + " = ?2, "
+        + DbSchemaM.DiaryEntryTable.Cols.content_hash + " = " + CONTENT_HASH_SQL_FUNCTION_NAME_STR + "(?1, "
+        + DbSchemaM.DiaryEntryTable.Cols.question_ref + ", ?2)"
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.id + " = ?3"
+    )
+    diary_content_hash_exists = StatementM(
+        "SELECT EXISTS(SELECT 1 FROM " + DbSchemaM.DiaryEntryTable.name
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.content_hash + " = ?)"
+    )
+    diary_max_id = StatementM(
+        "SELECT MAX(" + DbSchemaM.DiaryEntryTable.Cols.id + ") FROM " + DbSchemaM.DiaryEntryTable.name
+    )
+    diary_remove = StatementM(
+        "DELETE FROM " + DbSchemaM.DiaryEntryTable.name
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.id + " = ?"
+    )
+    diary_get = StatementM(
+        "SELECT " + _diary_columns_str + " FROM " + DbSchemaM.DiaryEntryTable.name
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.id + " = ?"
+    )
+    # -the sort direction can't be a parameter, so there is one statement for each direction
+    diary_get_all_asc = StatementM(
+        "SELECT " + _diary_columns_str + " FROM " + DbSchemaM.DiaryEntryTable.name
+        + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.date_added + " ASC"
+    )
+    diary_get_all_desc = StatementM(
+        "SELECT " + _diary_columns_str + " FROM " + DbSchemaM.DiaryEntryTable.name
+        + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.date_added + " DESC"
+    )
+    # The day and month queries are sorted by the local day first, so that the order is the same as in the
+    # (local_day, date_added) indexes and no sorting is needed. This is the same order as by date_added, except
+    # when the time zone has changed between entries
+    _diary_question_and_day_range_str = (
+        "SELECT " + _diary_columns_str + " FROM " + DbSchemaM.DiaryEntryTable.name
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.question_ref + " = ?"
+        + " AND " + DbSchemaM.DiaryEntryTable.Cols.local_day + " >= ?"
+        + " AND " + DbSchemaM.DiaryEntryTable.Cols.local_day + " < ?"
+    )
+    diary_get_for_question_and_day_range_asc = StatementM(
+        _diary_question_and_day_range_str
+        + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.local_day + " ASC, "
+        + DbSchemaM.DiaryEntryTable.Cols.date_added + " ASC LIMIT ? OFFSET ?")
+    diary_get_for_question_and_day_range_desc = StatementM(
+        _diary_question_and_day_range_str
+        + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.local_day + " DESC, "
+        + DbSchemaM.DiaryEntryTable.Cols.date_added + " DESC LIMIT ? OFFSET ?")
+    _diary_day_str = (
+        "SELECT " + _diary_columns_str + " FROM " + DbSchemaM.DiaryEntryTable.name
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.local_day + " = ?"
+        + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.date_added
+    )
+    diary_get_for_day_asc = StatementM(_diary_day_str + " ASC")
+    diary_get_for_day_desc = StatementM(_diary_day_str + " DESC")
+    _diary_with_question_select_str = (
+        "SELECT " + columns_str(
+            *[DbSchemaM.DiaryEntryTable.name + "." + col_str for col_str in (
+                DbSchemaM.DiaryEntryTable.Cols.id,
+                DbSchemaM.DiaryEntryTable.Cols.date_added,
+                DbSchemaM.DiaryEntryTable.Cols.diary_entry,
+                DbSchemaM.DiaryEntryTable.Cols.question_ref,
+                DbSchemaM.DiaryEntryTable.Cols.local_day
+            )],
+            "IFNULL(" + DbSchemaM.QuestionTable.name + "." + DbSchemaM.QuestionTable.Cols.title + ", '')"
+        )
+        + " FROM " + DbSchemaM.DiaryEntryTable.name
+        + " LEFT JOIN " + DbSchemaM.QuestionTable.name
+        + " ON " + DbSchemaM.QuestionTable.name + "." + DbSchemaM.QuestionTable.Cols.id
+        + " = " + DbSchemaM.DiaryEntryTable.name + "." + DbSchemaM.DiaryEntryTable.Cols.question_ref
+    )
+    diary_with_question_get = StatementM(
+        _diary_with_question_select_str
+        + " WHERE " + DbSchemaM.DiaryEntryTable.name + "." + DbSchemaM.DiaryEntryTable.Cols.id + " = ?"
+    )
+    _diary_with_question_day_str = (
+        _diary_with_question_select_str
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.local_day + " = ?"
+        + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.date_added
+    )
+    diary_with_question_get_for_day_asc = StatementM(
+        _diary_with_question_day_str + " ASC LIMIT ? OFFSET ?")
+    diary_with_question_get_for_day_desc = StatementM(
+        _diary_with_question_day_str + " DESC LIMIT ? OFFSET ?")
+
+    diary_get_all_days_and_questions = StatementM(
+        "SELECT " + DbSchemaM.DiaryEntryTable.Cols.local_day + ", " + DbSchemaM.DiaryEntryTable.Cols.question_ref
+        + " FROM " + DbSchemaM.DiaryEntryTable.name
+    )
+    # -only reads the (question_ref, local_day, date_added) index, not the table
+    diary_get_day_question_counts = StatementM(
+        "SELECT " + DbSchemaM.DiaryEntryTable.Cols.local_day
+        + ", " + DbSchemaM.DiaryEntryTable.Cols.question_ref + ", COUNT(*)"
+        + " FROM " + DbSchemaM.DiaryEntryTable.name
+        + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.local_day + " >= ?"
+        + " AND " + DbSchemaM.DiaryEntryTable.Cols.local_day + " < ?"
+        + " GROUP BY " + DbSchemaM.DiaryEntryTable.Cols.local_day
+        + ", " + DbSchemaM.DiaryEntryTable.Cols.question_ref
+    )
+    diary_search = StatementM(
+        "SELECT " + columns_str(
+            *[DbSchemaM.DiaryEntryTable.name + "." + col_str for col_str in (
+                DbSchemaM.DiaryEntryTable.Cols.id,
+                DbSchemaM.DiaryEntryTable.Cols.date_added,
+                DbSchemaM.DiaryEntryTable.Cols.diary_entry,
+                DbSchemaM.DiaryEntryTable.Cols.question_ref,
+                DbSchemaM.DiaryEntryTable.Cols.local_day
+            )],
+            "snippet(" + DbSchemaM.DiaryEntryFtsTable.name + ", 0, ?, ?, ?, ?)"
+        )
+        + " FROM " + DbSchemaM.DiaryEntryFtsTable.name
+        + " JOIN " + DbSchemaM.DiaryEntryTable.name
+        + " ON " + DbSchemaM.DiaryEntryTable.name + "." + DbSchemaM.DiaryEntryTable.Cols.id
+        + " = " + DbSchemaM.DiaryEntryFtsTable.name + ".rowid"
+        + " WHERE " + DbSchemaM.DiaryEntryFtsTable.name + " MATCH ?"
+        + " AND (? IS NULL OR " + DbSchemaM.DiaryEntryTable.Cols.question_ref + " = ?)"
+        # -the question filter is optional, a NULL value matches all questions
+        + " AND " + DbSchemaM.DiaryEntryTable.Cols.date_added + " >= ?"
+        + " AND " + DbSchemaM.DiaryEntryTable.Cols.date_added + " < ?"
+        + " ORDER BY rank"
+        # -the rank is the bm25 score (best match first), and is calculated by the fts index itself
+        + " LIMIT ? OFFSET ?"
+    )
+
+    diary_export = StatementM(
+        "SELECT " + columns_str(
+            "strftime('%Y-%m-%d %H:%M:%S', " + DbSchemaM.DiaryEntryTable.name + "."
+            + DbSchemaM.DiaryEntryTable.Cols.date_added + ", 'unixepoch', 'localtime')",
+            # -the date is formatted by sqlite, so that no Python objects have to be created for this
+            "IFNULL(" + DbSchemaM.QuestionTable.name + "." + DbSchemaM.QuestionTable.Cols.title + ", '')",
+            DbSchemaM.DiaryEntryTable.name + "." + DbSchemaM.DiaryEntryTable.Cols.diary_entry
+        )
+        + " FROM " + DbSchemaM.DiaryEntryTable.name
+        + " LEFT JOIN " + DbSchemaM.QuestionTable.name
+        + " ON " + DbSchemaM.QuestionTable.name + "." + DbSchemaM.QuestionTable.Cols.id
+        + " = " + DbSchemaM.DiaryEntryTable.name + "." + DbSchemaM.DiaryEntryTable.Cols.question_ref
+        + " WHERE (? IS NULL OR " + DbSchemaM.DiaryEntryTable.Cols.question_ref + " = ?)"
+        + " AND " + DbSchemaM.DiaryEntryTable.Cols.date_added + " >= ?"
+        + " AND " + DbSchemaM.DiaryEntryTable.Cols.date_added + " < ?"
+        + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.date_added + " ASC"
+    )
+
+    _reminder_columns_str = columns_str(
+        DbSchemaM.ReminderTable.Cols.id,
+        DbSchemaM.ReminderTable.Cols.title,
+        DbSchemaM.ReminderTable.Cols.reminder,
+        DbSchemaM.ReminderTable.Cols.due_time,
+        DbSchemaM.ReminderTable.Cols.recurrence
+    )
+    reminder_insert = StatementM(
+        "INSERT INTO " + DbSchemaM.ReminderTable.name + "("
+        + DbSchemaM.ReminderTable.Cols.title + ", "
+        + DbSchemaM.ReminderTable.Cols.reminder
+        + ") VALUES (?, ?)"
+    )
+    reminder_get = StatementM(
+        "SELECT " + _reminder_columns_str + " FROM " + DbSchemaM.ReminderTable.name
+        + " WHERE " + DbSchemaM.ReminderTable.Cols.id + " = ?"
+    )
+    reminder_get_all = StatementM(
+        "SELECT " + _reminder_columns_str + " FROM " + DbSchemaM.ReminderTable.name
+    )
+    reminder_get_all_scheduled = StatementM(
+        "SELECT " + _reminder_columns_str + " FROM " + DbSchemaM.ReminderTable.name
+        + " WHERE " + DbSchemaM.ReminderTable.Cols.due_time + " IS NOT NULL"
+        + " ORDER BY " + DbSchemaM.ReminderTable.Cols.due_time
+    )
+    # -without the ORDER BY the index is not used for IS NOT NULL
+    reminder_update_schedule = StatementM(
+        "UPDATE " + DbSchemaM.ReminderTable.name
+        + " SET " + DbSchemaM.ReminderTable.Cols.due_time + " = ?, "
+        + DbSchemaM.ReminderTable.Cols.recurrence + " = ?"
+        + " WHERE " + DbSchemaM.ReminderTable.Cols.id + " = ?"
+    )
+    reminder_remove = StatementM(
+        "DELETE FROM " + DbSchemaM.ReminderTable.name
+        + " WHERE " + DbSchemaM.ReminderTable.Cols.id + " = ?"
+    )
 
 
 class QuestionM:
+    __slots__ = ("id_int", "title_str", "question_str", "archived_bl")
+
     def __init__(self, i_id: int, i_title: str, i_question: str, i_archived: bool=False) -> None:
         self.id_int = i_id
         self.title_str = i_title
@@ -161,257 +978,520 @@ class QuestionM:
         self.archived_bl = i_archived
 
     @staticmethod
-    def add(i_title_str: str, i_question_str: str) -> None:
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor.execute(
-            "INSERT INTO " + DbSchemaM.QuestionTable.name + "("
-            + DbSchemaM.QuestionTable.Cols.title + ", "
-            + DbSchemaM.QuestionTable.Cols.question
-            + ") VALUES (?, ?)", (i_title_str, i_question_str)
-        )
-        db_connection.commit()
+    def add(i_title_str: str, i_question_str: str) -> int:
+        with DbHelperM.transaction():
+            db_cursor = SqlM.question_insert.execute((i_title_str, i_question_str))
+            ChangeBusM.publish(ChangeEventM(ChangeTypeEnum.question_added, db_cursor.lastrowid))
+        return db_cursor.lastrowid
 
     @staticmethod
     def get(i_id_it):
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor_result = db_cursor.execute(
-            "SELECT * FROM " + DbSchemaM.QuestionTable.name
-            + " WHERE " + DbSchemaM.QuestionTable.Cols.id + "=" + str(i_id_it)
-        )
-        journal_db_te = db_cursor_result.fetchone()
-        db_connection.commit()
-
-        return QuestionM(*journal_db_te)
+        db_cursor_result = SqlM.question_get.execute((i_id_it,), QuestionM)
+        return db_cursor_result.fetchone()
 
     @staticmethod
     def get_all():
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor_result = db_cursor.execute(
-            "SELECT * FROM " + DbSchemaM.QuestionTable.name
-        )
-        journal_db_te_list = db_cursor_result.fetchall()
-        db_connection.commit()
-
-        return [QuestionM(*journal_db_te) for journal_db_te in journal_db_te_list]
+        db_cursor_result = SqlM.question_get_all.execute((), QuestionM)
+        return db_cursor_result.fetchall()
 
 
 class DiaryM:
-    def __init__(self, i_id, i_date_added_it, i_diary_text, i_question_ref_it):
+    __slots__ = ("id", "date_added_it", "diary_text", "question_ref_it", "local_day_it")
+    # -no per-object __dict__, which is most of the memory used by each object when loading many entries
+
+    def __init__(self, i_id, i_date_added_it, i_diary_text, i_question_ref_it, i_local_day_it):
         self.id = i_id
         self.date_added_it = i_date_added_it
         self.diary_text = i_diary_text
         self.question_ref_it = i_question_ref_it
+        self.local_day_it = i_local_day_it  # -YYYYMMDD, please see get_local_day
 
     @staticmethod
-    def add(i_date_added_it, i_diary_text, i_journal_ref_it):
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor.execute(
-            "INSERT INTO " + DbSchemaM.DiaryEntryTable.name + "("
-            + DbSchemaM.DiaryEntryTable.Cols.date_added + ", "
-            + DbSchemaM.DiaryEntryTable.Cols.diary_entry + ", "
-            + DbSchemaM.DiaryEntryTable.Cols.question_ref
-            + ") VALUES (?, ?, ?)",
-            (i_date_added_it, i_diary_text, i_journal_ref_it)
-        )
-        db_connection.commit()
+    def add(i_date_added_it, i_diary_text, i_journal_ref_it) -> int:
+        """:return: The id of the new entry"""
+        with DbHelperM.transaction():
+            db_cursor = SqlM.diary_insert.execute((i_date_added_it, i_diary_text, i_journal_ref_it))
+            ChangeBusM.publish(ChangeEventM(
+                ChangeTypeEnum.diary_entry_added, db_cursor.lastrowid, i_journal_ref_it, [i_date_added_it]))
+        return db_cursor.lastrowid
 
-        # t_diary_id = db_cursor.lastrowid
+    @staticmethod
+    def add_many(i_rows_iter, i_chunk_size_it: int=BULK_CHUNK_SIZE_IT) -> list:
+        """
+        Adds all rows in one transaction (and with one commit, unless there's an outer transaction)
+        :param i_rows_iter: Iterable of (date_added, diary_text, question_ref) tuples, can be a generator
+        :return: The ids of the new rows, in the same order as the rows were given
+        """
+        ret_id_list = []
+        date_added_set = set()
+        with DbHelperM.transaction():
+            max_id_it = SqlM.diary_max_id.execute().fetchone()[0] or 0
+            for rows_chunk_list in chunks(i_rows_iter, i_chunk_size_it):
+                db_cursor = SqlM.diary_insert.executemany(rows_chunk_list)
+                date_added_set.update(row_te[0] for row_te in rows_chunk_list)
+                # The ids are given by sqlite as MAX(id) + 1, since the id is an "INTEGER PRIMARY KEY" without
+                # "AUTOINCREMENT" (and we are inside a transaction so no one else can insert rows in between)
+                ret_id_list.extend(range(max_id_it + 1, max_id_it + 1 + db_cursor.rowcount))
+                max_id_it += db_cursor.rowcount
+            ChangeBusM.publish(ChangeEventM(ChangeTypeEnum.diary_entries_changed, i_unix_time_list=list(date_added_set)))
+        return ret_id_list
+
+    @staticmethod
+    def update_many(i_rows_iter, i_chunk_size_it: int=BULK_CHUNK_SIZE_IT) -> None:
+        """
+        :param i_rows_iter: Iterable of (id, new_date_added, new_diary_text) tuples
+        """
+        with DbHelperM.transaction():
+            for rows_chunk_list in chunks(i_rows_iter, i_chunk_size_it):
+                SqlM.diary_update_date_and_note.executemany(
+                    [(date_added_it, diary_text_str, id_it) for (id_it, date_added_it, diary_text_str) in rows_chunk_list]
+                )
+            ChangeBusM.publish(ChangeEventM(ChangeTypeEnum.diary_entries_changed))
+            # -the old dates are not known here, so the subscribers have to read all months again
+
+    @staticmethod
+    def remove_many(i_ids_iter, i_chunk_size_it: int=BULK_CHUNK_SIZE_IT) -> None:
+        with DbHelperM.transaction():
+            for ids_chunk_list in chunks(i_ids_iter, i_chunk_size_it):
+                SqlM.diary_remove.executemany([(id_it,) for id_it in ids_chunk_list])
+            ChangeBusM.publish(ChangeEventM(ChangeTypeEnum.diary_entries_changed))
+
+    @staticmethod
+    def content_hash_exists(i_content_hash_it: int) -> bool:
+        db_cursor_result = SqlM.diary_content_hash_exists.execute((i_content_hash_it,))
+        return bool(db_cursor_result.fetchone()[0])
 
     @staticmethod
     def update_note(i_id_it, i_new_text_sg):
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor.execute(
-            "UPDATE " + DbSchemaM.DiaryEntryTable.name
-            + " SET " + DbSchemaM.DiaryEntryTable.Cols.diary_entry + " = ?"
-            + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.id + " = ?",
-            (i_new_text_sg, str(i_id_it))
-        )
-        db_connection.commit()
+        with DbHelperM.transaction():
+            old_diary_entry = DiaryM.get(i_id_it)
+            SqlM.diary_update_note.execute((i_new_text_sg, i_id_it))
+            if old_diary_entry is not None:
+                ChangeBusM.publish(ChangeEventM(
+                    ChangeTypeEnum.diary_entry_text_changed, i_id_it, old_diary_entry.question_ref_it,
+                    [old_diary_entry.date_added_it]))
 
     @staticmethod
     def update_date(i_id_it, i_new_time_it):
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor.execute(
-            "UPDATE " + DbSchemaM.DiaryEntryTable.name
-            + " SET " + DbSchemaM.DiaryEntryTable.Cols.date_added + " = ?"
-            + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.id + " = ?",
-            (str(i_new_time_it), str(i_id_it))
-        )
-        db_connection.commit()
+        with DbHelperM.transaction():
+            old_diary_entry = DiaryM.get(i_id_it)
+            SqlM.diary_update_date.execute((i_new_time_it, i_id_it))
+            if old_diary_entry is not None:
+                ChangeBusM.publish(ChangeEventM(
+                    ChangeTypeEnum.diary_entry_changed, i_id_it, old_diary_entry.question_ref_it,
+                    [old_diary_entry.date_added_it, i_new_time_it]))
 
     @staticmethod
     def remove(i_id_it):
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor.execute(
-            "DELETE FROM " + DbSchemaM.DiaryEntryTable.name
-            + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.id + "=" + str(i_id_it)
-        )
-        db_connection.commit()
+        with DbHelperM.transaction():
+            old_diary_entry = DiaryM.get(i_id_it)
+            SqlM.diary_remove.execute((i_id_it,))
+            if old_diary_entry is not None:
+                ChangeBusM.publish(ChangeEventM(
+                    ChangeTypeEnum.diary_entry_removed, i_id_it, old_diary_entry.question_ref_it,
+                    [old_diary_entry.date_added_it]))
 
     @staticmethod
     def get(i_id_it):
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor_result = db_cursor.execute(
-            "SELECT * FROM " + DbSchemaM.DiaryEntryTable.name + " WHERE "
-            + DbSchemaM.DiaryEntryTable.Cols.id + "=" + str(i_id_it)
-        )
-        diary_db_te = db_cursor_result.fetchone()
-        db_connection.commit()
+        db_cursor_result = SqlM.diary_get.execute((i_id_it,), DiaryM)
+        return db_cursor_result.fetchone()
 
-        return DiaryM(*diary_db_te)
+    @staticmethod
+    def get_with_question(i_id_it):
+        """:return: DiaryWithQuestionM, or None if there is no entry with the id"""
+        db_cursor_result = SqlM.diary_with_question_get.execute((i_id_it,), DiaryWithQuestionM)
+        return db_cursor_result.fetchone()
 
     @staticmethod
     def get_all(i_reverse_bl = False):  # -TODO: Change to for just one month
-        t_direction_sg = "ASC"
+        statement = SqlM.diary_get_all_asc
         if i_reverse_bl:
-            t_direction_sg = "DESC"
-        ret_diary_list = []
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor_result = db_cursor.execute(
-            "SELECT * FROM " + DbSchemaM.DiaryEntryTable.name
-            + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.date_added + " " + t_direction_sg
-        )
-        diary_db_te_list = db_cursor_result.fetchall()
-        for diary_db_te in diary_db_te_list:
-            ret_diary_list.append(DiaryM(*diary_db_te))
-        db_connection.commit()
-        return ret_diary_list
+            statement = SqlM.diary_get_all_desc
+        db_cursor_result = statement.execute((), DiaryM)
+        return db_cursor_result.fetchall()
 
     @staticmethod
-    def get_all_for_question_and_month(i_question_id_it, i_start_of_month_as_unix_time_it,
-                                       i_number_of_days_in_month_it, i_reverse_bl=True):
-        ret_diary_list = []
-        t_direction_sg = "DESC"
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor_result = db_cursor.execute(
-            "SELECT * FROM " + DbSchemaM.DiaryEntryTable.name
-            + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.date_added + ">=" + str(i_start_of_month_as_unix_time_it)
-            + " AND " + DbSchemaM.DiaryEntryTable.Cols.date_added + "<"
-            + str(i_start_of_month_as_unix_time_it + 24 * 3600 * i_number_of_days_in_month_it)
-            + " AND " + DbSchemaM.DiaryEntryTable.Cols.question_ref + "=" + str(i_question_id_it)
-            + " ORDER BY " + DbSchemaM.DiaryEntryTable.Cols.date_added + " " + t_direction_sg
-        )
-        diary_db_te_list = db_cursor_result.fetchall()
-        for diary_db_te in diary_db_te_list:
-            ret_diary_list.append(DiaryM(*diary_db_te))
-        db_connection.commit()
-
+    def get_all_for_question_and_month(i_question_id_it, i_year_it: int, i_month_1to12_it: int, i_reverse_bl=True,
+                                       i_limit_it: int=NO_LIMIT_IT, i_offset_it: int=0):
+        """
+        :param i_limit_it, i_offset_it: For reading the entries a page at a time (please see bwb.diary)
+        """
+        # The entries are sorted newest first, and reversing this gives oldest first
+        statement = SqlM.diary_get_for_question_and_day_range_desc
         if i_reverse_bl:
-            ret_diary_list.reverse()
-        return ret_diary_list
+            statement = SqlM.diary_get_for_question_and_day_range_asc
+        (first_day_key_it, end_day_key_it) = get_month_day_key_range(i_year_it, i_month_1to12_it)
+        db_cursor_result = statement.execute((
+            i_question_id_it,
+            first_day_key_it,
+            end_day_key_it,
+            i_limit_it,
+            i_offset_it
+        ), DiaryM)
+        return db_cursor_result.fetchall()
 
     @staticmethod
     def get_all_for_active_day(i_reverse_bl=True):
-        start_of_day_datetime = datetime.datetime(
-            year=bwb.bwbglobal.active_date_qdate.year(),
-            month=bwb.bwbglobal.active_date_qdate.month(),
-            day=bwb.bwbglobal.active_date_qdate.day()
-        )
-        start_of_day_unixtime_it = int(start_of_day_datetime.timestamp())
-
-        ret_diary_list = []
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor_result = db_cursor.execute(
-            "SELECT * FROM " + DbSchemaM.DiaryEntryTable.name
-            + " WHERE " + DbSchemaM.DiaryEntryTable.Cols.date_added + ">=" + str(start_of_day_unixtime_it)
-            + " AND " + DbSchemaM.DiaryEntryTable.Cols.date_added + "<" + str(start_of_day_unixtime_it + 24 * 3600)
+        day_key_it = get_day_key(
+            bwb.bwbglobal.active_date_qdate.year(),
+            bwb.bwbglobal.active_date_qdate.month(),
+            bwb.bwbglobal.active_date_qdate.day()
         )
-        diary_db_te_list = db_cursor_result.fetchall()
-        for diary_db_te in diary_db_te_list:
-            ret_diary_list.append(DiaryM(*diary_db_te))
-        db_connection.commit()
+        # The entries are sorted oldest first, and reversing this gives newest first
+        statement = SqlM.diary_get_for_day_asc
+        if i_reverse_bl:
+            statement = SqlM.diary_get_for_day_desc
+        db_cursor_result = statement.execute((day_key_it,), DiaryM)
+        return db_cursor_result.fetchall()
 
+    @staticmethod
+    def get_all_for_day_with_questions(i_day_date: datetime.date, i_reverse_bl=True,
+                                       i_limit_it: int=NO_LIMIT_IT, i_offset_it: int=0):
+        """
+        Like get_all_for_active_day but the question title is included in each entry (please see
+        DiaryWithQuestionM), so that there is only one query for the whole day instead of one per entry
+        :param i_limit_it, i_offset_it: For reading the entries a page at a time (please see bwb.diary)
+        """
+        day_key_it = get_day_key(i_day_date.year, i_day_date.month, i_day_date.day)
+        statement = SqlM.diary_with_question_get_for_day_asc
         if i_reverse_bl:
-            ret_diary_list.reverse()
-        return ret_diary_list
+            statement = SqlM.diary_with_question_get_for_day_desc
+        db_cursor_result = statement.execute((day_key_it, i_limit_it, i_offset_it), DiaryWithQuestionM)
+        return db_cursor_result.fetchall()
+
+    @staticmethod
+    def iter_days_and_questions():
+        """
+        For the statistics (please see bwb.stats), which need only these columns but for the whole diary
+        :return: (local day, question ref) tuples for all entries, in no particular order
+        """
+        yield from SqlM.diary_get_all_days_and_questions.execute()
+
+    @staticmethod
+    def get_month_activity(i_year_it: int, i_month_1to12_it: int) -> dict:
+        """
+        Please use this function (rather than get_month_activity_from_db) since the result is cached
+        :return: Dictionary with the day keys (YYYYMMDD) of the days in the month that have entries, and
+        DayActivityM values
+        """
+        return MonthActivityCacheM.get(i_year_it, i_month_1to12_it)
+
+    @staticmethod
+    def get_month_activity_from_db(i_year_it: int, i_month_1to12_it: int) -> dict:
+        db_cursor_result = SqlM.diary_get_day_question_counts.execute(
+            get_month_day_key_range(i_year_it, i_month_1to12_it))
+        ret_day_activity_dict = {}
+        for (day_key_it, question_ref_it, entry_count_it) in db_cursor_result.fetchall():
+            if day_key_it not in ret_day_activity_dict:
+                ret_day_activity_dict[day_key_it] = DayActivityM(day_key_it)
+            ret_day_activity_dict[day_key_it].entry_count_it += entry_count_it
+            ret_day_activity_dict[day_key_it].question_count_it += 1
+        return ret_day_activity_dict
+
+    @staticmethod
+    def search(i_query_str: str, i_question_id_it: int=None, i_date_range_te=None,
+            i_limit_it: int=SEARCH_RESULT_LIMIT_IT, i_offset_it: int=0) -> list:
+        """
+        Full-text search, best matches first
+        :param i_query_str: Text as typed by the user, all words have to match (the last word can be partial)
+        :param i_question_id_it: None for all questions
+        :param i_date_range_te: (start unix time (inclusive), end unix time (exclusive)), or None for all dates
+        :return: List of DiarySearchResultM
+        """
+        fts_query_str = get_fts_query(i_query_str)
+        if not fts_query_str:
+            return []
+        (start_unix_time_it, end_unix_time_it) = (MIN_UNIX_TIME_IT, MAX_UNIX_TIME_IT)
+        if i_date_range_te is not None:
+            (start_unix_time_it, end_unix_time_it) = i_date_range_te
+        db_cursor_result = SqlM.diary_search.execute((
+            SNIPPET_START_STR, SNIPPET_END_STR, SNIPPET_ELLIPSIS_STR, SNIPPET_MAX_TOKENS_IT,
+            fts_query_str,
+            i_question_id_it, i_question_id_it,
+            start_unix_time_it, end_unix_time_it,
+            i_limit_it, i_offset_it
+        ), DiarySearchResultM)
+        return db_cursor_result.fetchall()
+
+    @staticmethod
+    def iter_for_export(i_question_id_it: int=None, i_date_range_te=None,
+            i_chunk_size_it: int=EXPORT_CHUNK_SIZE_IT):
+        """
+        Generator which reads the rows from the db a chunk at a time (so that memory use doesn't depend on the
+        size of the diary), oldest first
+        :param i_question_id_it: None for all questions
+        :param i_date_range_te: (start unix time (inclusive), end unix time (exclusive)), or None for all dates
+        :return: (date and time string (local time), question title, diary text) tuples
+        """
+        (start_unix_time_it, end_unix_time_it) = (MIN_UNIX_TIME_IT, MAX_UNIX_TIME_IT)
+        if i_date_range_te is not None:
+            (start_unix_time_it, end_unix_time_it) = i_date_range_te
+        db_cursor_result = SqlM.diary_export.execute((
+            i_question_id_it, i_question_id_it,
+            start_unix_time_it, end_unix_time_it
+        ))
+        while True:
+            export_db_te_list = db_cursor_result.fetchmany(i_chunk_size_it)
+            if not export_db_te_list:
+                return
+            yield from export_db_te_list
+
+
+class DiarySearchResultM(DiaryM):
+    __slots__ = ("snippet_str",)
+
+    def __init__(self, i_id, i_date_added_it, i_diary_text, i_question_ref_it, i_local_day_it, i_snippet_str):
+        super().__init__(i_id, i_date_added_it, i_diary_text, i_question_ref_it, i_local_day_it)
+        self.snippet_str = i_snippet_str
+        # -the matching words are surrounded by SNIPPET_START_STR and SNIPPET_END_STR
+
+
+class DiaryWithQuestionM(DiaryM):
+    __slots__ = ("question_title_str",)
+
+    def __init__(self, i_id, i_date_added_it, i_diary_text, i_question_ref_it, i_local_day_it,
+            i_question_title_str):
+        super().__init__(i_id, i_date_added_it, i_diary_text, i_question_ref_it, i_local_day_it)
+        self.question_title_str = i_question_title_str
+
+
+class DayActivityM:
+    __slots__ = ("day_key_it", "entry_count_it", "question_count_it")
+
+    def __init__(self, i_day_key_it: int, i_entry_count_it: int=0, i_question_count_it: int=0) -> None:
+        self.day_key_it = i_day_key_it
+        self.entry_count_it = i_entry_count_it
+        self.question_count_it = i_question_count_it  # -number of different questions answered during the day
+
+
+class MonthActivityCacheM:
+    """
+    LRU cache for DiaryM.get_month_activity, so that flipping back and forth between months in the calendar
+    doesn't read from the db again. The DiaryM functions that write to the db invalidate the months that they
+    change (or the whole cache if the months are not known)
+    """
+    __month_activity_odict = collections.OrderedDict()  # "Static", (year, month) -> dict of DayActivityM
+
+    @staticmethod
+    def get(i_year_it: int, i_month_1to12_it: int) -> dict:
+        month_key_te = (i_year_it, i_month_1to12_it)
+        if month_key_te in MonthActivityCacheM.__month_activity_odict:
+            MonthActivityCacheM.__month_activity_odict.move_to_end(month_key_te)
+        else:
+            MonthActivityCacheM.__month_activity_odict[month_key_te] = DiaryM.get_month_activity_from_db(
+                i_year_it, i_month_1to12_it)
+            if len(MonthActivityCacheM.__month_activity_odict) > MONTH_ACTIVITY_CACHE_SIZE_IT:
+                MonthActivityCacheM.__month_activity_odict.popitem(last=False)
+                # -removing the least recently used month
+        return MonthActivityCacheM.__month_activity_odict[month_key_te]
+
+    @staticmethod
+    def invalidate(*i_unix_times_it) -> None:
+        """Removes the months of the given times from the cache (None values are ignored)"""
+        for unix_time_it in i_unix_times_it:
+            if unix_time_it is None:
+                continue
+            local_datetime = datetime.datetime.fromtimestamp(unix_time_it)
+            MonthActivityCacheM.__month_activity_odict.pop((local_datetime.year, local_datetime.month), None)
+
+    @staticmethod
+    def clear() -> None:
+        MonthActivityCacheM.__month_activity_odict.clear()
+
+    @staticmethod
+    def on_change_event(i_change_event) -> None:
+        if i_change_event.change_type not in DIARY_ACTIVITY_CHANGE_TYPES:
+            return
+        if i_change_event.unix_time_list is None:
+            MonthActivityCacheM.clear()
+        else:
+            MonthActivityCacheM.invalidate(*i_change_event.unix_time_list)
+
+
+class ChangeTypeEnum(enum.Enum):
+    diary_entry_added = 1
+    diary_entry_changed = 2  # -the date
+    diary_entry_removed = 3
+    diary_entries_changed = 4  # -many entries have been added, changed or removed (by the bulk functions)
+    question_added = 5
+    reminder_added = 6
+    reminder_removed = 7
+    reminder_changed = 8  # -the due time or recurrence
+    diary_entry_text_changed = 9  # -only the text, so the days with entries are the same as before
+
+
+DIARY_ACTIVITY_CHANGE_TYPES = (
+    ChangeTypeEnum.diary_entry_added,
+    ChangeTypeEnum.diary_entry_changed,
+    ChangeTypeEnum.diary_entry_removed,
+    ChangeTypeEnum.diary_entries_changed
+)
+# -changes which can change the number of entries for a day (month activity, calendar and statistics)
+DIARY_CHANGE_TYPES = DIARY_ACTIVITY_CHANGE_TYPES + (ChangeTypeEnum.diary_entry_text_changed,)
+
+
+class ChangeEventM:
+    __slots__ = ("change_type", "id_it", "question_ref_it", "unix_time_list")
+
+    def __init__(self, i_change_type: ChangeTypeEnum, i_id_it: int=None, i_question_ref_it: int=None,
+            i_unix_time_list: list=None) -> None:
+        """
+        :param i_id_it: Id of the diary entry, question or reminder. None for diary_entries_changed
+        :param i_unix_time_list: For diary entries: the time of the entry (both the old and the new time when the
+        date has been changed). None if the times are not known
+        """
+        self.change_type = i_change_type
+        self.id_it = i_id_it
+        self.question_ref_it = i_question_ref_it
+        self.unix_time_list = i_unix_time_list
+
+
+class ChangeBusM:
+    """
+    The writing functions of the model classes publish a ChangeEventM for every change, and the views subscribe
+    so that they can update only what has changed (instead of being told to refresh by other widgets).
+    Events published inside a transaction are held back until the outermost transaction has been committed, and
+    are dropped if it's rolled back. The subscribers are called in the order that they subscribed, and always in
+    the main thread (events from the writer thread are passed on with the main thread delivery function)
+    """
+    __subscriber_list = []  # "Static"
+    __main_thread_delivery_function = None  # "Static"
+
+    @staticmethod
+    def subscribe(i_function) -> None:
+        """:param i_function: Is called with a ChangeEventM"""
+        ChangeBusM.__subscriber_list.append(i_function)
+
+    @staticmethod
+    def unsubscribe(i_function) -> None:
+        ChangeBusM.__subscriber_list.remove(i_function)
+
+    @staticmethod
+    def set_main_thread_delivery_function(i_function) -> None:
+        """
+        :param i_function: Is called (in another thread) with a list of ChangeEventM, and has to make sure that
+        deliver_events is called with the list in the main thread
+        """
+        ChangeBusM.__main_thread_delivery_function = i_function
+
+    @staticmethod
+    def publish(i_change_event: ChangeEventM) -> None:
+        thread_state.pending_event_list.append(i_change_event)
+        if not DbHelperM.is_in_transaction():
+            ChangeBusM.deliver_pending()
+
+    @staticmethod
+    def get_pending_count() -> int:
+        return len(thread_state.pending_event_list)
+
+    @staticmethod
+    def discard_pending(i_keep_count_it: int) -> None:
+        del thread_state.pending_event_list[i_keep_count_it:]
+
+    @staticmethod
+    def deliver_pending() -> None:
+        event_list = thread_state.pending_event_list
+        thread_state.pending_event_list = []
+        if not event_list:
+            return
+        if (threading.current_thread() is not threading.main_thread()
+                and ChangeBusM.__main_thread_delivery_function is not None):
+            ChangeBusM.__main_thread_delivery_function(event_list)
+        else:
+            ChangeBusM.deliver_events(event_list)
+
+    @staticmethod
+    def deliver_events(i_event_list) -> None:
+        for change_event in i_event_list:
+            for subscriber_function in list(ChangeBusM.__subscriber_list):
+                try:
+                    subscriber_function(change_event)
+                except Exception:
+                    logging.exception("Error when handling the change event " + change_event.change_type.name)
+                    # -the change has already been committed, so the remaining subscribers are still called
+
+
+ChangeBusM.subscribe(MonthActivityCacheM.on_change_event)
+
+
+def get_fts_query(i_user_text_str: str) -> str:
+    """
+    Turns the text typed by the user into an fts5 query. Every word is quoted so that characters which have a
+    special meaning in the fts5 query syntax (for example - or :) are searched for as ordinary text. The last word
+    is a prefix query so that results are shown while the user is still typing
+    Docs: https://www.sqlite.org/fts5.html#full_text_query_syntax
+    """
+    word_list = ['"' + word_str.replace('"', '""') + '"' for word_str in i_user_text_str.split()]
+    if word_list:
+        word_list[-1] += "*"
+    return " ".join(word_list)
 
 
 class ReminderM:
-    def __init__(self, i_id_int: int, i_title_str: str, i_reminder_str: str) -> None:
+    __slots__ = ("id_int", "title_str", "reminder_str", "due_time_it", "recurrence")
+
+    def __init__(self, i_id_int: int, i_title_str: str, i_reminder_str: str, i_due_time_it: int=None,
+            i_recurrence_it: int=RecurrenceEnum.once.value) -> None:
+        """
+        :param i_due_time_it: Unix time of the first occurrence, None if the reminder is not scheduled
+        """
         self.id_int = i_id_int
         self.title_str = i_title_str
         self.reminder_str = i_reminder_str
+        self.due_time_it = i_due_time_it
+        self.recurrence = RecurrenceEnum(i_recurrence_it)
 
     @staticmethod
     def add(i_title_str: str, i_reminder_str: str) -> None:
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor.execute(
-            "INSERT INTO " + DbSchemaM.ReminderTable.name + "("
-            + DbSchemaM.ReminderTable.Cols.title + ", "
-            + DbSchemaM.ReminderTable.Cols.reminder
-            + ") VALUES (?, ?)", (i_title_str, i_reminder_str)
-        )
-
-        db_connection.commit()
+        with DbHelperM.transaction():
+            db_cursor = SqlM.reminder_insert.execute((i_title_str, i_reminder_str))
+            ChangeBusM.publish(ChangeEventM(ChangeTypeEnum.reminder_added, db_cursor.lastrowid))
 
     @staticmethod
     def get(i_id_int: int):
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor_result = db_cursor.execute(
-            "SELECT * FROM " + DbSchemaM.ReminderTable.name
-            + " WHERE " + DbSchemaM.ReminderTable.Cols.id + "=" + str(i_id_int)
-        )
-        reminder_db_te = db_cursor_result.fetchone()
-        db_connection.commit()
-
-        return ReminderM(*reminder_db_te)
+        db_cursor_result = SqlM.reminder_get.execute((i_id_int,), ReminderM)
+        return db_cursor_result.fetchone()
 
     @staticmethod
     def get_all():
-        ret_reminder_list = []
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor_result = db_cursor.execute(
-            "SELECT * FROM " + DbSchemaM.ReminderTable.name
-        )
-        reminder_db_te_list = db_cursor_result.fetchall()
-        for diary_db_te in reminder_db_te_list:
-            ret_reminder_list.append(ReminderM(*diary_db_te))
-        db_connection.commit()
-        return ret_reminder_list
+        db_cursor_result = SqlM.reminder_get_all.execute((), ReminderM)
+        return db_cursor_result.fetchall()
 
     @staticmethod
-    def remove(i_id_int):
-        db_connection = DbHelperM.get_db_connection()
-        db_cursor = db_connection.cursor()
-        db_cursor.execute(
-            "DELETE FROM " + DbSchemaM.ReminderTable.name
-            + " WHERE " + DbSchemaM.ReminderTable.Cols.id + "=" + str(i_id_int)
-        )
-        db_connection.commit()
+    def get_all_scheduled():
+        """:return: The reminders that have a due time (including those whose due time has passed), earliest first"""
+        db_cursor_result = SqlM.reminder_get_all_scheduled.execute((), ReminderM)
+        return db_cursor_result.fetchall()
 
+    @staticmethod
+    def update_schedule(i_id_int: int, i_due_time_it: int, i_recurrence: RecurrenceEnum) -> None:
+        """:param i_due_time_it: None means that the reminder is not scheduled"""
+        with DbHelperM.transaction():
+            SqlM.reminder_update_schedule.execute((i_due_time_it, i_recurrence.value, i_id_int))
+            ChangeBusM.publish(ChangeEventM(ChangeTypeEnum.reminder_changed, i_id_int))
 
-def export_all():
-    csv_writer = csv.writer(open("exported.csv", "w"))
-    for diary_item in DiaryM.get_all():
-        time_datetime = datetime.date.fromtimestamp(diary_item.date_added_it)
-        date_str = time_datetime.strftime("%Y-%m-%d")
-        csv_writer.writerow((date_str, diary_item.diary_text))
+    @staticmethod
+    def remove(i_id_int):
+        with DbHelperM.transaction():
+            SqlM.reminder_remove.execute((i_id_int,))
+            ChangeBusM.publish(ChangeEventM(ChangeTypeEnum.reminder_removed, i_id_int))
 
 
 def backup_db_file():
+    if active_storage_profile == StorageProfileEnum.memory:
+        logging.warning("The db is only stored in memory, so there is no db file to backup")
+        return
+    db_connection = DbHelperM.get_db_connection()
+    db_connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    # -moving all changes from the WAL file into the db file, so that the copy is complete
     date_sg = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     new_file_name_sg = DATABASE_FILE_NAME + "_" + date_sg
     shutil.copyfile(DATABASE_FILE_NAME, new_file_name_sg)
     return
 
 
-def populate_db_with_test_data():
-    delta_day_it = 24 * 60 * 60
-
+def add_default_questions():
+    """The questions are added to every new db (the ids are the values of QuestionSetupEnum)"""
     QuestionM.add(
         QuestionSetupEnum.gratitude.name.capitalize(),
         "What posivite things came my way today? What did i do to water the seeds of joy in myself today?")
@@ -425,37 +1505,48 @@ def populate_db_with_test_data():
         QuestionSetupEnum.study.name.capitalize(),
         "What did i read and listen to today and learn? Professionally? Dharma?")
 
-    DiaryM.add(
-        time.time(),
-        "Dear Buddha, today i was practicing sitting meditation before meeting a friend of mine to be able to be more present during our meeting",
-        QuestionSetupEnum.practice.value)
-    DiaryM.add(
-        time.time(),
-        "Dear Buddha, i'm grateful for being able to breathe!",
-        QuestionSetupEnum.gratitude.value)
-    DiaryM.add(time.time() - delta_day_it,
-        "Most difficult today was my negative thinking, practicing with this by changing the peg from negative thoughts to positive thinking",
-        QuestionSetupEnum.practice.value)
-    DiaryM.add(
-        time.time() - 7 * delta_day_it,
-        "Grateful for having a place to live, a roof over my head, food to eat, and people to care for",
-        QuestionSetupEnum.gratitude.value)
-    DiaryM.add(
-        time.time() - 7 * delta_day_it,
-        "Grateful for the blue sky and the white clouds",
-        QuestionSetupEnum.gratitude.value)
-    DiaryM.add(
-        time.time() - 3 * delta_day_it,
-        "Dear Buddha, today i read about the four foundations of mindfulness. Some important parts: 1. Body 2. Feelings 3. Mind 4. Objects of mind",
-        QuestionSetupEnum.study.value)
-    DiaryM.add(
-        time.time() - 4 * delta_day_it,
-        "Programming and working on the application. Using Python and Qt",
-        QuestionSetupEnum.livelihood.value)
-    DiaryM.add(
-        time.time(),
-        "Lecture by Tara Brach - Namaste. Soul recognition: Seeing (1) the vulnerability in ourselves and others, (2) the goodness, and (3) the conciousness. The Story of Sir Gawain and ____",
-        QuestionSetupEnum.practice.value)
+
+def populate_db_with_test_data():
+    """Example entries and reminders, only added when populate_with_test_data_bl is set (they are stored
+    permanently in a db file)
+    """
+    delta_day_it = 24 * 60 * 60
+    now_it = int(time.time())
+
+    DiaryM.add_many([
+        (
+            now_it,
+            "Dear Buddha, today i was practicing sitting meditation before meeting a friend of mine to be able to be more present during our meeting",
+            QuestionSetupEnum.practice.value),
+        (
+            now_it,
+            "Dear Buddha, i'm grateful for being able to breathe!",
+            QuestionSetupEnum.gratitude.value),
+        (
+            now_it - delta_day_it,
+            "Most difficult today was my negative thinking, practicing with this by changing the peg from negative thoughts to positive thinking",
+            QuestionSetupEnum.practice.value),
+        (
+            now_it - 7 * delta_day_it,
+            "Grateful for having a place to live, a roof over my head, food to eat, and people to care for",
+            QuestionSetupEnum.gratitude.value),
+        (
+            now_it - 7 * delta_day_it,
+            "Grateful for the blue sky and the white clouds",
+            QuestionSetupEnum.gratitude.value),
+        (
+            now_it - 3 * delta_day_it,
+            "Dear Buddha, today i read about the four foundations of mindfulness. Some important parts: 1. Body 2. Feelings 3. Mind 4. Objects of mind",
+            QuestionSetupEnum.study.value),
+        (
+            now_it - 4 * delta_day_it,
+            "Programming and working on the application. Using Python and Qt",
+            QuestionSetupEnum.livelihood.value),
+        (
+            now_it,
+            "Lecture by Tara Brach - Namaste. Soul recognition: Seeing (1) the vulnerability in ourselves and others, (2) the goodness, and (3) the conciousness. The Story of Sir Gawain and ____",
+            QuestionSetupEnum.practice.value),
+    ])
 
     ReminderM.add("Inter-being",
         "All things in the universe inter-are, our suffering and happiness inter-is with the suffernig and happiness of others")
@@ -1,6 +1,7 @@
 
 import logging
 
+import bwb.db_writer
 import bwb.model
 from PyQt5 import QtCore
 from PyQt5 import QtWidgets
@@ -41,18 +42,21 @@ class PracticeCompositeWidget(QtWidgets.QWidget):
         hbox_l3.addWidget(self.adding_new_practice_bn)
         self.adding_new_practice_bn.clicked.connect(self.on_add_new_practice_button_pressed)
 
+        bwb.model.ChangeBusM.subscribe(self.on_model_changed)
+
+    def on_model_changed(self, i_change_event):
+        if i_change_event.change_type == bwb.model.ChangeTypeEnum.question_added:
+            self.add_question_row(bwb.model.QuestionM.get(i_change_event.id_it))
 
     def on_add_new_practice_button_pressed(self):
         text_sg = self.adding_new_practice_qle.text().strip()  # strip is needed to remove a newline at the end (why?)
         if not (text_sg and text_sg.strip()):
             return
-        bwb.model.QuestionM.add(text_sg, "long question text")
+        bwb.db_writer.writer.submit(bwb.model.QuestionM.add, text_sg, "long question text")
         self.adding_new_practice_qle.clear()
-        self.update_gui()
 
     def on_practice_new_button_pressed_signal(self, i_practice_text_sg):
-        bwb.model.QuestionM.add(i_practice_text_sg, "question unfilled")
-        self.update_gui()
+        bwb.db_writer.writer.submit(bwb.model.QuestionM.add, i_practice_text_sg, "question unfilled")
 
     def on_current_row_changed(self):
         self.current_row_changed_signal.emit(self.list_widget.currentRow())
@@ -70,37 +74,37 @@ class PracticeCompositeWidget(QtWidgets.QWidget):
 
     def update_gui(self):
         self.list_widget.clear()
-        counter = 0
         for question_item in bwb.model.QuestionM.get_all():
-            # Important: "Alternatively, if you want the widget to have a fixed size based on its contents,
-            # you can call QLayout::setSizeConstraint(QLayout::SetFixedSize);"
-            # https://doc.qt.io/qt-5/qwidget.html#setSizePolicy-1
+            self.add_question_row(question_item)
 
-            row_i6 = QtWidgets.QListWidgetItem()
-            row_layout_l7 = QtWidgets.QVBoxLayout()
+    def add_question_row(self, i_question_item):
+        # Important: "Alternatively, if you want the widget to have a fixed size based on its contents,
+        # you can call QLayout::setSizeConstraint(QLayout::SetFixedSize);"
+        # https://doc.qt.io/qt-5/qwidget.html#setSizePolicy-1
 
-            row_label_w8 = QtWidgets.QLabel(question_item.title_str)
+        row_i6 = QtWidgets.QListWidgetItem()
+        row_layout_l7 = QtWidgets.QVBoxLayout()
 
-            row_label_w8.adjustSize()
-            row_layout_l7.addWidget(row_label_w8)
-            row_layout_l7.setContentsMargins(0, 3, 0, 3)
-            row_layout_l7.setSpacing(2)
+        row_label_w8 = QtWidgets.QLabel(i_question_item.title_str)
 
-            row_w6 = QtWidgets.QWidget()
-            row_w6.setLayout(row_layout_l7)
-            row_w6.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Minimum)
-            row_w6.adjustSize()
+        row_label_w8.adjustSize()
+        row_layout_l7.addWidget(row_label_w8)
+        row_layout_l7.setContentsMargins(0, 3, 0, 3)
+        row_layout_l7.setSpacing(2)
 
-            row_i6.setData(QtCore.Qt.UserRole, question_item.id_int)
+        row_w6 = QtWidgets.QWidget()
+        row_w6.setLayout(row_layout_l7)
+        row_w6.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Minimum)
+        row_w6.adjustSize()
 
-            #my_size = QtCore.QSize(-1, row_w6.height())
+        row_i6.setData(QtCore.Qt.UserRole, i_question_item.id_int)
 
-            row_i6.setSizeHint(row_w6.sizeHint())
-            # - Please note: If we set the size hint to (-1, height) we will get overflow towards the bottom
-            self.list_widget.addItem(row_i6)
-            self.list_widget.setItemWidget(row_i6, row_w6)
+        #my_size = QtCore.QSize(-1, row_w6.height())
 
-            counter += 1
+        row_i6.setSizeHint(row_w6.sizeHint())
+        # - Please note: If we set the size hint to (-1, height) we will get overflow towards the bottom
+        self.list_widget.addItem(row_i6)
+        self.list_widget.setItemWidget(row_i6, row_w6)
 
     def get_selected_id_list(self, i_curr_item=None):
         obs_selected_item_list = self.list_widget.selectedItems()
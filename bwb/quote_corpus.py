@@ -0,0 +1,144 @@
+import logging
+import mmap
+import os
+import struct
+
+"""
+Module comments:
+The quotes are stored in a text file in the "fortune" format (each quote on one or more lines, with a line
+containing only "%" between the quotes), so that more quotes can be added without changing the code.
+
+Next to the quotes file there is an index file with the start and end byte offset of each quote. Both files are
+memory-mapped, so reading a quote only touches the pages of the index entry and of the quote itself, and opening
+the corpus takes the same time no matter how many quotes there are. The index is built (by reading the quotes
+file once) when it's missing or when the quotes file has changed, and can also be built in advance with
+tools/build_quotes_index.py
+"""
+
+QUOTES_FILE_PATH_STR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quotes.txt")
+INDEX_FILE_SUFFIX_STR = ".idx"
+QUOTE_SEPARATOR_BYTES = b"%"
+INDEX_MAGIC_BYTES = b"BWBQ"
+INDEX_VERSION_IT = 1
+INDEX_HEADER_STRUCT = struct.Struct("<4sIIQQ")
+# -magic, version, number of quotes, and the size and modification time (ns) of the quotes file that was indexed
+INDEX_ENTRY_STRUCT = struct.Struct("<II")  # -start and end byte offsets of a quote in the quotes file
+
+
+def get_index_file_path(i_quotes_file_path_str: str) -> str:
+    return i_quotes_file_path_str + INDEX_FILE_SUFFIX_STR
+
+
+def build_index(i_quotes_file_path_str: str) -> bytes:
+    """
+    :return: The contents of the index file (please see INDEX_HEADER_STRUCT and INDEX_ENTRY_STRUCT). Quotes that
+    only contain whitespace are not included
+    """
+    quotes_file_stat = os.stat(i_quotes_file_path_str)
+    entry_bytes_list = []
+    with open(i_quotes_file_path_str, "rb") as quotes_file:
+        start_offset_it = 0
+        offset_it = 0
+        has_text_bl = False
+        for line_bytes in quotes_file:
+            if line_bytes.rstrip(b"\r\n") == QUOTE_SEPARATOR_BYTES:
+                if has_text_bl:
+                    entry_bytes_list.append(INDEX_ENTRY_STRUCT.pack(start_offset_it, offset_it))
+                start_offset_it = offset_it + len(line_bytes)
+                has_text_bl = False
+            elif line_bytes.strip():
+                has_text_bl = True
+            offset_it += len(line_bytes)
+        if has_text_bl:
+            entry_bytes_list.append(INDEX_ENTRY_STRUCT.pack(start_offset_it, offset_it))
+    header_bytes = INDEX_HEADER_STRUCT.pack(
+        INDEX_MAGIC_BYTES, INDEX_VERSION_IT, len(entry_bytes_list),
+        quotes_file_stat.st_size, quotes_file_stat.st_mtime_ns)
+    return header_bytes + b"".join(entry_bytes_list)
+
+
+def write_index(i_quotes_file_path_str: str) -> int:
+    """
+    The index is written to a temporary file which then replaces the old index, so that a reader never sees a
+    partly written index
+    :return: The number of quotes
+    """
+    index_bytes = build_index(i_quotes_file_path_str)
+    index_file_path_str = get_index_file_path(i_quotes_file_path_str)
+    temp_file_path_str = index_file_path_str + ".tmp"
+    with open(temp_file_path_str, "wb") as index_file:
+        index_file.write(index_bytes)
+    os.replace(temp_file_path_str, index_file_path_str)
+    return INDEX_HEADER_STRUCT.unpack_from(index_bytes)[2]
+
+
+class QuoteCorpusM:
+    def __init__(self, i_quotes_file_path_str: str=QUOTES_FILE_PATH_STR) -> None:
+        self.quotes_file_path_str = i_quotes_file_path_str
+        self.quotes_mmap = None
+        self.index_buffer = b""  # -a mmap of the index file, or the index bytes if the file could not be written
+        self.quote_count_it = 0
+        self.open()
+
+    def open(self) -> None:
+        if not os.path.isfile(self.quotes_file_path_str):
+            logging.warning("The quotes file " + self.quotes_file_path_str + " was not found")
+            return
+        if not self.open_index():
+            logging.info("Building the index for " + self.quotes_file_path_str)
+            try:
+                write_index(self.quotes_file_path_str)
+            except OSError as os_error:
+                logging.warning("Could not write the quotes index, using it from memory: " + str(os_error))
+                self.index_buffer = build_index(self.quotes_file_path_str)
+                self.quote_count_it = INDEX_HEADER_STRUCT.unpack_from(self.index_buffer)[2]
+            else:
+                self.open_index()
+        if os.path.getsize(self.quotes_file_path_str) > 0:
+            # -an empty file can't be memory-mapped
+            with open(self.quotes_file_path_str, "rb") as quotes_file:
+                self.quotes_mmap = mmap.mmap(quotes_file.fileno(), 0, access=mmap.ACCESS_READ)
+                # -the mapping stays valid after the file has been closed
+
+    def open_index(self) -> bool:
+        """:return: False if the index file is missing or doesn't match the quotes file"""
+        index_file_path_str = get_index_file_path(self.quotes_file_path_str)
+        if not os.path.isfile(index_file_path_str):
+            return False
+        with open(index_file_path_str, "rb") as index_file:
+            index_size_it = os.fstat(index_file.fileno()).st_size
+            if index_size_it < INDEX_HEADER_STRUCT.size:
+                return False
+            index_mmap = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic_bytes, version_it, quote_count_it, quotes_file_size_it, quotes_file_mtime_ns_it) = (
+            INDEX_HEADER_STRUCT.unpack_from(index_mmap))
+        quotes_file_stat = os.stat(self.quotes_file_path_str)
+        if (magic_bytes != INDEX_MAGIC_BYTES or version_it != INDEX_VERSION_IT
+                or quotes_file_size_it != quotes_file_stat.st_size
+                or quotes_file_mtime_ns_it != quotes_file_stat.st_mtime_ns
+                or index_size_it != INDEX_HEADER_STRUCT.size + quote_count_it * INDEX_ENTRY_STRUCT.size):
+            index_mmap.close()
+            return False
+        self.index_buffer = index_mmap
+        self.quote_count_it = quote_count_it
+        return True
+
+    def get_quote_count(self) -> int:
+        return self.quote_count_it
+
+    def get_quote(self, i_quote_number_it: int) -> str:
+        """:param i_quote_number_it: From 0 to get_quote_count() - 1"""
+        if not 0 <= i_quote_number_it < self.quote_count_it:
+            raise IndexError("Quote number out of range: " + str(i_quote_number_it))
+        (start_offset_it, end_offset_it) = INDEX_ENTRY_STRUCT.unpack_from(
+            self.index_buffer, INDEX_HEADER_STRUCT.size + i_quote_number_it * INDEX_ENTRY_STRUCT.size)
+        return self.quotes_mmap[start_offset_it:end_offset_it].decode("utf-8").strip()
+
+    def close(self) -> None:
+        if self.quotes_mmap is not None:
+            self.quotes_mmap.close()
+            self.quotes_mmap = None
+        if isinstance(self.index_buffer, mmap.mmap):
+            self.index_buffer.close()
+        self.index_buffer = b""
+        self.quote_count_it = 0
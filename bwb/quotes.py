@@ -4,33 +4,17 @@ from PyQt5 import QtCore
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 
-import bwb.model
+import bwb.quote_corpus
 
 
 class CompositeQuotesWidget(QtWidgets.QWidget):
 
-    quote_number_int = 0
-    quotes_strlist = []
-
     def __init__(self):
         super().__init__()
 
-        self.quotes_strlist.append("""
-The mind is the basis for everything.
-Everything is created by my mind, and is ruled by my mind.
-When I speak or act with impure thoughts, suffering follows me
-As the wheel of the cart follows the hoof of the ox.""")
-        self.quotes_strlist.append("""
-The mind is the basis for everything.
-Everything is created by my mind, and is ruled by my mind.
-When I speak or act with a clear awareness, happiness stays with me.
-Like my own shadow, it is unshakeable.""")
-        self.quotes_strlist.append("""
-\"I was wronged! I was hurt! I was defeated! I was robbed!\"
-If I cultivate such thought, I will not be free from hatred.""")
-        self.quotes_strlist.append("""
-\"I was wronged! I was hurt! I was defeated! I was robbed!\"
-If I turn away from such thoughts, I may find peace.""")
+        self.quote_number_int = 0
+        self.quote_corpus = bwb.quote_corpus.QuoteCorpusM()
+        # -the quotes are read from a file, one at a time (please see bwb.quote_corpus)
 
         vbox_ql2 = QtWidgets.QVBoxLayout()
         self.setLayout(vbox_ql2)
@@ -63,15 +47,20 @@ If I turn away from such thoughts, I may find peace.""")
         self.update_gui()
 
     def on_random_button_clicked(self):
-        self.quote_number_int = random.randint(0, len(self.quotes_strlist) - 1)
+        if self.quote_corpus.get_quote_count() == 0:
+            return
+        self.quote_number_int = random.randrange(self.quote_corpus.get_quote_count())
         self.update_gui()
 
     def on_next_button_clicked(self):
-        if self.quote_number_int >= len(self.quotes_strlist) - 1:
+        if self.quote_number_int >= self.quote_corpus.get_quote_count() - 1:
             return
         self.quote_number_int += 1
         self.update_gui()
 
     def update_gui(self):
-        self.quotes_label.setText(self.quotes_strlist[self.quote_number_int])
+        if self.quote_corpus.get_quote_count() == 0:
+            self.quotes_label.setText("")
+            return
+        self.quotes_label.setText(self.quote_corpus.get_quote(self.quote_number_int))
         ###self.adjustSize()
@@ -0,0 +1,189 @@
+import datetime
+import heapq
+import logging
+import time
+
+from PyQt5 import QtCore
+
+import bwb.db_writer
+import bwb.model
+
+"""
+Module comments:
+Scheduling of the reminders that have a due time (please see bwb.model.ReminderM). The next occurrence of every
+scheduled reminder is kept in one min-heap, and a single QTimer in the gui thread is started for the earliest
+one, so any number of reminders costs one timer and no threads. When the timer fires, all the reminders that are
+due (within COALESCE_SECONDS_IT) are popped and sent together in one reminders_due_signal, and the recurring ones
+are pushed back with their next occurrence.
+
+When a reminder is changed or removed its old heap entry is not searched for, instead the current occurrence of
+each reminder is kept in a dictionary and heap entries which don't match it are skipped when they are popped
+("lazy deletion")
+
+A reminder that is shown once has its due time removed in the db, so that it's not shown again. If the due time of
+such a reminder passed while the application was closed, it's shown when the scheduler is started. Recurring
+reminders are not shown for the occurrences that were missed while the application was closed, they continue
+with the next occurrence
+"""
+
+COALESCE_SECONDS_IT = 1  # -reminders due this close to each other are shown together
+MAX_TIMER_INTERVAL_MS_IT = 60 * 60 * 1000
+# -the timer is restarted at least this often, so that a changed system clock (or a suspended computer) doesn't
+# delay the reminders for long. It also keeps the interval well within the range of QTimer (a signed 32 bit int)
+RECURRENCE_DAYS_DICT = {
+    bwb.model.RecurrenceEnum.daily: 1,
+    bwb.model.RecurrenceEnum.weekly: 7,
+}
+
+
+def unschedule_reminders(i_reminder_id_list: list) -> None:
+    """Run by the db writer (please see bwb.db_writer)"""
+    with bwb.model.DbHelperM.transaction():
+        for reminder_id_it in i_reminder_id_list:
+            bwb.model.ReminderM.update_schedule(reminder_id_it, None, bwb.model.RecurrenceEnum.once)
+
+
+def get_next_occurrence(i_due_time_it: int, i_recurrence: bwb.model.RecurrenceEnum, i_after_time_it: int):
+    """
+    Recurring reminders are repeated at the same local time of day (also over DST changes)
+    :param i_due_time_it: The first occurrence
+    :return: Unix time of the first occurrence after i_after_time_it, None if there is no such occurrence
+    """
+    if i_due_time_it > i_after_time_it:
+        return i_due_time_it
+    if i_recurrence == bwb.model.RecurrenceEnum.once:
+        return None
+    interval_days_it = RECURRENCE_DAYS_DICT[i_recurrence]
+    first_datetime = datetime.datetime.fromtimestamp(i_due_time_it)
+    nr_of_intervals_it = (i_after_time_it - i_due_time_it) // (interval_days_it * 24 * 3600)
+    # -can be one interval too few because of DST changes, which is handled below
+    while True:
+        next_datetime = first_datetime + datetime.timedelta(days=nr_of_intervals_it * interval_days_it)
+        next_time_it = int(next_datetime.timestamp())
+        if next_time_it > i_after_time_it:
+            return next_time_it
+        nr_of_intervals_it += 1
+
+
+class ReminderScheduler(QtCore.QObject):
+    reminders_due_signal = QtCore.pyqtSignal(list)
+    # -the ids of the reminders that are due, in the order they became due
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.occurrence_heap = []  # -(unix time, reminder id) tuples
+        self.occurrence_dict = {}  # -reminder id -> unix time of the next occurrence, please see module comments
+        self.reminder_dict = {}  # -reminder id -> (first due time, RecurrenceEnum)
+        self.timer = None  # -created in start, after the QApplication has been created
+        self.started_bl = False
+
+    def start(self) -> None:
+        """Reads the scheduled reminders from the db (one query) and starts the timer"""
+        if self.timer is None:
+            self.timer = QtCore.QTimer(self)
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self.on_timeout)
+            bwb.model.ChangeBusM.subscribe(self.on_model_changed)
+        self.started_bl = True
+        self.occurrence_heap = []
+        self.occurrence_dict = {}
+        self.reminder_dict = {}
+        now_it = int(time.time())
+        overdue_id_list = []
+        for reminder in bwb.model.ReminderM.get_all_scheduled():
+            next_time_it = self.set_reminder(reminder.id_int, reminder.due_time_it, reminder.recurrence, now_it)
+            if next_time_it is not None:
+                self.occurrence_heap.append((next_time_it, reminder.id_int))
+            elif reminder.recurrence == bwb.model.RecurrenceEnum.once:
+                overdue_id_list.append(reminder.id_int)
+        heapq.heapify(self.occurrence_heap)
+        logging.debug("Reminders scheduled: " + str(len(self.occurrence_dict)))
+        self.restart_timer()
+        if overdue_id_list:
+            logging.debug("Reminders overdue: " + str(overdue_id_list))
+            bwb.db_writer.writer.submit(unschedule_reminders, overdue_id_list)
+            self.reminders_due_signal.emit(overdue_id_list)
+
+    def stop(self) -> None:
+        self.started_bl = False
+        if self.timer is not None:
+            self.timer.stop()
+
+    def set_reminder(self, i_id_it: int, i_due_time_it: int, i_recurrence: bwb.model.RecurrenceEnum,
+            i_now_it: int):
+        """
+        Please note that the caller has to add the occurrence to the heap
+        :param i_due_time_it: None means that the reminder is no longer scheduled
+        :return: Unix time of the next occurrence, None if there is none
+        """
+        self.occurrence_dict.pop(i_id_it, None)
+        self.reminder_dict.pop(i_id_it, None)
+        if i_due_time_it is None:
+            return None
+        ret_next_time_it = get_next_occurrence(i_due_time_it, i_recurrence, i_now_it)
+        if ret_next_time_it is not None:
+            self.reminder_dict[i_id_it] = (i_due_time_it, i_recurrence)
+            self.occurrence_dict[i_id_it] = ret_next_time_it
+        return ret_next_time_it
+
+    def on_model_changed(self, i_change_event):
+        if not self.started_bl:
+            return
+        change_type = i_change_event.change_type
+        if change_type == bwb.model.ChangeTypeEnum.reminder_removed:
+            self.set_reminder(i_change_event.id_it, None, None, 0)
+        elif change_type in (bwb.model.ChangeTypeEnum.reminder_added, bwb.model.ChangeTypeEnum.reminder_changed):
+            reminder = bwb.model.ReminderM.get(i_change_event.id_it)
+            old_next_time_it = self.occurrence_dict.get(reminder.id_int)
+            next_time_it = self.set_reminder(
+                reminder.id_int, reminder.due_time_it, reminder.recurrence, int(time.time()))
+            if next_time_it is not None and next_time_it != old_next_time_it:
+                # -if the occurrence is the same the entry that is already in the heap is used
+                heapq.heappush(self.occurrence_heap, (next_time_it, reminder.id_int))
+        else:
+            return
+        self.restart_timer()
+
+    def pop_stale_entries(self) -> None:
+        while self.occurrence_heap:
+            (time_it, id_it) = self.occurrence_heap[0]
+            if self.occurrence_dict.get(id_it) == time_it:
+                return
+            heapq.heappop(self.occurrence_heap)
+
+    def restart_timer(self) -> None:
+        self.pop_stale_entries()
+        if not self.occurrence_heap:
+            self.timer.stop()
+            return
+        wait_ms_it = (self.occurrence_heap[0][0] - time.time()) * 1000
+        self.timer.start(max(0, min(int(wait_ms_it), MAX_TIMER_INTERVAL_MS_IT)))
+
+    def on_timeout(self) -> None:
+        now_it = int(time.time())
+        due_id_list = []
+        shown_once_id_list = []
+        while True:
+            self.pop_stale_entries()
+            if not self.occurrence_heap or self.occurrence_heap[0][0] > now_it + COALESCE_SECONDS_IT:
+                break
+            (time_it, id_it) = heapq.heappop(self.occurrence_heap)
+            due_id_list.append(id_it)
+            (first_due_time_it, recurrence) = self.reminder_dict[id_it]
+            next_time_it = get_next_occurrence(first_due_time_it, recurrence, max(now_it, time_it))
+            if next_time_it is None:
+                del self.occurrence_dict[id_it]
+                del self.reminder_dict[id_it]
+                shown_once_id_list.append(id_it)
+            else:
+                self.occurrence_dict[id_it] = next_time_it
+                heapq.heappush(self.occurrence_heap, (next_time_it, id_it))
+        if shown_once_id_list:
+            bwb.db_writer.writer.submit(unschedule_reminders, shown_once_id_list)
+        if due_id_list:
+            logging.debug("Reminders due: " + str(due_id_list))
+            self.reminders_due_signal.emit(due_id_list)
+        self.restart_timer()
+
+
+reminder_scheduler = ReminderScheduler()
@@ -4,9 +4,11 @@ from PyQt5 import QtCore
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 
+import bwb.db_writer
 import bwb.model
 
 NO_ENTRY_CLICKED_INT = -1
+NOT_SCHEDULED_STR = "Off"
 
 
 class CompositeRemindersWidget(QtWidgets.QWidget):
@@ -15,6 +17,7 @@ class CompositeRemindersWidget(QtWidgets.QWidget):
         super().__init__()
 
         self.last_entry_clicked_id_int = NO_ENTRY_CLICKED_INT
+        self.current_reminder_id_int = NO_ENTRY_CLICKED_INT
 
         vbox = QtWidgets.QVBoxLayout()
         self.setLayout(vbox)
@@ -37,10 +40,41 @@ class CompositeRemindersWidget(QtWidgets.QWidget):
         self.reminder_details_qll.setWordWrap(True)
         self.reminder_details_qll.setTextFormat(QtCore.Qt.RichText)
 
+        # ..due time and recurrence (please see bwb.reminder_scheduler)
+        schedule_hbox_l3 = QtWidgets.QHBoxLayout()
+        vbox.addLayout(schedule_hbox_l3)
+        self.due_time_qdte = QtWidgets.QDateTimeEdit()
+        self.due_time_qdte.setCalendarPopup(True)
+        self.due_time_qdte.setDisplayFormat("yyyy-MM-dd HH:mm")
+        schedule_hbox_l3.addWidget(self.due_time_qdte)
+        self.recurrence_qcb = QtWidgets.QComboBox()
+        self.recurrence_qcb.addItem(NOT_SCHEDULED_STR, None)
+        for recurrence in bwb.model.RecurrenceEnum:
+            self.recurrence_qcb.addItem(recurrence.name.capitalize(), recurrence)
+        schedule_hbox_l3.addWidget(self.recurrence_qcb)
+        self.set_schedule_qpb = QtWidgets.QPushButton("Set")
+        schedule_hbox_l3.addWidget(self.set_schedule_qpb)
+        self.set_schedule_qpb.clicked.connect(self.on_set_schedule_button_pressed)
+
         self.update_gui()
 
         self.reminder_list_qlw.setCurrentRow(0)
 
+        bwb.model.ChangeBusM.subscribe(self.on_model_changed)
+
+    def on_model_changed(self, i_change_event):
+        if i_change_event.change_type == bwb.model.ChangeTypeEnum.reminder_added:
+            self.add_reminder_row(bwb.model.ReminderM.get(i_change_event.id_it))
+        elif i_change_event.change_type == bwb.model.ChangeTypeEnum.reminder_changed:
+            if i_change_event.id_it == self.current_reminder_id_int:
+                self.on_current_row_changed()
+        elif i_change_event.change_type == bwb.model.ChangeTypeEnum.reminder_removed:
+            for row_int in range(self.reminder_list_qlw.count()):
+                customqlabel_widget = self.reminder_list_qlw.itemWidget(self.reminder_list_qlw.item(row_int))
+                if customqlabel_widget.diary_entry_id == i_change_event.id_it:
+                    self.reminder_list_qlw.takeItem(row_int)
+                    break
+
     def on_current_row_changed(self):
         current_row_int = self.reminder_list_qlw.currentRow()
         if current_row_int != -1:
@@ -48,13 +82,32 @@ class CompositeRemindersWidget(QtWidgets.QWidget):
             customqlabel_widget = self.reminder_list_qlw.itemWidget(current_reminder_qli)
             ###reminder_id_int = current_reminder_qli.data(QtCore.Qt.UserRole)
             reminderm = bwb.model.ReminderM.get(customqlabel_widget.diary_entry_id)
+            self.current_reminder_id_int = reminderm.id_int
             self.reminder_details_qll.setText("<big>" + reminderm.reminder_str + "</big>")
             # "<b>bold text</b> <i>italics</i> normal text <h2>h2 title text</h2>"
+            if reminderm.due_time_it is None:
+                self.due_time_qdte.setDateTime(QtCore.QDateTime.currentDateTime())
+                self.recurrence_qcb.setCurrentIndex(0)
+            else:
+                self.due_time_qdte.setDateTime(QtCore.QDateTime.fromSecsSinceEpoch(reminderm.due_time_it))
+                self.recurrence_qcb.setCurrentIndex(self.recurrence_qcb.findData(reminderm.recurrence))
+
+    def on_set_schedule_button_pressed(self):
+        if self.current_reminder_id_int == NO_ENTRY_CLICKED_INT:
+            return
+        recurrence = self.recurrence_qcb.currentData()
+        due_time_it = None
+        if recurrence is None:
+            recurrence = bwb.model.RecurrenceEnum.once
+        else:
+            due_time_it = self.due_time_qdte.dateTime().toSecsSinceEpoch() // 60 * 60
+            # -the seconds are not shown, so they are set to zero
+        bwb.db_writer.writer.submit(
+            bwb.model.ReminderM.update_schedule, self.current_reminder_id_int, due_time_it, recurrence)
 
     def on_add_new_reminder_button_pressed(self):
-        bwb.model.ReminderM.add(self.adding_new_reminder_qle.text(), "-")
+        bwb.db_writer.writer.submit(bwb.model.ReminderM.add, self.adding_new_reminder_qle.text(), "-")
         self.adding_new_reminder_qle.clear()
-        self.update_gui()
         ## self.reminder_list_qlw.setCurrentRow()
 
     # noinspection PyUnresolvedReferences
@@ -80,8 +133,7 @@ class CompositeRemindersWidget(QtWidgets.QWidget):
             self, "Remove entry?", "Are you sure that you want to remove this entry?"
         )
         if message_box_reply == QtWidgets.QMessageBox.Yes:
-            bwb.model.ReminderM.remove(int(self.last_entry_clicked_id_int))
-            self.update_gui()
+            bwb.db_writer.writer.submit(bwb.model.ReminderM.remove, int(self.last_entry_clicked_id_int))
             ### self.context_menu_delete_signal.emit()
 
     # The same function is used for all the "rows"
@@ -93,15 +145,18 @@ class CompositeRemindersWidget(QtWidgets.QWidget):
     def update_gui(self):
         self.reminder_list_qlw.clear()
         for reminder in bwb.model.ReminderM.get_all():
-            row_item = QtWidgets.QListWidgetItem()
-            ##row_item = CustomQListWidgetItem()
-            reminder_title_qll = CustomQLabel(reminder.title_str, reminder.id_int)
-            ##reminder_title_qll = QtWidgets.QLabel(reminder.title_str)
-            reminder_title_qll.mouse_pressed_signal.connect(self.on_list_row_label_mouse_pressed)
-            ##row_item.mouse_pressed_signal.connect(self.on_list_row_label_mouse_pressed)
-            self.reminder_list_qlw.addItem(row_item)
-            self.reminder_list_qlw.setItemWidget(row_item, reminder_title_qll)
-            ### row_item.setData(QtCore.Qt.UserRole, reminder.id_int)
+            self.add_reminder_row(reminder)
+
+    def add_reminder_row(self, i_reminder):
+        row_item = QtWidgets.QListWidgetItem()
+        ##row_item = CustomQListWidgetItem()
+        reminder_title_qll = CustomQLabel(i_reminder.title_str, i_reminder.id_int)
+        ##reminder_title_qll = QtWidgets.QLabel(reminder.title_str)
+        reminder_title_qll.mouse_pressed_signal.connect(self.on_list_row_label_mouse_pressed)
+        ##row_item.mouse_pressed_signal.connect(self.on_list_row_label_mouse_pressed)
+        self.reminder_list_qlw.addItem(row_item)
+        self.reminder_list_qlw.setItemWidget(row_item, reminder_title_qll)
+        ### row_item.setData(QtCore.Qt.UserRole, reminder.id_int)
 
 
 class CustomQLabel(QtWidgets.QLabel):
@@ -0,0 +1,250 @@
+import datetime
+import itertools
+
+import numpy
+from PyQt5 import QtCore
+from PyQt5 import QtWidgets
+
+import bwb.invalidation
+import bwb.model
+
+"""
+Module comments:
+Practice statistics for each question (streaks, entries per week, weekday distribution, gaps) over the whole
+diary. The local day and question of every entry are read with one query into NumPy arrays (please see
+StatsCacheM), and the statistics are calculated with array operations, so that the time doesn't grow with a
+Python loop over the entries. The only loop is over the questions.
+
+Days are counted as "day numbers" (days since 1970-01-01), which are calculated from the local day keys
+(YYYYMMDD) that are stored in the db, so there is no time zone arithmetic here.
+
+NumPy is only needed for this module (the window doesn't show the statistics if it's not installed)
+"""
+
+ALL_QUESTIONS_ID_IT = 0  # -key in the stats dictionary for the statistics over all questions
+EPOCH_DATE = datetime.date(1970, 1, 1)
+EPOCH_WEEKDAY_IT = 3  # -1970-01-01 was a Thursday (Monday is 0, like in datetime.date.weekday)
+DAYS_PER_WEEK_IT = 7
+WEEKDAY_NAMES_TE = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+class QuestionStatsM:
+    __slots__ = (
+        "question_id_it", "entry_count_it", "active_day_count_it", "current_streak_it", "longest_streak_it",
+        "entries_per_week_ft", "days_since_last_entry_it", "longest_gap_it", "weekday_count_list"
+    )
+
+    def __init__(self, i_question_id_it: int) -> None:
+        self.question_id_it = i_question_id_it
+        self.entry_count_it = 0
+        self.active_day_count_it = 0  # -number of days with at least one entry
+        self.current_streak_it = 0  # -please see calculate_question_stats
+        self.longest_streak_it = 0
+        self.entries_per_week_ft = 0.0  # -from the first entry until today
+        self.days_since_last_entry_it = None  # -None if there are no entries
+        self.longest_gap_it = 0  # -the largest number of days in a row without entries, between two entries
+        self.weekday_count_list = [0] * DAYS_PER_WEEK_IT  # -number of entries for each weekday, Monday first
+
+
+def get_day_number(i_date: datetime.date) -> int:
+    return (i_date - EPOCH_DATE).days
+
+
+def day_keys_to_day_numbers(i_day_keys_array):
+    """Converts an array of YYYYMMDD day keys to days since 1970-01-01"""
+    years_array = i_day_keys_array // 10000
+    months_array = i_day_keys_array // 100 % 100
+    days_array = i_day_keys_array % 100
+    month_starts_array = ((years_array - 1970) * 12 + months_array - 1).astype("datetime64[M]")
+    # -an integer converted to datetime64[M] is the number of months since 1970-01
+    day_dates_array = month_starts_array.astype("datetime64[D]") + (days_array - 1).astype("timedelta64[D]")
+    return day_dates_array.astype(numpy.int64)
+
+
+def calculate_question_stats(i_question_id_it: int, i_sorted_day_numbers_array, i_today_it: int) -> QuestionStatsM:
+    """
+    :param i_sorted_day_numbers_array: The day (please see get_day_number) of each entry, sorted
+    The current streak is the number of days in a row with entries up until today. It continues to be current
+    if there is no entry yet today but there was one yesterday
+    """
+    ret_question_stats = QuestionStatsM(i_question_id_it)
+    if i_sorted_day_numbers_array.size == 0:
+        return ret_question_stats
+    unique_days_array = i_sorted_day_numbers_array[numpy.concatenate(
+        ([True], i_sorted_day_numbers_array[1:] != i_sorted_day_numbers_array[:-1]))]
+    # -numpy.unique is not used since it sorts (or hashes) the array again
+    gaps_array = numpy.diff(unique_days_array)
+    break_indexes_array = numpy.flatnonzero(gaps_array != 1)
+    # -the streaks (runs of days in a row) end at these indexes
+    run_starts_array = numpy.concatenate(([0], break_indexes_array + 1))
+    run_ends_array = numpy.concatenate((break_indexes_array, [unique_days_array.size - 1]))
+    run_lengths_array = run_ends_array - run_starts_array + 1
+
+    ret_question_stats.entry_count_it = int(i_sorted_day_numbers_array.size)
+    ret_question_stats.active_day_count_it = int(unique_days_array.size)
+    ret_question_stats.days_since_last_entry_it = max(0, i_today_it - int(unique_days_array[-1]))
+    if ret_question_stats.days_since_last_entry_it <= 1:
+        ret_question_stats.current_streak_it = int(run_lengths_array[-1])
+    ret_question_stats.longest_streak_it = int(run_lengths_array.max())
+    if gaps_array.size > 0:
+        ret_question_stats.longest_gap_it = int(gaps_array.max()) - 1
+    nr_of_days_it = max(i_today_it, int(unique_days_array[-1])) - int(unique_days_array[0]) + 1
+    ret_question_stats.entries_per_week_ft = i_sorted_day_numbers_array.size * DAYS_PER_WEEK_IT / nr_of_days_it
+    ret_question_stats.weekday_count_list = numpy.bincount(
+        (i_sorted_day_numbers_array + EPOCH_WEEKDAY_IT) % DAYS_PER_WEEK_IT, minlength=DAYS_PER_WEEK_IT).tolist()
+    return ret_question_stats
+
+
+class StatsCacheM:
+    """
+    The day numbers and question ids of all the entries (as NumPy arrays), and the statistics calculated from
+    them. When a single entry is added, moved or removed the arrays are updated from the change event (please
+    see bwb.model.ChangeBusM) without reading from the db again, and after bulk changes they are read again.
+    The statistics are calculated again (from the arrays) the next time they are needed after a change
+    """
+    day_numbers_array = None  # "static", None means that the arrays have to be read from the db
+    question_refs_array = None
+    added_day_number_list = []  # -added entries which have not yet been appended to the arrays
+    added_question_ref_list = []
+    stats_dict = None  # -question id (or ALL_QUESTIONS_ID_IT) -> QuestionStatsM, None means not calculated
+    stats_today_it = None  # -the day the stats were calculated for, since the streaks depend on the date
+
+    @staticmethod
+    def get_stats() -> dict:
+        today_it = get_day_number(datetime.date.today())
+        if StatsCacheM.day_numbers_array is None:
+            StatsCacheM.read_from_db()
+        if StatsCacheM.stats_dict is None or StatsCacheM.stats_today_it != today_it:
+            StatsCacheM.stats_dict = StatsCacheM.calculate_stats(today_it)
+            StatsCacheM.stats_today_it = today_it
+        return StatsCacheM.stats_dict
+
+    @staticmethod
+    def read_from_db() -> None:
+        day_key_and_question_array = numpy.fromiter(
+            itertools.chain.from_iterable(bwb.model.DiaryM.iter_days_and_questions()), dtype=numpy.int64
+        ).reshape(-1, 2)
+        StatsCacheM.day_numbers_array = day_keys_to_day_numbers(day_key_and_question_array[:, 0])
+        StatsCacheM.question_refs_array = day_key_and_question_array[:, 1].copy()
+        StatsCacheM.added_day_number_list = []
+        StatsCacheM.added_question_ref_list = []
+        StatsCacheM.stats_dict = None
+
+    @staticmethod
+    def append_added_entries() -> None:
+        if StatsCacheM.added_day_number_list:
+            StatsCacheM.day_numbers_array = numpy.concatenate(
+                (StatsCacheM.day_numbers_array, StatsCacheM.added_day_number_list))
+            StatsCacheM.question_refs_array = numpy.concatenate(
+                (StatsCacheM.question_refs_array, StatsCacheM.added_question_ref_list))
+            StatsCacheM.added_day_number_list = []
+            StatsCacheM.added_question_ref_list = []
+
+    @staticmethod
+    def calculate_stats(i_today_it: int) -> dict:
+        StatsCacheM.append_added_entries()
+        ret_stats_dict = {ALL_QUESTIONS_ID_IT: calculate_question_stats(
+            ALL_QUESTIONS_ID_IT, numpy.sort(StatsCacheM.day_numbers_array), i_today_it)}
+        order_array = numpy.lexsort((StatsCacheM.day_numbers_array, StatsCacheM.question_refs_array))
+        # -sorted by question and then by day
+        sorted_question_refs_array = StatsCacheM.question_refs_array[order_array]
+        group_starts_array = numpy.flatnonzero(numpy.diff(sorted_question_refs_array)) + 1
+        if order_array.size == 0:
+            return ret_stats_dict
+        question_id_list = sorted_question_refs_array[numpy.concatenate(([0], group_starts_array))].tolist()
+        day_numbers_per_question_list = numpy.split(StatsCacheM.day_numbers_array[order_array], group_starts_array)
+        for (question_id_it, day_numbers_array) in zip(question_id_list, day_numbers_per_question_list):
+            ret_stats_dict[question_id_it] = calculate_question_stats(question_id_it, day_numbers_array, i_today_it)
+        return ret_stats_dict
+
+    @staticmethod
+    def add_entry(i_unix_time_it: int, i_question_ref_it: int) -> None:
+        StatsCacheM.added_day_number_list.append(
+            get_day_number(datetime.date.fromtimestamp(i_unix_time_it)))
+        StatsCacheM.added_question_ref_list.append(i_question_ref_it)
+
+    @staticmethod
+    def remove_entry(i_unix_time_it: int, i_question_ref_it: int) -> None:
+        StatsCacheM.append_added_entries()
+        day_number_it = get_day_number(datetime.date.fromtimestamp(i_unix_time_it))
+        index_array = numpy.flatnonzero(
+            (StatsCacheM.day_numbers_array == day_number_it) & (StatsCacheM.question_refs_array == i_question_ref_it))
+        if index_array.size == 0:
+            StatsCacheM.day_numbers_array = None
+            # -not expected, but if the arrays are not in sync with the db they are read again
+            return
+        StatsCacheM.day_numbers_array = numpy.delete(StatsCacheM.day_numbers_array, index_array[0])
+        StatsCacheM.question_refs_array = numpy.delete(StatsCacheM.question_refs_array, index_array[0])
+
+    @staticmethod
+    def on_change_event(i_change_event) -> None:
+        if (i_change_event.change_type not in bwb.model.DIARY_ACTIVITY_CHANGE_TYPES
+                or StatsCacheM.day_numbers_array is None):
+            return
+        change_type = i_change_event.change_type
+        unix_time_list = i_change_event.unix_time_list
+        if change_type == bwb.model.ChangeTypeEnum.diary_entry_added:
+            StatsCacheM.add_entry(unix_time_list[0], i_change_event.question_ref_it)
+        elif change_type == bwb.model.ChangeTypeEnum.diary_entry_changed:
+            StatsCacheM.remove_entry(unix_time_list[0], i_change_event.question_ref_it)
+            StatsCacheM.add_entry(unix_time_list[1], i_change_event.question_ref_it)
+        elif change_type == bwb.model.ChangeTypeEnum.diary_entry_removed:
+            StatsCacheM.remove_entry(unix_time_list[0], i_change_event.question_ref_it)
+        else:
+            StatsCacheM.day_numbers_array = None
+            # -the bulk functions don't tell which entries have changed
+        StatsCacheM.stats_dict = None
+
+
+bwb.model.ChangeBusM.subscribe(StatsCacheM.on_change_event)
+
+
+class CompositeStatsWidget(QtWidgets.QWidget):
+    """A table with one row for each question (and one for all questions together)"""
+    COLUMN_TITLES_TE = (
+        "Entries", "Current streak", "Longest streak", "Per week", "Days since last", "Longest gap"
+    ) + WEEKDAY_NAMES_TE
+
+    def __init__(self):
+        super().__init__()
+
+        vbox_l2 = QtWidgets.QVBoxLayout()
+        self.setLayout(vbox_l2)
+        self.stats_qtw = QtWidgets.QTableWidget(0, len(self.COLUMN_TITLES_TE))
+        self.stats_qtw.setHorizontalHeaderLabels(self.COLUMN_TITLES_TE)
+        self.stats_qtw.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.stats_qtw.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        vbox_l2.addWidget(self.stats_qtw)
+
+        bwb.model.ChangeBusM.subscribe(self.on_model_changed)
+        # -the table is filled by update_gui, which is called by the invalidation scheduler
+
+    def on_model_changed(self, i_change_event):
+        if (i_change_event.change_type in bwb.model.DIARY_ACTIVITY_CHANGE_TYPES
+                or i_change_event.change_type == bwb.model.ChangeTypeEnum.question_added):
+            bwb.invalidation.scheduler.invalidate_panel("stats")
+
+    def update_gui(self):
+        stats_dict = StatsCacheM.get_stats()
+        row_list = [(ALL_QUESTIONS_ID_IT, "All questions")]
+        row_list.extend((question.id_int, question.title_str) for question in bwb.model.QuestionM.get_all())
+        self.stats_qtw.setRowCount(len(row_list))
+        self.stats_qtw.setVerticalHeaderLabels([title_str for (question_id_it, title_str) in row_list])
+        for (row_it, (question_id_it, title_str)) in enumerate(row_list):
+            question_stats = stats_dict.get(question_id_it, QuestionStatsM(question_id_it))
+            days_since_last_entry_str = "-"
+            if question_stats.days_since_last_entry_it is not None:
+                days_since_last_entry_str = str(question_stats.days_since_last_entry_it)
+            value_list = [
+                str(question_stats.entry_count_it),
+                str(question_stats.current_streak_it),
+                str(question_stats.longest_streak_it),
+                "{:.1f}".format(question_stats.entries_per_week_ft),
+                days_since_last_entry_str,
+                str(question_stats.longest_gap_it),
+            ] + [str(weekday_count_it) for weekday_count_it in question_stats.weekday_count_list]
+            for (column_it, value_str) in enumerate(value_list):
+                value_qtwi = QtWidgets.QTableWidgetItem(value_str)
+                value_qtwi.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.stats_qtw.setItem(row_it, column_it, value_qtwi)
+        self.stats_qtw.resizeColumnsToContents()
@@ -1,6 +1,8 @@
 import enum
+import html
 import sys
 import logging
+import time
 
 from PyQt5 import QtCore
 from PyQt5 import QtGui
@@ -8,12 +10,13 @@ from PyQt5 import QtWidgets
 
 import bwb.calendar
 import bwb.central
+import bwb.db_writer
+import bwb.invalidation
 import bwb.model
 import bwb.questions
-import bwb.wisdom
 import bwb.bwbglobal
-import bwb.quotes
-import bwb.reminders
+# -bwb.reminders, bwb.quotes, bwb.export_dialog and bwb.importer are imported when they are first used, so that
+# the window can be shown sooner (please see load_deferred_docks)
 
 
 class EventSource(enum.Enum):
@@ -31,9 +34,12 @@ class WellBeingWindow(QtWidgets.QMainWindow):
     _l: layout
     _# (number): The level in the layout stack
     """
+    first_paint_signal = QtCore.pyqtSignal()
+
     # noinspection PyArgumentList,PyUnresolvedReferences
     def __init__(self):
         super().__init__()
+        self.first_paint_done_bl = False
 
         # Initializing window
         self.setGeometry(40, 30, 1100, 700)
@@ -68,7 +74,6 @@ class WellBeingWindow(QtWidgets.QMainWindow):
         # ..central widget (which **holds the diary** etc)
         self.central_widget_w3 = bwb.central.CompositeCentralWidget()
         self.setCentralWidget(self.central_widget_w3)
-        self.central_widget_w3.journal_button_toggled_signal.connect(self.update_gui)
         # ..wisdom
         """
         wisdom_dock_qw2 = QtWidgets.QDockWidget("Wisdom", self)
@@ -78,26 +83,26 @@ class WellBeingWindow(QtWidgets.QMainWindow):
         wisdom_dock_qw2.setAllowedAreas(QtCore.Qt.RightDockWidgetArea)
         wisdom_dock_qw2.hide()
         """
-        # ..reminders
-        reminders_dock_qw2 = QtWidgets.QDockWidget("Reminders", self)
-        self.reminders_composite_w3 = bwb.reminders.CompositeRemindersWidget()
-        reminders_dock_qw2.setWidget(self.reminders_composite_w3)
-        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, reminders_dock_qw2)
-        reminders_dock_qw2.setAllowedAreas(QtCore.Qt.RightDockWidgetArea)
-        reminders_dock_qw2.setFixedHeight(300)  # TODO: Change to dynamic
-        # ..quotes
-        quotes_dock_qw2 = QtWidgets.QDockWidget("Quotes", self)
-        self.quotes_composite_w3 = bwb.quotes.CompositeQuotesWidget()
-        quotes_dock_qw2.setWidget(self.quotes_composite_w3)
-        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, quotes_dock_qw2)
-        quotes_dock_qw2.setAllowedAreas(QtCore.Qt.RightDockWidgetArea)
+        # ..reminders and quotes (the contents are added in load_deferred_docks, after the first paint)
+        self.reminders_dock_qw2 = QtWidgets.QDockWidget("Reminders", self)
+        self.reminders_composite_w3 = None
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.reminders_dock_qw2)
+        self.reminders_dock_qw2.setAllowedAreas(QtCore.Qt.RightDockWidgetArea)
+        self.reminders_dock_qw2.setFixedHeight(300)  # TODO: Change to dynamic
+        self.quotes_dock_qw2 = QtWidgets.QDockWidget("Quotes", self)
+        self.quotes_composite_w3 = None
+        self.stats_composite_w3 = None  # -please see load_deferred_docks
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.quotes_dock_qw2)
+        self.quotes_dock_qw2.setAllowedAreas(QtCore.Qt.RightDockWidgetArea)
 
         # Creating the menu bar..
         # ..setup of actions
         export_qaction = QtWidgets.QAction("Export", self)
-        export_qaction.triggered.connect(bwb.model.export_all)
+        export_qaction.triggered.connect(self.show_export_dialog)
+        import_qaction = QtWidgets.QAction("Import", self)
+        import_qaction.triggered.connect(self.show_import_dialog)
         exit_qaction = QtWidgets.QAction("Exit", self)
-        exit_qaction.triggered.connect(lambda x: sys.exit())
+        exit_qaction.triggered.connect(QtWidgets.QApplication.quit)
         redraw_qaction = QtWidgets.QAction("Redraw", self)
         redraw_qaction.triggered.connect(self.update_gui)
         about_qaction = QtWidgets.QAction("About", self)
@@ -105,7 +110,9 @@ class WellBeingWindow(QtWidgets.QMainWindow):
         manual_qaction = QtWidgets.QAction("Manual", self)
         ###inline_help_qaction = QtWidgets.QAction("Inline help", self)
         backup_qaction = QtWidgets.QAction("Backup db", self)
-        backup_qaction.triggered.connect(bwb.model.backup_db_file)
+        backup_qaction.triggered.connect(lambda: bwb.db_writer.writer.submit(bwb.model.backup_db_file))
+        sql_statistics_qaction = QtWidgets.QAction("SQL statistics", self)
+        sql_statistics_qaction.triggered.connect(self.show_sql_statistics)
         dear_buddha_qaction = QtWidgets.QAction("Prepend diary entries with \"Dear Buddha\"", self)
         dear_buddha_qaction.triggered.connect(self.toggle_dear_buddha_text)
         ### wisdom_window_qaction = wisdom_dock_qw2.toggleViewAction()
@@ -117,14 +124,27 @@ class WellBeingWindow(QtWidgets.QMainWindow):
         help_menu = self.menu_bar.addMenu("&Help")
         window_menu = self.menu_bar.addMenu("&Window")
         file_menu.addAction(export_qaction)
+        file_menu.addAction(import_qaction)
         file_menu.addAction(exit_qaction)
         debug_menu.addAction(redraw_qaction)
         debug_menu.addAction(backup_qaction)
+        debug_menu.addAction(sql_statistics_qaction)
         tools_menu.addAction(dear_buddha_qaction)
         help_menu.addAction(about_qaction)
         help_menu.addAction(manual_qaction)
         ### window_menu.addAction(wisdom_window_qaction)
 
+        # Refreshing of the panels (please see bwb.invalidation)
+        scheduler = bwb.invalidation.scheduler
+        scheduler.register_panel(
+            "central", self.central_widget_w3.get_dependencies, self.central_widget_w3.update_gui)
+        scheduler.register_panel(
+            "calendar",
+            {bwb.invalidation.DependencyEnum.shown_month, bwb.invalidation.DependencyEnum.diary_entries},
+            self.custom_calendar_w3.update_gui)
+        scheduler.register_panel(
+            "questions", {bwb.invalidation.DependencyEnum.question_list}, self.questions_composite_w3.update_gui)
+
         self.update_gui()
 
         """
@@ -154,6 +174,46 @@ class WellBeingWindow(QtWidgets.QMainWindow):
         self.addDockWidget(QtCore.Qt.RightDockWidgetArea, image_dock_qw2)
         """
 
+    def paintEvent(self, i_qpaintevent):
+        super().paintEvent(i_qpaintevent)
+        if not self.first_paint_done_bl:
+            self.first_paint_done_bl = True
+            self.first_paint_signal.emit()
+            QtCore.QTimer.singleShot(0, self.load_deferred_docks)
+            # -the docks that are not needed for writing in the diary are filled after the window has been shown
+
+    def load_deferred_docks(self):
+        if self.reminders_composite_w3 is not None:
+            return
+        start_ft = time.perf_counter()
+        import bwb.reminders
+        import bwb.reminder_scheduler
+        import bwb.quotes
+        self.reminders_composite_w3 = bwb.reminders.CompositeRemindersWidget()
+        self.reminders_dock_qw2.setWidget(self.reminders_composite_w3)
+        self.quotes_composite_w3 = bwb.quotes.CompositeQuotesWidget()
+        self.quotes_dock_qw2.setWidget(self.quotes_composite_w3)
+        bwb.reminder_scheduler.reminder_scheduler.reminders_due_signal.connect(self.show_due_reminders)
+        bwb.reminder_scheduler.reminder_scheduler.start()
+        # ..statistics (only if NumPy is installed)
+        try:
+            import bwb.stats
+        except ImportError:
+            logging.warning("NumPy could not be imported, so the statistics dock is not shown")
+        else:
+            self.stats_composite_w3 = bwb.stats.CompositeStatsWidget()
+            stats_dock_qw2 = QtWidgets.QDockWidget("Statistics", self)
+            stats_dock_qw2.setWidget(self.stats_composite_w3)
+            self.addDockWidget(QtCore.Qt.RightDockWidgetArea, stats_dock_qw2)
+            stats_dock_qw2.setAllowedAreas(QtCore.Qt.RightDockWidgetArea)
+            bwb.invalidation.scheduler.register_panel(
+                "stats",
+                {bwb.invalidation.DependencyEnum.diary_entries, bwb.invalidation.DependencyEnum.question_list},
+                self.stats_composite_w3.update_gui)
+            bwb.invalidation.scheduler.invalidate_panel("stats")
+        logging.info(
+            "Startup: deferred docks loaded in " + "{:.0f}".format((time.perf_counter() - start_ft) * 1000) + " ms")
+
     def toggle_dear_buddha_text(self):
         old_text_str = self.central_widget_w3.adding_text_to_diary_textedit_w6.toPlainText()
         new_text_str = "Dear Buddha, "
@@ -165,29 +225,84 @@ class WellBeingWindow(QtWidgets.QMainWindow):
     def on_calendar_selection_changed(self):
         logging.debug("Selected date: " + str(self.custom_calendar_w3.calendar_widget.selectedDate()))
         bwb.bwbglobal.active_date_qdate = self.custom_calendar_w3.calendar_widget.selectedDate()
-        self.update_gui()
+        bwb.invalidation.scheduler.invalidate(bwb.invalidation.DependencyEnum.active_date)
 
     def on_calendar_page_changed(self):
         bwb.bwbglobal.shown_month_1to12_it = self.custom_calendar_w3.calendar_widget.monthShown()
         bwb.bwbglobal.shown_year_it = self.custom_calendar_w3.calendar_widget.yearShown()
-        self.update_gui()
+        bwb.invalidation.scheduler.invalidate(bwb.invalidation.DependencyEnum.shown_month)
 
     def on_practice_details_time_of_day_state_changed(self):
         self.update_gui(EventSource.practice_details)
 
     def on_question_current_row_changed(self, i_current_practice_row_it):
+        if i_current_practice_row_it == -1:
+            return
+            # -this happens when the question list is cleared before it is filled again
         current_practice_qlistitem = self.questions_composite_w3.list_widget.item(i_current_practice_row_it)
         question_id_it = current_practice_qlistitem.data(QtCore.Qt.UserRole)
         bwb.bwbglobal.active_question_id_it = question_id_it
         question = bwb.model.QuestionM.get(question_id_it)
         self.central_widget_w3.question_label.setText(question.question_str)
 
-        self.update_gui(EventSource.obs_current_row_changed)
+        bwb.invalidation.scheduler.invalidate(bwb.invalidation.DependencyEnum.active_question)
 
     def on_practice_item_selection_changed(self):
         pass
         ###self.update_gui(EventSource.obs_selection_changed)  # Showing habits for practice etc
 
+    def show_export_dialog(self):
+        import bwb.export_dialog
+        bwb.export_dialog.ExportDialog.show_export_dialog(self)
+
+    def show_import_dialog(self):
+        (file_path_str, filter_str) = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Import from file", "",
+            "Diary files (*.csv *.jsonl *.csv.gz *.jsonl.gz);;All files (*)")
+        if not file_path_str:
+            return
+        import bwb.importer
+        bwb.db_writer.writer.submit(
+            bwb.importer.import_file, file_path_str, i_done_function=self.on_import_done)
+        # -the panels are updated from the change events that the model sends for the new entries and questions
+
+    def on_import_done(self, i_command):
+        if i_command.exception is not None:
+            QtWidgets.QMessageBox.warning(self, "Import", "The import failed: " + str(i_command.exception))
+            return
+        QtWidgets.QMessageBox.information(self, "Import", i_command.result.get_summary())
+
+    def show_sql_statistics(self):
+        summary_str = bwb.model.QueryStatsM.get_summary_str()
+        logging.info("SQL statistics:\n" + summary_str)
+        statistics_qdialog = QtWidgets.QDialog(self)
+        statistics_qdialog.setWindowTitle("SQL statistics")
+        vbox_l2 = QtWidgets.QVBoxLayout(statistics_qdialog)
+        summary_qpte = QtWidgets.QPlainTextEdit(summary_str)
+        summary_qpte.setReadOnly(True)
+        summary_qpte.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        summary_qpte.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        vbox_l2.addWidget(summary_qpte)
+        statistics_qdialog.resize(900, 500)
+        statistics_qdialog.exec_()
+
+    def show_due_reminders(self, i_reminder_id_list):
+        """All the reminders that are due at the same time are shown in one message box"""
+        reminder_list = [bwb.model.ReminderM.get(reminder_id_it) for reminder_id_it in i_reminder_id_list]
+        reminder_list = [reminder for reminder in reminder_list if reminder is not None]
+        if not reminder_list:
+            return
+        self.due_reminders_qmessagebox = QtWidgets.QMessageBox(self)
+        self.due_reminders_qmessagebox.setIcon(QtWidgets.QMessageBox.Information)
+        self.due_reminders_qmessagebox.setWindowTitle("Reminder")
+        self.due_reminders_qmessagebox.setText(
+            "<br>".join(
+                "<b>" + html.escape(reminder.title_str) + "</b> " + html.escape(reminder.reminder_str)
+                for reminder in reminder_list))
+        self.due_reminders_qmessagebox.setModal(False)
+        self.due_reminders_qmessagebox.show()
+        # -not modal (and not exec_), so the reminders don't stop the user from writing in the diary
+
     def show_about_box(self):
         message_box = QtWidgets.QMessageBox.about(
             self, "About Buddhist Well-Being",
@@ -199,13 +314,10 @@ class WellBeingWindow(QtWidgets.QMainWindow):
         )
 
     def update_gui(self, i_event_source = EventSource.undefined):
+        """Refreshes all the panels at once (other changes go through bwb.invalidation)"""
         if i_event_source == EventSource.practice_details:
             return
 
-        self.central_widget_w3.update_gui()
-
-        self.custom_calendar_w3.update_gui()
-
-        if i_event_source != EventSource.obs_current_row_changed:
-            self.questions_composite_w3.update_gui()
+        bwb.invalidation.scheduler.invalidate_all()
+        bwb.invalidation.scheduler.refresh_dirty_panels()
 
@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+import unittest.mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bwb.importer
+import bwb.model
+
+NEW_QUESTION_TITLE_STR = "New question from the import"
+
+
+class ImportBatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        bwb.model.active_storage_profile = bwb.model.StorageProfileEnum.memory
+        bwb.model.DbHelperM.close_db_connection()
+        # -the memory db is removed when the connection is closed, so each test starts with a new db
+
+    def tearDown(self) -> None:
+        bwb.model.DbHelperM.close_db_connection()
+
+    def test_new_question_of_rolled_back_batch_is_added_again(self) -> None:
+        import_result = bwb.importer.ImportResultM()
+        question_mapper = bwb.importer.QuestionMapper(import_result)
+        first_row_list = [("2020-01-01 10:00:00", NEW_QUESTION_TITLE_STR, "First batch")]
+        with unittest.mock.patch.object(bwb.model.DiaryM, "add_many", side_effect=RuntimeError("Write failed")):
+            with self.assertRaises(RuntimeError):
+                bwb.importer.import_batch(first_row_list, question_mapper, import_result)
+        self.assertNotIn(NEW_QUESTION_TITLE_STR, [q.title_str for q in bwb.model.QuestionM.get_all()])
+
+        second_row_list = [("2020-01-02 10:00:00", NEW_QUESTION_TITLE_STR, "Second batch")]
+        bwb.importer.import_batch(second_row_list, question_mapper, import_result)
+        question_id_for_title_dict = {q.title_str: q.id_int for q in bwb.model.QuestionM.get_all()}
+        self.assertIn(NEW_QUESTION_TITLE_STR, question_id_for_title_dict)
+        diary_entry_list = bwb.model.DiaryM.get_all()
+        self.assertEqual(len(diary_entry_list), 1)
+        self.assertEqual(diary_entry_list[0].question_ref_it, question_id_for_title_dict[NEW_QUESTION_TITLE_STR])
+        self.assertEqual(import_result.imported_count_it, 1)
+        self.assertEqual(import_result.new_question_count_it, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
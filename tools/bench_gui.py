@@ -0,0 +1,153 @@
+"""
+Benchmark of the GUI hot paths, run without a display (with the offscreen Qt platform)
+
+Usage: python3 tools/bench_gui.py [--entries N] [--runs N] [--output bench_gui_results.json]
+
+The main window is built with a diary of generated entries (please see tools/generate_diary.py) in an
+in-memory db (the "memory" storage profile, so that the writes are done directly in the gui thread and the
+times are for the gui work and the queries rather than for syncing to disk). Then the panel refreshes and some
+typical interactions are timed, each including the refresh of the panels that it makes dirty (please see
+bwb.invalidation). Percentiles of the latencies are reported together with the number of live widgets after
+each benchmark, since a growing number of widgets means that something is not being reused or deleted
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+os.environ["QT_QPA_PLATFORM"] = "offscreen"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore
+from PyQt5 import QtWidgets
+
+import bwb.bwbglobal
+import bwb.invalidation
+import bwb.model
+import bwb.window
+import generate_diary
+
+PERCENTILES_TE = (50, 90, 99)
+
+
+def get_percentile(i_sorted_ms_list: list, i_percentile_it: int) -> float:
+    """Nearest-rank percentile"""
+    index_it = max(0, -(-i_percentile_it * len(i_sorted_ms_list) // 100) - 1)
+    return i_sorted_ms_list[index_it]
+
+
+def process_events_and_refresh(i_app) -> None:
+    i_app.processEvents()
+    bwb.invalidation.scheduler.refresh_dirty_panels()
+
+
+def time_runs(i_app, i_function, i_nr_of_runs_it: int) -> dict:
+    """
+    :param i_function: Is called with the run number, the refresh of the dirty panels is included in the time
+    :return: Latency percentiles in milliseconds and the number of live widgets afterwards
+    """
+    ms_list = []
+    for i in range(i_nr_of_runs_it):
+        start_ft = time.perf_counter()
+        i_function(i)
+        process_events_and_refresh(i_app)
+        ms_list.append((time.perf_counter() - start_ft) * 1000)
+    ms_list.sort()
+    ret_result_dict = {"runs": i_nr_of_runs_it}
+    for percentile_it in PERCENTILES_TE:
+        ret_result_dict["p" + str(percentile_it) + "_ms"] = round(get_percentile(ms_list, percentile_it), 3)
+    ret_result_dict["max_ms"] = round(ms_list[-1], 3)
+    QtWidgets.QApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    # -widgets removed with deleteLater (for example by QListWidget.clear) are not deleted by processEvents
+    ret_result_dict["live_widgets"] = len(QtWidgets.QApplication.allWidgets())
+    return ret_result_dict
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--entries", type=int, default=100000)
+    argument_parser.add_argument("--runs", type=int, default=50)
+    argument_parser.add_argument("--output", default="bench_gui_results.json")
+    parsed_args = argument_parser.parse_args()
+
+    bwb.model.active_storage_profile = bwb.model.StorageProfileEnum.memory
+    app = QtWidgets.QApplication(sys.argv[:1])
+    generated_id_list = generate_diary.generate_entries(parsed_args.entries)
+    last_date = datetime.date.fromtimestamp(bwb.model.DiaryM.get(generated_id_list[-1]).date_added_it)
+    last_qdate = QtCore.QDate(last_date.year, last_date.month, last_date.day)
+    bwb.bwbglobal.active_date_qdate = last_qdate
+    bwb.bwbglobal.shown_year_it = last_date.year
+    bwb.bwbglobal.shown_month_1to12_it = last_date.month
+
+    construction_start_ft = time.perf_counter()
+    main_window = bwb.window.WellBeingWindow()
+    process_events_and_refresh(app)
+    main_window.load_deferred_docks()
+    construction_ms_ft = (time.perf_counter() - construction_start_ft) * 1000
+    calendar_widget = main_window.custom_calendar_w3.calendar_widget
+    calendar_widget.setCurrentPage(last_date.year, last_date.month)
+    calendar_widget.setSelectedDate(last_qdate)
+    process_events_and_refresh(app)
+
+    central_widget = main_window.central_widget_w3
+    question_list_widget = main_window.questions_composite_w3.list_widget
+
+    def flip_month(i_run_it):
+        shown_qdate = last_qdate.addMonths(-(i_run_it % 12))
+        calendar_widget.setCurrentPage(shown_qdate.year(), shown_qdate.month())
+
+    def select_date(i_run_it):
+        calendar_widget.setSelectedDate(last_qdate.addDays(-(i_run_it % 28)))
+
+    def switch_question(i_run_it):
+        question_list_widget.setCurrentRow((i_run_it + 1) % question_list_widget.count())
+
+    def add_entry(i_run_it):
+        central_widget.adding_text_to_diary_textedit_w6.setText("Benchmark entry number " + str(i_run_it))
+        central_widget.on_add_text_to_diary_button_clicked()
+
+    def set_view(i_view):
+        central_widget.view_radio_qbuttongroup.button(i_view.value).setChecked(True)
+        calendar_widget.setSelectedDate(last_qdate)
+        process_events_and_refresh(app)
+
+    result_dict = {}
+    runs_it = parsed_args.runs
+    benchmarks = (
+        ("diary_list.update_gui", None, lambda i: central_widget.diary_widget.update_gui()),
+        ("calendar.update_gui", None, lambda i: main_window.custom_calendar_w3.update_gui()),
+        ("questions.update_gui", None, lambda i: main_window.questions_composite_w3.update_gui()),
+        ("window.update_gui", None, lambda i: main_window.update_gui()),
+        ("month_flip", None, flip_month),
+        ("date_select", None, select_date),
+        ("question_switch (monthly view)", bwb.bwbglobal.ViewEnum.journal_monthly_view, switch_question),
+        ("add_entry", bwb.bwbglobal.ViewEnum.diary_daily_overview, add_entry),
+    )
+    for (name_str, view, function) in benchmarks:
+        if view is not None:
+            set_view(view)
+        result_dict[name_str] = time_runs(app, function, runs_it)
+
+    print("Window construction (with the deferred docks): " + "{:.1f}".format(construction_ms_ft) + " ms")
+    print("{:<32} {:>9} {:>9} {:>9} {:>9} {:>8}".format(
+        "benchmark", "p50 ms", "p90 ms", "p99 ms", "max ms", "widgets"))
+    for (name_str, benchmark_result_dict) in result_dict.items():
+        print("{:<32} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>8}".format(
+            name_str, benchmark_result_dict["p50_ms"], benchmark_result_dict["p90_ms"],
+            benchmark_result_dict["p99_ms"], benchmark_result_dict["max_ms"], benchmark_result_dict["live_widgets"]))
+
+    with open(parsed_args.output, "w") as output_file:
+        json.dump({
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "entries": parsed_args.entries,
+            "window_construction_ms": round(construction_ms_ft, 3),
+            "results": result_dict,
+        }, output_file, indent=2)
+    print("Results written to " + parsed_args.output)
+    bwb.model.DbHelperM.close_db_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark of the DiaryM methods (and export_all) with large diaries
+
+Usage: python3 tools/bench_model.py [--sizes 1000,100000,1000000] [--output bench_model_results.json]
+    [--profile balanced]
+
+For every size a new db file is filled with generated entries (please see tools/generate_diary.py, three
+entries per day, so 1M entries is a bit more than 900 years) and then each method is timed. The read methods
+are run several times and the median is used. The write methods (add, update_date and remove) commit one
+entry at a time like when the user makes changes, and are timed per entry.
+
+The results are written to a JSON file so that runs (for example before and after a change) can be compared
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore
+
+import bwb.bwbglobal
+import bwb.exporter
+import bwb.model
+import generate_diary
+
+READ_RUNS_IT = 5
+SLOW_READ_RUNS_IT = 1  # -for the methods that read the whole diary, at the largest sizes
+SLOW_READ_LIMIT_IT = 100000
+WRITE_RUNS_IT = 100
+
+
+def time_runs(i_function, i_nr_of_runs_it: int) -> list:
+    """:return: The time in milliseconds for each run"""
+    ret_ms_list = []
+    for i in range(i_nr_of_runs_it):
+        start_ft = time.perf_counter()
+        i_function(i)
+        ret_ms_list.append((time.perf_counter() - start_ft) * 1000)
+    return ret_ms_list
+
+
+def get_result_dict(i_nr_of_entries_it: int, i_method_str: str, i_ms_list: list) -> dict:
+    return {
+        "entries": i_nr_of_entries_it,
+        "method": i_method_str,
+        "runs": len(i_ms_list),
+        "median_ms": round(statistics.median(i_ms_list), 3),
+        "min_ms": round(min(i_ms_list), 3),
+        "max_ms": round(max(i_ms_list), 3),
+    }
+
+
+def run_size(i_nr_of_entries_it: int, i_temp_dir_str: str) -> list:
+    bwb.model.DbHelperM.close_db_connection()
+    bwb.model.DATABASE_FILE_NAME = os.path.join(i_temp_dir_str, "bench_" + str(i_nr_of_entries_it) + ".db")
+    bwb.model.DbHelperM.get_db_connection()
+
+    generate_start_ft = time.perf_counter()
+    generated_id_list = generate_diary.generate_entries(i_nr_of_entries_it)
+    print("Generated " + str(i_nr_of_entries_it) + " entries in "
+        + "{:.1f}".format(time.perf_counter() - generate_start_ft) + " s")
+
+    last_entry = bwb.model.DiaryM.get(generated_id_list[-1])
+    # -the day and month of the newest entry are used for the day and month queries
+    last_date = datetime.date.fromtimestamp(last_entry.date_added_it)
+    bwb.bwbglobal.active_date_qdate = QtCore.QDate(last_date.year, last_date.month, last_date.day)
+    question_id_it = last_entry.question_ref_it
+    whole_diary_runs_it = READ_RUNS_IT if i_nr_of_entries_it < SLOW_READ_LIMIT_IT else SLOW_READ_RUNS_IT
+    export_file_path_str = os.path.join(i_temp_dir_str, "exported.csv")
+
+    ret_result_list = []
+    timed_calls = (
+        ("get_all", whole_diary_runs_it, lambda i: bwb.model.DiaryM.get_all()),
+        ("get_all_for_question_and_month", READ_RUNS_IT, lambda i: bwb.model.DiaryM.get_all_for_question_and_month(
+            question_id_it, last_date.year, last_date.month)),
+        ("get_all_for_active_day", READ_RUNS_IT, lambda i: bwb.model.DiaryM.get_all_for_active_day()),
+        ("export_all", whole_diary_runs_it, lambda i: bwb.exporter.export_all(export_file_path_str)),
+    )
+    for (method_str, nr_of_runs_it, function) in timed_calls:
+        ret_result_list.append(get_result_dict(i_nr_of_entries_it, method_str, time_runs(function, nr_of_runs_it)))
+
+    added_id_list = []
+    ret_result_list.append(get_result_dict(i_nr_of_entries_it, "add", time_runs(
+        lambda i: added_id_list.append(bwb.model.DiaryM.add(
+            last_entry.date_added_it + i, "Benchmark entry number " + str(i), question_id_it)),
+        WRITE_RUNS_IT)))
+    ret_result_list.append(get_result_dict(i_nr_of_entries_it, "update_date", time_runs(
+        lambda i: bwb.model.DiaryM.update_date(added_id_list[i], last_entry.date_added_it - i), WRITE_RUNS_IT)))
+    ret_result_list.append(get_result_dict(i_nr_of_entries_it, "remove", time_runs(
+        lambda i: bwb.model.DiaryM.remove(added_id_list[i]), WRITE_RUNS_IT)))
+
+    bwb.model.DbHelperM.close_db_connection()
+    return ret_result_list
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--sizes", default="1000,100000,1000000",
+        help="Comma separated numbers of diary entries")
+    argument_parser.add_argument("--output", default="bench_model_results.json")
+    argument_parser.add_argument("--profile", choices=[profile.name for profile in bwb.model.StorageProfileEnum
+        if profile != bwb.model.StorageProfileEnum.memory], default=bwb.model.StorageProfileEnum.balanced.name)
+    parsed_args = argument_parser.parse_args()
+    bwb.model.active_storage_profile = bwb.model.StorageProfileEnum[parsed_args.profile]
+
+    result_list = []
+    with tempfile.TemporaryDirectory() as temp_dir_str:
+        for size_str in parsed_args.sizes.split(","):
+            result_list.extend(run_size(int(size_str), temp_dir_str))
+
+    print("{:>9} {:<32} {:>12} {:>12}".format("entries", "method", "median ms", "min ms"))
+    for result_dict in result_list:
+        print("{:>9} {:<32} {:>12.3f} {:>12.3f}".format(
+            result_dict["entries"], result_dict["method"], result_dict["median_ms"], result_dict["min_ms"]))
+
+    with open(parsed_args.output, "w") as output_file:
+        json.dump({
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python_version": platform.python_version(),
+            "sqlite_version": sqlite3.sqlite_version,
+            "storage_profile": parsed_args.profile,
+            "results": result_list,
+        }, output_file, indent=2)
+    print("Results written to " + parsed_args.output)
+
+
+if __name__ == "__main__":
+    main()
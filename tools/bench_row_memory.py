@@ -0,0 +1,70 @@
+"""
+Memory benchmark for loading the whole diary with DiaryM.get_all
+
+Usage: python3 tools/bench_row_memory.py [--entries N]
+
+"before" is the way get_all worked before the model classes got __slots__ and a row factory: fetchall() into a
+list of tuples, which was then copied into a second list of objects with a per-object __dict__.
+Memory is measured with tracemalloc, and the per-entry numbers include the diary text strings (which are the
+same for both versions)
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bwb.model
+
+
+class DictDiaryM:
+    """The DiaryM class as it was before (without __slots__)"""
+    def __init__(self, i_id, i_date_added_it, i_diary_text, i_question_ref_it, i_local_day_it):
+        self.id = i_id
+        self.date_added_it = i_date_added_it
+        self.diary_text = i_diary_text
+        self.question_ref_it = i_question_ref_it
+        self.local_day_it = i_local_day_it
+
+
+def get_all_before():
+    ret_diary_list = []
+    db_cursor_result = bwb.model.SqlM.diary_get_all_asc.execute()
+    diary_db_te_list = db_cursor_result.fetchall()
+    for diary_db_te in diary_db_te_list:
+        ret_diary_list.append(DictDiaryM(*diary_db_te))
+    return ret_diary_list
+
+
+def measure(i_function, i_nr_of_entries_it):
+    """:return: (bytes per entry kept after loading, peak bytes per entry while loading)"""
+    tracemalloc.start()
+    diary_list = i_function()
+    (current_bytes_it, peak_bytes_it) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(diary_list) >= i_nr_of_entries_it
+    return (current_bytes_it / len(diary_list), peak_bytes_it / len(diary_list))
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--entries", type=int, default=100000)
+    parsed_args = argument_parser.parse_args()
+
+    bwb.model.active_storage_profile = bwb.model.StorageProfileEnum.memory
+    start_unix_time_it = int(time.time()) - parsed_args.entries * 3600
+    bwb.model.DiaryM.add_many(
+        (start_unix_time_it + i * 3600, "Benchmark entry number " + str(i), 1 + i % len(bwb.model.QuestionSetupEnum))
+        for i in range(parsed_args.entries)
+    )
+
+    print("{:<8} {:>22} {:>22}".format("", "bytes/entry (kept)", "bytes/entry (peak)"))
+    for (name_str, function) in (("before", get_all_before), ("after", bwb.model.DiaryM.get_all)):
+        (kept_ft, peak_ft) = measure(function, parsed_args.entries)
+        print("{:<8} {:>22.0f} {:>22.0f}".format(name_str, kept_ft, peak_ft))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for the statement layer (bwb.model.StatementM and SqlM)
+
+Usage: python3 tools/bench_statements.py [--entries N] [--calls N]
+
+Compares the per-call latency of DiaryM.get and the month query with the way these were done before the
+statement layer was added: building a new SQL string for every id (or month) with the values concatenated into
+the text, which means that sqlite has to prepare the statement again on every call
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bwb.model
+
+SECONDS_PER_DAY_IT = 24 * 3600
+DAYS_IN_MONTH_IT = 30
+Cols = bwb.model.DbSchemaM.DiaryEntryTable.Cols
+TABLE_NAME_STR = bwb.model.DbSchemaM.DiaryEntryTable.name
+COLUMNS_STR = ", ".join((Cols.id, Cols.date_added, Cols.diary_entry, Cols.question_ref, Cols.local_day))
+# -the columns that DiaryM takes
+
+
+def concatenated_get(i_id_it):
+    db_connection = bwb.model.DbHelperM.get_db_connection()
+    db_cursor_result = db_connection.execute(
+        "SELECT " + COLUMNS_STR + " FROM " + TABLE_NAME_STR + " WHERE " + Cols.id + "=" + str(i_id_it)
+    )
+    return bwb.model.DiaryM(*db_cursor_result.fetchone())
+
+
+def concatenated_month(i_question_id_it, i_year_it, i_month_1to12_it):
+    db_connection = bwb.model.DbHelperM.get_db_connection()
+    (first_day_key_it, end_day_key_it) = bwb.model.get_month_day_key_range(i_year_it, i_month_1to12_it)
+    db_cursor_result = db_connection.execute(
+        "SELECT " + COLUMNS_STR + " FROM " + TABLE_NAME_STR
+        + " WHERE " + Cols.question_ref + "=" + str(i_question_id_it)
+        + " AND " + Cols.local_day + ">=" + str(first_day_key_it)
+        + " AND " + Cols.local_day + "<" + str(end_day_key_it)
+        + " ORDER BY " + Cols.local_day + " ASC, " + Cols.date_added + " ASC"
+    )
+    return [bwb.model.DiaryM(*diary_db_te) for diary_db_te in db_cursor_result.fetchall()]
+
+
+def time_per_call_us(i_function, i_arguments_list):
+    start_ft = time.perf_counter()
+    for arguments_te in i_arguments_list:
+        i_function(*arguments_te)
+    return 1000000 * (time.perf_counter() - start_ft) / len(i_arguments_list)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--entries", type=int, default=20000)
+    argument_parser.add_argument("--calls", type=int, default=20000)
+    parsed_args = argument_parser.parse_args()
+
+    bwb.model.active_storage_profile = bwb.model.StorageProfileEnum.memory
+    db_connection = bwb.model.DbHelperM.get_db_connection()
+    start_unix_time_it = int(time.time()) - parsed_args.entries * 3600
+    bwb.model.DiaryM.add_many(
+        (start_unix_time_it + i * 3600, "Entry " + str(i), 1 + i % len(bwb.model.QuestionSetupEnum))
+        for i in range(parsed_args.entries)
+    )
+    max_id_it = db_connection.execute("SELECT MAX(" + Cols.id + ") FROM " + TABLE_NAME_STR).fetchone()[0]
+
+    get_arguments_list = [(1 + (i * 7919) % max_id_it,) for i in range(parsed_args.calls)]
+    # -a different id for (almost) every call, which gives a new SQL text every time for the concatenated version
+    month_date_list = [
+        datetime.date.fromtimestamp(start_unix_time_it + (i % 24) * DAYS_IN_MONTH_IT * SECONDS_PER_DAY_IT)
+        for i in range(parsed_args.calls // 10)
+    ]
+    month_arguments_list = [
+        (1 + i % len(bwb.model.QuestionSetupEnum), month_date.year, month_date.month)
+        for (i, month_date) in enumerate(month_date_list)
+    ]
+
+    print("{:<35} {:>14} {:>14}".format("", "before (us)", "after (us)"))
+    print("{:<35} {:>14.1f} {:>14.1f}".format(
+        "DiaryM.get",
+        time_per_call_us(concatenated_get, get_arguments_list),
+        time_per_call_us(bwb.model.DiaryM.get, get_arguments_list)))
+    print("{:<35} {:>14.1f} {:>14.1f}".format(
+        "DiaryM.get_all_for_question_and_month",
+        time_per_call_us(concatenated_month, month_arguments_list),
+        time_per_call_us(bwb.model.DiaryM.get_all_for_question_and_month, month_arguments_list)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares the storage profiles (bwb.model.StorageProfileEnum) on insert and month-query throughput
+
+Usage: python3 tools/bench_storage_profiles.py [--inserts N] [--month-queries N]
+
+Every profile gets a new db file in a temporary directory. Inserts are done one at a time through DiaryM.add
+(one commit per entry, like when the user adds entries), so the difference between the profiles is mostly
+the cost of syncing to disk
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bwb.model
+
+SECONDS_PER_DAY_IT = 24 * 3600
+DAYS_IN_MONTH_IT = 30
+
+
+def run_profile(i_profile, i_db_file_path_str, i_nr_of_inserts_it, i_nr_of_month_queries_it):
+    bwb.model.DbHelperM.close_db_connection()
+    bwb.model.active_storage_profile = i_profile
+    bwb.model.DATABASE_FILE_NAME = i_db_file_path_str
+    bwb.model.DbHelperM.get_db_connection()
+
+    start_unix_time_it = int(time.time()) - i_nr_of_inserts_it * 3600
+    insert_start_ft = time.perf_counter()
+    for i in range(i_nr_of_inserts_it):
+        bwb.model.DiaryM.add(
+            start_unix_time_it + i * 3600, "Benchmark entry number " + str(i),
+            bwb.model.QuestionSetupEnum.practice.value)
+    insert_seconds_ft = time.perf_counter() - insert_start_ft
+
+    query_start_ft = time.perf_counter()
+    for i in range(i_nr_of_month_queries_it):
+        month_date = datetime.date.fromtimestamp(
+            start_unix_time_it + (i % 12) * DAYS_IN_MONTH_IT * SECONDS_PER_DAY_IT)
+        bwb.model.DiaryM.get_all_for_question_and_month(
+            bwb.model.QuestionSetupEnum.practice.value, month_date.year, month_date.month)
+    query_seconds_ft = time.perf_counter() - query_start_ft
+
+    bwb.model.DbHelperM.close_db_connection()
+    return (i_nr_of_inserts_it / insert_seconds_ft, i_nr_of_month_queries_it / query_seconds_ft)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--inserts", type=int, default=2000)
+    argument_parser.add_argument("--month-queries", type=int, default=500)
+    parsed_args = argument_parser.parse_args()
+
+    print("{:<10} {:>14} {:>20}".format("profile", "inserts/s", "month queries/s"))
+    with tempfile.TemporaryDirectory() as temp_dir_str:
+        for profile in bwb.model.StorageProfileEnum:
+            db_file_path_str = os.path.join(temp_dir_str, profile.name + ".db")
+            (inserts_per_second_ft, queries_per_second_ft) = run_profile(
+                profile, db_file_path_str, parsed_args.inserts, parsed_args.month_queries)
+            print("{:<10} {:>14.0f} {:>20.0f}".format(profile.name, inserts_per_second_ft, queries_per_second_ft))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Builds the byte offset index for a quotes file (please see bwb/quote_corpus.py)
+
+Usage: python3 tools/build_quotes_index.py [QUOTES_FILE] [--check]
+
+The application builds the index itself when it's missing or out of date, but with a large quotes file it can be
+built in advance (for example after adding quotes, or when the application directory isn't writable). With
+--check the corpus is also opened with the new index, and the time to open it and to read random quotes is
+printed
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bwb.quote_corpus
+
+CHECK_READS_IT = 1000
+
+
+def check(i_quotes_file_path_str: str) -> None:
+    open_start_ft = time.perf_counter()
+    quote_corpus = bwb.quote_corpus.QuoteCorpusM(i_quotes_file_path_str)
+    open_ms_ft = (time.perf_counter() - open_start_ft) * 1000
+    print("Opened in " + "{:.3f}".format(open_ms_ft) + " ms")
+    if quote_corpus.get_quote_count() == 0:
+        quote_corpus.close()
+        return
+    read_us_list = []
+    for i in range(CHECK_READS_IT):
+        quote_number_it = random.randrange(quote_corpus.get_quote_count())
+        read_start_ft = time.perf_counter()
+        quote_corpus.get_quote(quote_number_it)
+        read_us_list.append((time.perf_counter() - read_start_ft) * 1000000)
+    print("Random quote read: median " + "{:.1f}".format(statistics.median(read_us_list)) + " us, max "
+        + "{:.1f}".format(max(read_us_list)) + " us (" + str(CHECK_READS_IT) + " reads)")
+    quote_corpus.close()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("quotes_file", nargs="?", default=bwb.quote_corpus.QUOTES_FILE_PATH_STR)
+    argument_parser.add_argument("--check", action="store_true")
+    parsed_args = argument_parser.parse_args()
+
+    build_start_ft = time.perf_counter()
+    quote_count_it = bwb.quote_corpus.write_index(parsed_args.quotes_file)
+    print("Indexed " + str(quote_count_it) + " quotes in " + "{:.1f}".format(
+        (time.perf_counter() - build_start_ft) * 1000) + " ms: "
+        + bwb.quote_corpus.get_index_file_path(parsed_args.quotes_file))
+    if parsed_args.check:
+        check(parsed_args.quotes_file)
+
+
+if __name__ == "__main__":
+    main()
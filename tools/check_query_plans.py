@@ -0,0 +1,139 @@
+"""
+Query plan regression check for the model layer
+
+Usage: python3 tools/check_query_plans.py
+
+Calls every DiaryM, QuestionM and ReminderM method against an in-memory db, records the SQL that is executed
+(using the sqlite3 trace callback) and runs EXPLAIN QUERY PLAN for each statement. Exits with status 1 if:
+* a statement scans a whole table or a whole index. Only SEARCH plans are accepted, except for the methods in
+  FULL_LISTING_METHODS_DICT (which may only scan in the way that is listed there), full-text MATCH queries and
+  sub-queries without a table (like "SELECT EXISTS(...)")
+* a statement uses an automatic (temporary) index, which sqlite creates when there is no suitable index
+* a statement needs a temporary b-tree for sorting (ORDER BY not covered by an index). A temporary b-tree for
+  DISTINCT or GROUP BY is accepted, since it only holds the rows that were found using an index
+* a model method has been added without being added to the list of checked calls below
+"""
+import datetime
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bwb.model
+
+CHECKED_CLASSES = (bwb.model.DiaryM, bwb.model.QuestionM, bwb.model.ReminderM)
+FULL_LISTING_METHODS_DICT = {
+    "QuestionM.get_all": "SCAN question",
+    "ReminderM.get_all": "SCAN reminder",
+    "DiaryM.get_all": "SCAN diary_entry USING INDEX diary_entry_date_added_idx",
+    "DiaryM.iter_days_and_questions":
+        "SCAN diary_entry USING COVERING INDEX diary_entry_question_ref_local_day_date_added_idx",
+}
+# -these methods return every row in the table, so a scan is the best possible plan. The scan has to match
+# exactly, so that for example an index walk which replaces a covering index is also reported
+SKIPPED_STATEMENT_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "--")
+# -statements starting with "--" are run by sqlite itself (for triggers and the fts index)
+FTS_SHADOW_TABLE_STR = "'" + bwb.model.DbSchemaM.DiaryEntryFtsTable.name + "_"
+# -the fts5 module reads its own tables (for example the config table, on the first write after opening the db)
+CONSTANT_ROW_SCAN_STR = "SCAN CONSTANT ROW"
+# -for sub-queries like "SELECT EXISTS(...)", doesn't read any table
+VIRTUAL_TABLE_MATCH_RE = re.compile(r"^SCAN \S+ VIRTUAL TABLE INDEX \d+:\S")
+# -an fts5 MATCH query. A full scan of the fts table has an empty index string ("VIRTUAL TABLE INDEX 0:")
+
+
+def get_checked_calls():
+    now_it = int(time.time())
+    question_id_it = bwb.model.QuestionSetupEnum.practice.value
+    today_date = datetime.date.today()
+    return [
+        ("QuestionM.add", lambda: bwb.model.QuestionM.add("Title", "Question")),
+        ("QuestionM.get", lambda: bwb.model.QuestionM.get(question_id_it)),
+        ("QuestionM.get_all", lambda: bwb.model.QuestionM.get_all()),
+        ("DiaryM.add", lambda: bwb.model.DiaryM.add(now_it, "Entry text", question_id_it)),
+        ("DiaryM.add_many", lambda: bwb.model.DiaryM.add_many([(now_it, "Entry text", question_id_it)] * 3)),
+        ("DiaryM.update_many", lambda: bwb.model.DiaryM.update_many([(2, now_it, "New text")])),
+        ("DiaryM.update_note", lambda: bwb.model.DiaryM.update_note(1, "New text")),
+        ("DiaryM.update_date", lambda: bwb.model.DiaryM.update_date(1, now_it)),
+        ("DiaryM.get", lambda: bwb.model.DiaryM.get(1)),
+        ("DiaryM.get_with_question", lambda: bwb.model.DiaryM.get_with_question(1)),
+        ("DiaryM.get_all", lambda: bwb.model.DiaryM.get_all()),
+        ("DiaryM.get_all_for_question_and_month", lambda: bwb.model.DiaryM.get_all_for_question_and_month(
+            question_id_it, today_date.year, today_date.month)),
+        ("DiaryM.get_all_for_active_day", lambda: bwb.model.DiaryM.get_all_for_active_day()),
+        ("DiaryM.get_all_for_day_with_questions", lambda: bwb.model.DiaryM.get_all_for_day_with_questions(
+            datetime.date.today())),
+        ("DiaryM.iter_days_and_questions", lambda: list(bwb.model.DiaryM.iter_days_and_questions())),
+        ("DiaryM.get_month_activity", lambda: bwb.model.DiaryM.get_month_activity(today_date.year, today_date.month)),
+        ("DiaryM.get_month_activity_from_db", lambda: bwb.model.DiaryM.get_month_activity_from_db(
+            today_date.year, today_date.month)),
+        ("DiaryM.search", lambda: bwb.model.DiaryM.search("grateful bre", question_id_it, (0, now_it))),
+        ("DiaryM.iter_for_export", lambda: list(bwb.model.DiaryM.iter_for_export(question_id_it, (0, now_it)))),
+        ("DiaryM.content_hash_exists", lambda: bwb.model.DiaryM.content_hash_exists(
+            bwb.model.get_content_hash(now_it, question_id_it, "Entry text"))),
+        ("DiaryM.remove", lambda: bwb.model.DiaryM.remove(1)),
+        ("DiaryM.remove_many", lambda: bwb.model.DiaryM.remove_many([2, 3])),
+        ("ReminderM.add", lambda: bwb.model.ReminderM.add("Title", "Reminder")),
+        ("ReminderM.get", lambda: bwb.model.ReminderM.get(1)),
+        ("ReminderM.get_all", lambda: bwb.model.ReminderM.get_all()),
+        ("ReminderM.update_schedule", lambda: bwb.model.ReminderM.update_schedule(
+            1, now_it, bwb.model.RecurrenceEnum.daily)),
+        ("ReminderM.get_all_scheduled", lambda: bwb.model.ReminderM.get_all_scheduled()),
+        ("ReminderM.remove", lambda: bwb.model.ReminderM.remove(1)),
+    ]
+
+
+def get_model_method_names():
+    ret_name_list = []
+    for model_class in CHECKED_CLASSES:
+        for (name_str, attribute) in vars(model_class).items():
+            if isinstance(attribute, staticmethod) and not name_str.startswith("_"):
+                ret_name_list.append(model_class.__name__ + "." + name_str)
+    return ret_name_list
+
+
+def get_plan_problems(i_db_conn, i_sql_str, i_allowed_scan_str):
+    """:param i_allowed_scan_str: The scan of a full-listing method (please see FULL_LISTING_METHODS_DICT), or None"""
+    ret_problem_list = []
+    for plan_row_te in i_db_conn.execute("EXPLAIN QUERY PLAN " + i_sql_str).fetchall():
+        detail_str = plan_row_te[-1]
+        if detail_str.startswith("SCAN "):
+            if (detail_str != i_allowed_scan_str and detail_str != CONSTANT_ROW_SCAN_STR
+                    and not VIRTUAL_TABLE_MATCH_RE.match(detail_str)):
+                ret_problem_list.append(detail_str)
+        elif " AUTOMATIC " in detail_str or "USE TEMP B-TREE FOR ORDER BY" in detail_str:
+            ret_problem_list.append(detail_str)
+    return ret_problem_list
+
+
+def main():
+    bwb.model.active_storage_profile = bwb.model.StorageProfileEnum.memory
+    db_conn = bwb.model.DbHelperM.get_db_connection()
+    checked_calls = get_checked_calls()
+
+    failure_list = []
+    checked_name_list = [name_str for (name_str, call) in checked_calls]
+    for name_str in get_model_method_names():
+        if name_str not in checked_name_list:
+            failure_list.append(name_str + ": not checked, please add it to get_checked_calls()")
+
+    for (name_str, call) in checked_calls:
+        traced_sql_list = []
+        db_conn.set_trace_callback(traced_sql_list.append)
+        call()
+        db_conn.set_trace_callback(None)
+        for sql_str in traced_sql_list:
+            if sql_str.lstrip().upper().startswith(SKIPPED_STATEMENT_PREFIXES) or FTS_SHADOW_TABLE_STR in sql_str:
+                continue
+            for problem_str in get_plan_problems(db_conn, sql_str, FULL_LISTING_METHODS_DICT.get(name_str)):
+                failure_list.append(name_str + ": " + problem_str + "\n    " + sql_str)
+
+    for failure_str in failure_list:
+        print("FAIL " + failure_str)
+    print("Checked " + str(len(checked_calls)) + " model methods, " + str(len(failure_list)) + " problem(s)")
+    sys.exit(1 if failure_list else 0)
+
+
+if __name__ == "__main__":
+    main()
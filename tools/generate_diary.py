@@ -0,0 +1,118 @@
+"""
+Deterministic generator of large diaries, for benchmarks and for trying out the application with many years of
+entries
+
+Usage: python3 tools/generate_diary.py DB_FILE [--years N] [--entries-per-day M] [--questions Q]
+    [--min-text-length L] [--max-text-length L] [--seed S]
+
+The same arguments always give the same entries (same dates, texts and questions). The entries end on
+END_UNIX_TIME_IT rather than today, so that runs on different days can also be compared. If the diary has
+fewer than Q questions, more questions are added
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bwb.model
+
+SECONDS_PER_DAY_IT = 24 * 3600
+DAYS_PER_YEAR_IT = 365
+END_UNIX_TIME_IT = 1704067200  # -2024-01-01 00:00 UTC
+WAKING_HOURS_START_IT = 7
+WAKING_HOURS_IT = 16
+DEFAULT_SEED_IT = 1
+WORDS_TE = (
+    "breathing", "walking", "sitting", "meditation", "gratitude", "mindfulness", "friend", "family", "work",
+    "kindness", "compassion", "sangha", "dharma", "practice", "today", "tea", "morning", "evening", "smile",
+    "listening", "reading", "peace", "joy", "calm", "present", "moment", "body", "feelings", "mind", "nature",
+)
+
+
+def get_question_ids(i_nr_of_questions_it: int) -> list:
+    """Adds questions if there are not enough in the db. :return: The ids of the first i_nr_of_questions_it"""
+    question_id_list = [question.id_int for question in bwb.model.QuestionM.get_all()]
+    while len(question_id_list) < i_nr_of_questions_it:
+        question_nr_it = len(question_id_list) + 1
+        question_id_list.append(
+            bwb.model.QuestionM.add("Generated question " + str(question_nr_it), "Generated question text"))
+    return question_id_list[:i_nr_of_questions_it]
+
+
+def generate_text(i_random: random.Random, i_min_length_it: int, i_max_length_it: int) -> str:
+    target_length_it = i_random.randint(i_min_length_it, i_max_length_it)
+    word_list = []
+    length_it = 0
+    while length_it < target_length_it:
+        word_str = i_random.choice(WORDS_TE)
+        word_list.append(word_str)
+        length_it += len(word_str) + 1
+    return " ".join(word_list)[:target_length_it].capitalize()
+
+
+def generate_rows(i_years_ft: float, i_entries_per_day_it: int, i_question_id_list: list,
+        i_min_text_length_it: int=40, i_max_text_length_it: int=400, i_seed_it: int=DEFAULT_SEED_IT,
+        i_max_entries_it: int=None):
+    """
+    :param i_max_entries_it: None means no limit, otherwise generating stops after this many entries (which
+    are the oldest ones)
+    :return: (date added, diary text, question id) tuples, oldest first, which can be given to DiaryM.add_many
+    """
+    random_gen = random.Random(i_seed_it)
+    nr_of_days_it = max(1, int(i_years_ft * DAYS_PER_YEAR_IT))
+    start_unix_time_it = END_UNIX_TIME_IT - nr_of_days_it * SECONDS_PER_DAY_IT
+    entry_count_it = 0
+    for day_it in range(nr_of_days_it):
+        day_start_it = start_unix_time_it + day_it * SECONDS_PER_DAY_IT
+        second_of_day_list = sorted(
+            random_gen.randrange(WAKING_HOURS_START_IT * 3600, (WAKING_HOURS_START_IT + WAKING_HOURS_IT) * 3600)
+            for i in range(i_entries_per_day_it)
+        )
+        for second_of_day_it in second_of_day_list:
+            if i_max_entries_it is not None and entry_count_it >= i_max_entries_it:
+                return
+            yield (
+                day_start_it + second_of_day_it,
+                generate_text(random_gen, i_min_text_length_it, i_max_text_length_it),
+                random_gen.choice(i_question_id_list)
+            )
+            entry_count_it += 1
+
+
+def generate_entries(i_nr_of_entries_it: int, i_entries_per_day_it: int=3, i_nr_of_questions_it: int=4,
+        i_seed_it: int=DEFAULT_SEED_IT) -> list:
+    """
+    Adds i_nr_of_entries_it entries (to the db that the model is using), over as many years as needed
+    :return: The ids of the added entries, oldest first
+    """
+    years_ft = i_nr_of_entries_it / (i_entries_per_day_it * DAYS_PER_YEAR_IT) + 1 / DAYS_PER_YEAR_IT
+    rows_iter = generate_rows(
+        years_ft, i_entries_per_day_it, get_question_ids(i_nr_of_questions_it), i_seed_it=i_seed_it,
+        i_max_entries_it=i_nr_of_entries_it)
+    return bwb.model.DiaryM.add_many(rows_iter)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("db_file")
+    argument_parser.add_argument("--years", type=float, default=10)
+    argument_parser.add_argument("--entries-per-day", type=int, default=3)
+    argument_parser.add_argument("--questions", type=int, default=4)
+    argument_parser.add_argument("--min-text-length", type=int, default=40)
+    argument_parser.add_argument("--max-text-length", type=int, default=400)
+    argument_parser.add_argument("--seed", type=int, default=DEFAULT_SEED_IT)
+    parsed_args = argument_parser.parse_args()
+
+    bwb.model.DATABASE_FILE_NAME = parsed_args.db_file
+    rows_iter = generate_rows(
+        parsed_args.years, parsed_args.entries_per_day, get_question_ids(parsed_args.questions),
+        parsed_args.min_text_length, parsed_args.max_text_length, parsed_args.seed)
+    added_id_list = bwb.model.DiaryM.add_many(rows_iter)
+    bwb.model.DbHelperM.close_db_connection()
+    print("Added " + str(len(added_id_list)) + " diary entries to " + parsed_args.db_file)
+
+
+if __name__ == "__main__":
+    main()